@@ -14,11 +14,15 @@ DOTA格式每行：x1 y1 x2 y2 x3 y3 x4 y4 category_name difficult
 """
 
 import os
-import glob
+import sys
 import argparse
+from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'yoloDateset'))
+from relabel import NameRemap, relabel_directory
 
-def delete_classes(input_dir, output_dir, delete_class_names):
+
+def delete_classes(input_dir, output_dir, delete_class_names, workers=0):
     """
     从 DOTA 标注文件中删除指定类别
 
@@ -26,62 +30,17 @@ def delete_classes(input_dir, output_dir, delete_class_names):
         input_dir: 输入标注文件夹路径
         output_dir: 输出标注文件夹路径
         delete_class_names: 要删除的类别名称集合
+        workers: 并行进程数，0 表示全部核心
     """
-    os.makedirs(output_dir, exist_ok=True)
-
-    total_files = 0
-    total_deleted = 0
-    total_kept = 0
-
-    txt_files = glob.glob(os.path.join(input_dir, "*.txt"))
-    for txt_file in txt_files:
-        filename = os.path.basename(txt_file)
-        output_path = os.path.join(output_dir, filename)
-
-        kept_lines = []
-        deleted_count = 0
-
-        with open(txt_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                stripped = line.strip()
-
-                # 保留空行
-                if not stripped:
-                    kept_lines.append('')
-                    continue
-
-                # 保留头部信息
-                if stripped.startswith('imagesource:') or stripped.startswith('gsd:'):
-                    kept_lines.append(stripped)
-                    continue
-
-                parts = stripped.split()
-                if len(parts) < 9:
-                    kept_lines.append(stripped)
-                    continue
-
-                # DOTA格式：x1 y1 x2 y2 x3 y3 x4 y4 category difficult
-                category = parts[8]
-                if category in delete_class_names:
-                    deleted_count += 1
-                else:
-                    kept_lines.append(stripped)
-
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(kept_lines))
-
-        total_files += 1
-        total_deleted += deleted_count
-        total_kept += len(kept_lines)
-
-        if deleted_count > 0:
-            print(f"  {filename}: 删除 {deleted_count} 行，保留 {len(kept_lines)} 行")
+    # 类别名去重后一次查表，多文件进程池并行
+    name_remap = NameRemap({name: None for name in delete_class_names})
+    stats = relabel_directory(input_dir, output_dir, name_remap, workers)
 
     print("-" * 50)
     print(f"处理完成！")
-    print(f"  处理文件数：{total_files}")
-    print(f"  删除标注总数：{total_deleted}")
-    print(f"  保留标注总数：{total_kept}")
+    print(f"  处理文件数：{stats['files']}")
+    print(f"  删除标注总数：{stats['deleted']}")
+    print(f"  保留标注总数：{stats['kept']}")
     print(f"  输出路径：{output_dir}")
 
 
@@ -93,6 +52,8 @@ if __name__ == "__main__":
                         help='输出标注文件夹路径')
     parser.add_argument('--classes', nargs='+', default=["tiltedConnection"],
                         help='要删除的类别名称（可指定多个）')
+    parser.add_argument('--workers', '-j', type=int, default=0,
+                        help='并行进程数，0 表示使用全部 CPU 核心')
 
     args = parser.parse_args()
 
@@ -107,4 +68,4 @@ if __name__ == "__main__":
         print(f"错误：输入文件夹不存在：{args.input}")
         exit(1)
 
-    delete_classes(args.input, args.output, set(args.classes))
+    delete_classes(args.input, args.output, set(args.classes), args.workers)
@@ -0,0 +1,192 @@
+"""
+切片预测合并：把 slice_images.py 切片上的旋转框预测还原到原图坐标，并按类别做旋转框 NMS
+
+输入为每个切片一个预测文件，文件名主干为切片名 {原文件名}__{缩放比例}__{x}___{y}：
+- --format yolo_obb：ultralytics predict 的 save_txt + save_conf 输出
+      class x1 y1 x2 y2 x3 y3 x4 y4 conf（按切片尺寸 --size 归一化）
+- --format dota：x1 y1 ... y4 classname score（切片像素坐标）
+不符合切片命名的文件视为整图预测（偏移 0，比例 1）
+
+还原坐标：原图坐标 = (切片坐标 + 切片左上角) / 缩放比例
+
+合并：
+- 所有原图、所有类别的框一次完成 NMS，分组 = 原图序号 × 类别数 + 类别
+- 候选对先按外接框扫描筛选，只对外接框相交的同组框计算旋转 IoU，单图数万个框也在一秒内完成
+
+输出：
+    output/{原文件名}.txt          DOTA 结果格式：x1 y1 ... y4 classname score
+    output/Task1_{类别}.txt        （--task1）DOTA 评测提交格式：原文件名 score x1 y1 ... y4
+
+使用方法：
+    python DOTA_dataset/merge_tile_predictions.py --predictions runs/obb/predict/labels --output merged
+    python DOTA_dataset/merge_tile_predictions.py --predictions tile_results --format dota --iou-thr 0.1 --conf 0.05 --task1 -j 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'yoloDateset'))
+from annotations import parse_dota_scores, parse_yolo_obb_scores
+from configs import CLASSES
+from convert_runner import add_runner_arguments, run_tasks
+from file_index import get_index
+from obb_geometry import denormalize_polygons
+from rotated_iou import rotated_nms
+from slice_images import parse_tile_name
+
+
+FORMATS = ('yolo_obb', 'dota')
+
+
+def load_tile(
+    pred_path: str,
+    fmt: str = 'yolo_obb',
+    size: int = 1024,
+    conf: float = 0.0
+) -> Tuple[str, List[str], np.ndarray, np.ndarray]:
+    """
+    读取一个切片的预测并还原到原图坐标（进程池任务）
+
+    Args:
+        pred_path: 切片预测文件
+        fmt: yolo_obb / dota
+        size: 切片尺寸（yolo_obb 反归一化用）
+        conf: 置信度下限，低于此值的框丢弃
+
+    Returns:
+        (原文件名, 类别名列表, 原图像素 polygons (n, 4, 2), scores (n,))
+    """
+    name = Path(pred_path).stem
+    tile = parse_tile_name(name)
+    stem, rate, x, y = tile if tile is not None else (name, 1.0, 0, 0)
+
+    with open(pred_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if fmt == 'yolo_obb':
+        class_ids, polygons, scores, _ = parse_yolo_obb_scores(text)
+        polygons = denormalize_polygons(polygons, (size, size))
+        names = [CLASSES[c] if 0 <= c < len(CLASSES) else str(c) for c in class_ids.tolist()]
+    else:
+        names, polygons, scores, _ = parse_dota_scores(text)
+
+    keep = scores >= conf
+    if not keep.all():
+        names = [n for n, k in zip(names, keep.tolist()) if k]
+        polygons, scores = polygons[keep], scores[keep]
+    polygons = (polygons + (x, y)) / rate
+    return stem, names, polygons, scores
+
+
+def format_dota_scores(names: Sequence[str], polygons: np.ndarray, scores: np.ndarray) -> str:
+    """格式化 DOTA 结果文本：x1 y1 ... y4 classname score"""
+    coords = np.asarray(polygons, dtype=np.float64).reshape(-1, 8).tolist()
+    return '\n'.join(
+        f"{' '.join('%.1f' % v for v in row)} {name} {score:.4f}"
+        for row, name, score in zip(coords, names, np.asarray(scores).tolist()))
+
+
+def merge_tile_predictions(
+    pred_dir: str,
+    output_dir: str,
+    fmt: str = 'yolo_obb',
+    size: int = 1024,
+    iou_thr: float = 0.1,
+    conf: float = 0.0,
+    task1: bool = False,
+    workers: int = 0,
+    chunk_size: int = 64
+) -> Tuple[int, int]:
+    """
+    合并切片预测
+
+    Args:
+        pred_dir: 切片预测目录
+        output_dir: 输出目录
+        fmt: yolo_obb / dota
+        size: 切片尺寸
+        iou_thr: NMS 的 IoU 阈值
+        conf: 置信度下限
+        task1: 是否同时写出按类别的 Task1 提交文件
+        workers: 并行进程数，0 表示全部核心
+        chunk_size: 每个进程任务一次处理的文件数
+
+    Returns:
+        (合并前的框数, 合并后的框数)
+    """
+    paths = get_index(pred_dir, ('.txt',)).paths
+    files = [paths[stem] for stem in sorted(paths) if not stem.startswith('Task1_')]
+    tasks = [(p, fmt, size, conf) for p in files]
+
+    image_index: Dict[str, int] = {}
+    class_index: Dict[str, int] = {name: i for i, name in enumerate(CLASSES)}
+    image_ids, class_ids, polygons, scores = [], [], [], []
+
+    def collect(args, result):
+        stem, names, polys, sc = result
+        image_ids.append(np.full(len(sc), image_index.setdefault(stem, len(image_index)), np.int64))
+        class_ids.append(np.fromiter((class_index.setdefault(n, len(class_index)) for n in names),
+                                     dtype=np.int64, count=len(names)))
+        polygons.append(polys)
+        scores.append(sc)
+
+    print(f"共 {len(tasks)} 个切片预测文件")
+    run_tasks(load_tile, tasks, workers, chunk_size, desc='读取', on_success=collect)
+    if not image_index:
+        print("没有可合并的预测")
+        return 0, 0
+
+    image_ids = np.concatenate(image_ids)
+    class_ids = np.concatenate(class_ids)
+    polygons = np.concatenate(polygons).reshape(-1, 4, 2)
+    scores = np.concatenate(scores)
+
+    start = time.perf_counter()
+    keep = rotated_nms(polygons, scores, iou_thr, image_ids * len(class_index) + class_ids)
+    print(f"NMS: {len(scores)} -> {len(keep)} 个框，耗时 {time.perf_counter() - start:.2f}s")
+
+    # 按原图分组写出，组内保持分数从高到低
+    keep = keep[np.argsort(image_ids[keep], kind='stable')]
+    bounds = np.searchsorted(image_ids[keep], np.arange(len(image_index) + 1))
+    class_names = np.array(list(class_index), dtype=object)
+    stems = list(image_index)
+
+    os.makedirs(output_dir, exist_ok=True)
+    for i, stem in enumerate(stems):
+        k = keep[bounds[i]:bounds[i + 1]]
+        content = format_dota_scores(class_names[class_ids[k]], polygons[k], scores[k])
+        with open(os.path.join(output_dir, stem + '.txt'), 'w', encoding='utf-8') as f:
+            f.write(content + '\n' if content else '')
+
+    if task1:
+        by_class = keep[np.argsort(class_ids[keep], kind='stable')]
+        for c in np.unique(class_ids[by_class]).tolist():
+            k = by_class[class_ids[by_class] == c]
+            coords = polygons[k].reshape(-1, 8).tolist()
+            with open(os.path.join(output_dir, f'Task1_{class_names[c]}.txt'), 'w', encoding='utf-8') as f:
+                for img, score, row in zip(image_ids[k].tolist(), scores[k].tolist(), coords):
+                    f.write(f"{stems[img]} {score:.4f} {' '.join('%.1f' % v for v in row)}\n")
+
+    print(f"合并完成: {len(stems)} 张原图，结果已保存至: {output_dir}")
+    return len(scores), len(keep)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='合并切片旋转框预测（偏移还原 + 按类别旋转 NMS）')
+    parser.add_argument('--predictions', '-p', type=str, required=True, help='切片预测目录')
+    parser.add_argument('--output', '-o', type=str, default='merged_predictions', help='输出目录')
+    parser.add_argument('--format', choices=FORMATS, default='yolo_obb', help='预测格式')
+    parser.add_argument('--size', type=int, default=1024, help='切片尺寸，yolo_obb 反归一化用 (默认: 1024)')
+    parser.add_argument('--iou-thr', type=float, default=0.1, help='NMS IoU 阈值 (默认: 0.1)')
+    parser.add_argument('--conf', type=float, default=0.0, help='置信度下限 (默认: 0)')
+    parser.add_argument('--task1', action='store_true', help='同时写出 DOTA Task1 提交文件')
+    add_runner_arguments(parser)
+
+    args = parser.parse_args()
+    merge_tile_predictions(args.predictions, args.output, args.format, args.size, args.iou_thr,
+                           args.conf, args.task1, args.workers, args.chunk_size)
@@ -4,6 +4,9 @@
 功能：
 - 将两个 xAnyLabeling JSON 标注文件（或文件夹）中指定类别的标注合并
 - 支持两种模式：单文件合并、文件夹批量合并
+- 文件夹模式在进程池中并行处理，每个文件只解析、过滤一次；
+  仅存在于一侧且没有被过滤掉任何标注的文件直接复制，不重新序列化
+- JSON 读写使用 json_codec（安装了 orjson 时自动使用），--compact 输出紧凑格式
 
 使用方法：
     # 合并两个文件
@@ -14,14 +17,19 @@
     # 合并两个文件夹
     python DOTA_dataset/merge_xanylabeling_json.py --mode folder \
         --folder_a dir_a --folder_b dir_b --output_dir output \
-        --classes_a cls1 cls2 --classes_b cls3 cls4
+        --classes_a cls1 cls2 --classes_b cls3 cls4 --workers 8 --compact
 """
 
 import os
-import json
+import sys
+import shutil
 import argparse
 from pathlib import Path
-from typing import List
+from typing import List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'yoloDateset'))
+from convert_runner import add_runner_arguments, run_tasks
+from json_codec import BACKEND, load_json, save_json
 
 
 # ==================== 配置区域 ====================
@@ -33,19 +41,6 @@ CLASSES_B = ["angelSteelNumber", "clampNumber", "endMark"]
 # ==================== 配置区域结束 ====================
 
 
-def load_json(path: str) -> dict:
-    """加载 JSON 标注文件"""
-    with open(path, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-
-def save_json(data: dict, path: str):
-    """保存 JSON 标注文件"""
-    os.makedirs(os.path.dirname(path) if os.path.dirname(path) else '.', exist_ok=True)
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-
 def filter_shapes(shapes: list, classes: List[str]) -> list:
     """按类别过滤 shapes，classes 为空则保留全部"""
     if not classes:
@@ -63,32 +58,37 @@ def count_by_class(shapes: list) -> dict:
     return counts
 
 
-def merge_two_json(data_a: dict, data_b: dict, classes_a: List[str], classes_b: List[str]) -> dict:
-    """
-    合并两个 xAnyLabeling JSON 数据
+def count_into(totals: dict, counts: dict):
+    """把 count_by_class 的结果累加到 totals"""
+    for label, n in counts.items():
+        totals[label] = totals.get(label, 0) + n
 
-    以 data_a 的元数据（imagePath, imageHeight 等）为基础，
-    将两个 JSON 中指定类别的 shapes 合并
-    """
+
+def _merge_filtered(data_a: dict, data_b: dict, classes_a: List[str], classes_b: List[str]) -> Tuple[dict, list, list]:
+    """每侧只过滤一次，返回 (合并结果, A 侧保留的 shapes, B 侧保留的 shapes)"""
     shapes_a = filter_shapes(data_a.get('shapes', []), classes_a)
     shapes_b = filter_shapes(data_b.get('shapes', []), classes_b)
 
     merged = data_a.copy()
     merged['shapes'] = shapes_a + shapes_b
-    return merged
+    return merged, shapes_a, shapes_b
 
 
-def merge_files(file_a: str, file_b: str, output: str, classes_a: List[str], classes_b: List[str]):
-    """合并两个 JSON 标注文件"""
-    data_a = load_json(file_a)
-    data_b = load_json(file_b)
+def merge_two_json(data_a: dict, data_b: dict, classes_a: List[str], classes_b: List[str]) -> dict:
+    """
+    合并两个 xAnyLabeling JSON 数据
+
+    以 data_a 的元数据（imagePath, imageHeight 等）为基础，
+    将两个 JSON 中指定类别的 shapes 合并
+    """
+    return _merge_filtered(data_a, data_b, classes_a, classes_b)[0]
 
-    merged = merge_two_json(data_a, data_b, classes_a, classes_b)
-    save_json(merged, output)
 
-    # 统计信息
-    shapes_a = filter_shapes(data_a.get('shapes', []), classes_a)
-    shapes_b = filter_shapes(data_b.get('shapes', []), classes_b)
+def merge_files(file_a: str, file_b: str, output: str, classes_a: List[str], classes_b: List[str],
+                compact: bool = False):
+    """合并两个 JSON 标注文件"""
+    merged, shapes_a, shapes_b = _merge_filtered(load_json(file_a), load_json(file_b), classes_a, classes_b)
+    save_json(merged, output, compact)
 
     print(f"文件 A 筛选出 {len(shapes_a)} 个标注: {count_by_class(shapes_a)}")
     print(f"文件 B 筛选出 {len(shapes_b)} 个标注: {count_by_class(shapes_b)}")
@@ -96,55 +96,87 @@ def merge_files(file_a: str, file_b: str, output: str, classes_a: List[str], cla
     print(f"输出文件: {output}")
 
 
-def merge_folders(folder_a: str, folder_b: str, output_dir: str, classes_a: List[str], classes_b: List[str]):
-    """批量合并两个文件夹中的 JSON 标注文件"""
+def merge_one(output_path: str, path_a: str, path_b: str, classes_a: List[str], classes_b: List[str],
+              compact: bool = False) -> Tuple[str, dict, dict]:
+    """
+    合并 / 过滤一个文件（进程池任务）
+
+    Args:
+        output_path: 输出路径
+        path_a: A 侧文件路径，不存在时为 None
+        path_b: B 侧文件路径，不存在时为 None
+        classes_a / classes_b: 两侧保留的类别
+        compact: 是否输出紧凑格式
+
+    Returns:
+        (类型 'merged' / 'only_a' / 'only_b', A 侧类别计数, B 侧类别计数)
+    """
+    if path_a and path_b:
+        merged, shapes_a, shapes_b = _merge_filtered(load_json(path_a), load_json(path_b), classes_a, classes_b)
+        save_json(merged, output_path, compact)
+        return 'merged', count_by_class(shapes_a), count_by_class(shapes_b)
+
+    kind, path, classes = ('only_a', path_a, classes_a) if path_a else ('only_b', path_b, classes_b)
+    data = load_json(path)
+    shapes = data.get('shapes', [])
+    kept = filter_shapes(shapes, classes)
+    if len(kept) == len(shapes) and not compact:
+        # 没有标注被过滤掉，原样复制
+        shutil.copyfile(path, output_path)
+    else:
+        data['shapes'] = kept
+        save_json(data, output_path, compact)
+    counts = count_by_class(kept)
+    return (kind, counts, {}) if kind == 'only_a' else (kind, {}, counts)
+
+
+def merge_folders(folder_a: str, folder_b: str, output_dir: str, classes_a: List[str], classes_b: List[str],
+                  workers: int = 0, chunk_size: int = 16, compact: bool = False):
+    """
+    批量合并两个文件夹中的 JSON 标注文件
+
+    Args:
+        folder_a / folder_b: 两个输入文件夹
+        output_dir: 输出文件夹
+        classes_a / classes_b: 两侧保留的类别（空列表表示全部）
+        workers: 并行进程数，0 表示全部核心，1 表示单进程
+        chunk_size: 每个进程任务一次处理的文件数
+        compact: 是否输出紧凑格式（默认与原文件一致的 2 空格缩进）
+    """
     os.makedirs(output_dir, exist_ok=True)
 
     # 获取两个文件夹的 JSON 文件映射
-    files_a = {f for f in os.listdir(folder_a) if f.endswith('.json')}
-    files_b = {f for f in os.listdir(folder_b) if f.endswith('.json')}
+    with os.scandir(folder_a) as it:
+        files_a = {e.name for e in it if e.name.endswith('.json')}
+    with os.scandir(folder_b) as it:
+        files_b = {e.name for e in it if e.name.endswith('.json')}
 
     all_files = files_a | files_b
-    merged_count = 0
-    only_a_count = 0
-    only_b_count = 0
-
-    for filename in sorted(all_files):
-        output_path = os.path.join(output_dir, filename)
-
-        if filename in files_a and filename in files_b:
-            # 两个文件夹都有，合并
-            data_a = load_json(os.path.join(folder_a, filename))
-            data_b = load_json(os.path.join(folder_b, filename))
-            merged = merge_two_json(data_a, data_b, classes_a, classes_b)
-            save_json(merged, output_path)
-            merged_count += 1
-
-            count_a = count_by_class(filter_shapes(data_a.get('shapes', []), classes_a))
-            count_b = count_by_class(filter_shapes(data_b.get('shapes', []), classes_b))
-            print(f"  [合并] {filename}: A={count_a}, B={count_b}")
-
-        elif filename in files_a:
-            # 仅在 A 中
-            data_a = load_json(os.path.join(folder_a, filename))
-            data_a['shapes'] = filter_shapes(data_a.get('shapes', []), classes_a)
-            save_json(data_a, output_path)
-            only_a_count += 1
-            print(f"  [仅A]  {filename}: {count_by_class(data_a['shapes'])}")
+    tasks = [(os.path.join(output_dir, name),
+              os.path.join(folder_a, name) if name in files_a else None,
+              os.path.join(folder_b, name) if name in files_b else None,
+              classes_a, classes_b, compact)
+             for name in sorted(all_files)]
 
-        else:
-            # 仅在 B 中
-            data_b = load_json(os.path.join(folder_b, filename))
-            data_b['shapes'] = filter_shapes(data_b.get('shapes', []), classes_b)
-            save_json(data_b, output_path)
-            only_b_count += 1
-            print(f"  [仅B]  {filename}: {count_by_class(data_b['shapes'])}")
+    kinds = {'merged': 0, 'only_a': 0, 'only_b': 0}
+    totals_a, totals_b = {}, {}
+
+    def collect(args, result):
+        kind, counts_a, counts_b = result
+        kinds[kind] += 1
+        count_into(totals_a, counts_a)
+        count_into(totals_b, counts_b)
+
+    print(f"JSON 后端：{BACKEND}")
+    run_tasks(merge_one, tasks, workers, chunk_size, desc='合并', on_success=collect)
 
     print("-" * 50)
     print(f"处理完成！输出文件总数：{len(all_files)}")
-    print(f"  - 两文件夹合并：{merged_count} 个")
-    print(f"  - 仅来自文件夹 A：{only_a_count} 个")
-    print(f"  - 仅来自文件夹 B：{only_b_count} 个")
+    print(f"  - 两文件夹合并：{kinds['merged']} 个")
+    print(f"  - 仅来自文件夹 A：{kinds['only_a']} 个")
+    print(f"  - 仅来自文件夹 B：{kinds['only_b']} 个")
+    print(f"  - A 侧保留标注：{totals_a}")
+    print(f"  - B 侧保留标注：{totals_b}")
     print(f"  - 输出路径：{output_dir}")
 
 
@@ -163,6 +195,9 @@ def main():
                         help='从A中提取的类别（留空=全部）')
     parser.add_argument('--classes_b', nargs='*', default=CLASSES_B,
                         help='从B中提取的类别（留空=全部）')
+    parser.add_argument('--compact', action='store_true',
+                        help='输出紧凑 JSON（无缩进），文件更小、写入更快')
+    add_runner_arguments(parser, default_chunk_size=16)
 
     args = parser.parse_args()
 
@@ -178,10 +213,11 @@ def main():
 
     if path_a.is_file() and path_b.is_file():
         # 两个文件：合并为单个文件
-        merge_files(str(path_a), str(path_b), args.output, args.classes_a, args.classes_b)
+        merge_files(str(path_a), str(path_b), args.output, args.classes_a, args.classes_b, args.compact)
     elif path_a.is_dir() and path_b.is_dir():
         # 两个文件夹：批量合并
-        merge_folders(str(path_a), str(path_b), args.output, args.classes_a, args.classes_b)
+        merge_folders(str(path_a), str(path_b), args.output, args.classes_a, args.classes_b,
+                      args.workers, args.chunk_size, args.compact)
     else:
         if not path_a.exists():
             print(f"错误：路径A不存在：{args.input_a}")
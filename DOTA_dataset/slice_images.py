@@ -0,0 +1,362 @@
+"""
+大图切片：把大尺寸图纸切成带重叠的训练切片，并裁剪对应的旋转框标注
+
+切片规则与 DOTA devkit / mmrotate 的 img_split 一致：
+- 每个缩放比例下按 步长 = 切片尺寸 - 重叠 滑窗，最后一个窗口与图像边缘对齐
+- 图像小于切片尺寸时补边到切片尺寸（--padding-value）
+- 切片命名：{原文件名}__{缩放比例}__{x}___{y}，merge_tile_predictions.py 按此还原坐标
+
+标注处理：
+- 完全落在切片内的目标原样平移
+- 与切片的交集面积 / 目标面积 >= --iof-thr 的截断目标，取交集多边形的最小外接旋转矩形并限制在切片内，
+  DOTA 输出的 difficult 记为 2（与 mmrotate 一致）
+- 其余目标丢弃
+- 没有标注文件的图像（或未指定 --labels）按无目标切分：有标注目录时写出空标注，
+  未指定 --labels 时只输出切片图像
+
+性能：
+- 每张原图在进程池中只解码一次，各缩放比例和切片都从同一份像素切出
+- 切片的 JPEG / PNG 编码和写盘交给每个进程内的编码线程池（cv2.imencode 会释放 GIL）
+- 目标与切片的相交判断先按外接框过滤，交集面积整批向量化计算
+
+输出目录结构：
+    output/images/*.png       切片图像
+    output/annfiles/*.txt     DOTA 标注（--format dota）
+    output/labels/*.txt       YOLO-OBB 标注（--format yolo_obb）
+
+使用方法：
+    python DOTA_dataset/slice_images.py --images path/to/images --labels path/to/dota/labels --output split_output
+    python DOTA_dataset/slice_images.py --images imgs --labels yolo/labels --format yolo_obb --size 1024 --gap 200 --rates 0.5 1.0 --ext .jpg -j 8
+    python DOTA_dataset/slice_images.py --images test_images --output split_test   # 只切图像（推理用）
+"""
+
+import argparse
+import atexit
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'yoloDateset'))
+from annotations import format_dota, format_yolo_obb, parse_dota, parse_yolo_obb, polygon_areas
+from convert_runner import add_runner_arguments, run_tasks
+from file_index import get_index, pair_files, report_orphans
+from obb_geometry import boxes_to_polygons, denormalize_polygons, normalize_polygons, polygons_to_boxes
+from rotated_iou import intersection_area, intersection_polygons
+
+
+FORMATS = ('dota', 'yolo_obb')
+
+# 截断目标在 DOTA 输出中的 difficult 值
+TRUNCATED_DIFFICULT = 2
+
+# 切片文件名主干：{原文件名}__{缩放比例}__{x}___{y}
+TILE_NAME_RE = re.compile(r'^(?P<stem>.+)__(?P<rate>[0-9.]+)__(?P<x>\d+)___(?P<y>\d+)$')
+
+
+def tile_name(stem: str, rate: float, x: int, y: int) -> str:
+    """切片文件名主干"""
+    return f'{stem}__{rate}__{x}___{y}'
+
+
+def parse_tile_name(name: str) -> Optional[Tuple[str, float, int, int]]:
+    """切片文件名主干 -> (原文件名, 缩放比例, x, y)，不是切片名时返回 None"""
+    m = TILE_NAME_RE.match(name)
+    if m is None:
+        return None
+    return m.group('stem'), float(m.group('rate')), int(m.group('x')), int(m.group('y'))
+
+
+class _AutoIndex(dict):
+    """类别名 -> ID，遇到新类别名时自动编号（DOTA 切片保留全部类别）"""
+
+    def get(self, key, default=None):
+        if key not in self:
+            self[key] = len(self)
+        return self[key]
+
+
+def sliding_windows(width: int, height: int, size: int, gap: int) -> np.ndarray:
+    """
+    滑窗起点
+
+    Returns:
+        (K, 2) 每个窗口的左上角 (x, y)
+    """
+    step = size - gap
+
+    def starts(length: int) -> List[int]:
+        if length <= size:
+            return [0]
+        n = int(np.ceil((length - size) / step)) + 1
+        xs = [step * i for i in range(n)]
+        xs[-1] = length - size
+        return xs
+
+    xs, ys = starts(width), starts(height)
+    return np.array([(x, y) for y in ys for x in xs], dtype=np.int64).reshape(-1, 2)
+
+
+def clip_to_windows(
+    polygons: np.ndarray,
+    windows: np.ndarray,
+    size: int,
+    iof_thr: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    把目标分配到各切片
+
+    Args:
+        polygons: (N, 4, 2) 当前缩放比例下的像素坐标
+        windows: (K, 2) 切片左上角
+        size: 切片尺寸
+        iof_thr: 截断目标保留的最小 交集面积 / 目标面积
+
+    Returns:
+        (window_idx, object_idx, 切片内坐标 (M, 4, 2), truncated (M,) bool)
+    """
+    if not len(polygons) or not len(windows):
+        empty = np.zeros(0, np.int64)
+        return empty, empty, np.zeros((0, 4, 2)), np.zeros(0, bool)
+
+    win_boxes = np.concatenate([windows, windows + size], axis=1).astype(np.float64)
+    obj_boxes = polygons_to_boxes(polygons)
+    hit = ((win_boxes[:, None, 0] < obj_boxes[None, :, 2]) & (obj_boxes[None, :, 0] < win_boxes[:, None, 2]) &
+           (win_boxes[:, None, 1] < obj_boxes[None, :, 3]) & (obj_boxes[None, :, 1] < win_boxes[:, None, 3]))
+    w, o = np.nonzero(hit)
+
+    # 外接框完全在切片内的目标不需要裁剪
+    inside = ((obj_boxes[o, 0] >= win_boxes[w, 0]) & (obj_boxes[o, 1] >= win_boxes[w, 1]) &
+              (obj_boxes[o, 2] <= win_boxes[w, 2]) & (obj_boxes[o, 3] <= win_boxes[w, 3]))
+    local = polygons[o] - windows[w][:, None, :]
+    truncated = ~inside
+
+    keep = inside.copy()
+    part = np.flatnonzero(truncated)
+    if len(part):
+        window_polys = boxes_to_polygons(np.array([[0, 0, size, size]], dtype=np.float64))
+        window_polys = np.repeat(window_polys, len(part), axis=0)
+        areas = polygon_areas(local[part])
+        inter = intersection_area(local[part], window_polys)
+        points, counts = intersection_polygons(local[part], window_polys)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ok = (areas > 0) & (inter >= iof_thr * areas)
+        for k in np.flatnonzero(ok).tolist():
+            rect = cv2.minAreaRect(points[k, :counts[k]].astype(np.float32))
+            local[part[k]] = np.clip(cv2.boxPoints(rect), 0, size)
+        keep[part[ok]] = True
+
+    return w[keep], o[keep], local[keep], truncated[keep]
+
+
+# ==================== 编码线程池（每个工作进程一个） ====================
+
+_encoder: Optional[ThreadPoolExecutor] = None
+
+
+def _get_encoder(threads: int) -> ThreadPoolExecutor:
+    global _encoder
+    if _encoder is None:
+        _encoder = ThreadPoolExecutor(max_workers=max(threads, 1))
+        atexit.register(_encoder.shutdown)
+    return _encoder
+
+
+def _encode_write(path: str, tile: np.ndarray, params: list):
+    ok, buf = cv2.imencode(os.path.splitext(path)[1], tile, params)
+    if not ok:
+        raise IOError(f"编码失败: {path}")
+    buf.tofile(path)
+
+
+def _encode_params(ext: str) -> list:
+    if ext.lower() in ('.jpg', '.jpeg'):
+        return [cv2.IMWRITE_JPEG_QUALITY, 95]
+    if ext.lower() == '.png':
+        # 切片数量大，PNG 用较低压缩级别换取速度
+        return [cv2.IMWRITE_PNG_COMPRESSION, 1]
+    return []
+
+
+def slice_one(
+    image_path: str,
+    label_path: Optional[str],
+    output_dir: str,
+    fmt: str = 'dota',
+    size: int = 1024,
+    gap: int = 200,
+    rates: Sequence[float] = (1.0,),
+    iof_thr: float = 0.7,
+    ext: str = '.png',
+    padding_value: int = 0,
+    skip_empty: bool = False,
+    encoder_threads: int = 4,
+    write_labels: bool = True
+) -> Tuple[int, int]:
+    """
+    切分一张图像（进程池任务）
+
+    label_path 为 None 时按无目标处理；write_labels=False 时只写切片图像
+
+    Returns:
+        (写出的切片数, 写出的目标数)
+    """
+    img = cv2.imdecode(np.fromfile(image_path, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    if img is None:
+        raise IOError(f"图片读取失败: {image_path}")
+    h, w = img.shape[:2]
+
+    text = ''
+    if label_path is not None:
+        with open(label_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+    if fmt == 'dota':
+        class_index = _AutoIndex()
+        class_ids, polygons, difficult, _, _ = parse_dota(text, class_index)
+        names = np.array(list(class_index), dtype=object)
+    else:
+        class_ids, polygons, _ = parse_yolo_obb(text)
+        polygons = denormalize_polygons(polygons, (w, h))
+        difficult = np.zeros(len(class_ids), bool)
+        names = None
+
+    stem = Path(image_path).stem
+    image_out = os.path.join(output_dir, 'images')
+    label_out = os.path.join(output_dir, 'annfiles' if fmt == 'dota' else 'labels')
+    encoder = _get_encoder(encoder_threads)
+    params = _encode_params(ext)
+    futures = []
+    tiles = objects = 0
+
+    for rate in rates:
+        scaled = img if rate == 1 else cv2.resize(
+            img, (max(int(round(w * rate)), 1), max(int(round(h * rate)), 1)),
+            interpolation=cv2.INTER_AREA if rate < 1 else cv2.INTER_LINEAR)
+        sh, sw = scaled.shape[:2]
+        windows = sliding_windows(sw, sh, size, gap)
+        win_idx, obj_idx, local, truncated = clip_to_windows(polygons * rate, windows, size, iof_thr)
+        order = np.argsort(win_idx, kind='stable')
+        win_idx, obj_idx, local, truncated = win_idx[order], obj_idx[order], local[order], truncated[order]
+        bounds = np.searchsorted(win_idx, np.arange(len(windows) + 1))
+
+        for k, (x, y) in enumerate(windows.tolist()):
+            s, e = bounds[k], bounds[k + 1]
+            if skip_empty and s == e:
+                continue
+            tile = scaled[y:y + size, x:x + size]
+            if tile.shape[0] < size or tile.shape[1] < size:
+                # 补边到切片尺寸（右侧、下侧）
+                tile = cv2.copyMakeBorder(tile, 0, size - tile.shape[0], 0, size - tile.shape[1],
+                                          cv2.BORDER_CONSTANT, value=[padding_value] * 4)
+            else:
+                tile = np.ascontiguousarray(tile)
+            name = tile_name(stem, rate, x, y)
+            futures.append(encoder.submit(_encode_write, os.path.join(image_out, name + ext), tile, params))
+
+            tiles += 1
+            objects += e - s
+            if not write_labels:
+                continue
+            o = obj_idx[s:e]
+            if fmt == 'dota':
+                diff = np.where(truncated[s:e], TRUNCATED_DIFFICULT, difficult[o].astype(np.int64))
+                content = format_dota(names[class_ids[o]] if len(o) else [], local[s:e], diff)
+            else:
+                content = format_yolo_obb(class_ids[o], normalize_polygons(local[s:e], (size, size), clamp=True))
+            with open(os.path.join(label_out, name + '.txt'), 'w', encoding='utf-8') as f:
+                f.write(content + '\n' if content else '')
+
+    for future in futures:
+        future.result()
+    return tiles, objects
+
+
+def slice_images(
+    image_dir: str,
+    label_dir: Optional[str],
+    output_dir: str,
+    fmt: str = 'dota',
+    size: int = 1024,
+    gap: int = 200,
+    rates: Sequence[float] = (1.0,),
+    iof_thr: float = 0.7,
+    ext: str = '.png',
+    padding_value: int = 0,
+    skip_empty: bool = False,
+    workers: int = 0,
+    encoder_threads: int = 4
+) -> Tuple[int, int]:
+    """
+    批量切分图像和标注
+
+    Args:
+        image_dir: 原图目录
+        label_dir: 标注目录（DOTA 或 YOLO-OBB），None 时只切分图像、不写标注
+        output_dir: 输出目录
+        fmt: dota / yolo_obb
+        size: 切片尺寸
+        gap: 相邻切片的重叠像素
+        rates: 缩放比例列表
+        iof_thr: 截断目标保留阈值（交集面积 / 目标面积）
+        ext: 切片图像扩展名 .png / .jpg
+        padding_value: 补边像素值
+        skip_empty: 是否跳过没有目标的切片
+        workers: 并行进程数，0 表示全部核心
+        encoder_threads: 每个进程的编码线程数
+
+    Returns:
+        (切片总数, 目标总数)
+    """
+    if gap >= size:
+        raise ValueError(f"重叠 {gap} 必须小于切片尺寸 {size}")
+    os.makedirs(os.path.join(output_dir, 'images'), exist_ok=True)
+    if label_dir:
+        os.makedirs(os.path.join(output_dir, 'annfiles' if fmt == 'dota' else 'labels'), exist_ok=True)
+        pairs, orphan_labels, orphan_images = pair_files(label_dir, image_dir)
+        report_orphans(orphan_labels, orphan_images)
+        if orphan_images:
+            print(f"没有标注的 {len(orphan_images)} 张图像按无目标切分，写出空标注")
+        # 孤立图像也参与切分（标注为 None）
+        images = {stem: (label_path, image_path) for stem, (label_path, image_path) in pairs.items()}
+        images.update((Path(p).stem, (None, p)) for p in orphan_images)
+    else:
+        images = {stem: (None, p) for stem, p in get_index(image_dir).paths.items()}
+    tasks = [(images[stem][1], images[stem][0], output_dir, fmt, size, gap, tuple(rates), iof_thr, ext,
+              padding_value, skip_empty, encoder_threads, bool(label_dir)) for stem in sorted(images)]
+
+    totals = [0, 0]
+
+    def collect(args, result):
+        totals[0] += result[0]
+        totals[1] += result[1]
+
+    print(f"共 {len(tasks)} 张图像，切片尺寸 {size}，重叠 {gap}，缩放 {list(rates)}")
+    run_tasks(slice_one, tasks, workers, chunk_size=1, desc='切片', on_success=collect)
+    print(f"切片 {totals[0]} 张，目标 {totals[1]} 个，输出目录: {output_dir}")
+    return totals[0], totals[1]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='大图切片（DOTA / YOLO-OBB）')
+    parser.add_argument('--images', '-i', type=str, required=True, help='原图目录')
+    parser.add_argument('--labels', '-l', type=str, default=None, help='标注目录，不指定时只切分图像')
+    parser.add_argument('--output', '-o', type=str, default='split_output', help='输出目录')
+    parser.add_argument('--format', choices=FORMATS, default='dota', help='标注格式（输入与输出相同）')
+    parser.add_argument('--size', type=int, default=1024, help='切片尺寸 (默认: 1024)')
+    parser.add_argument('--gap', type=int, default=200, help='相邻切片重叠像素 (默认: 200)')
+    parser.add_argument('--rates', type=float, nargs='+', default=[1.0], help='缩放比例 (默认: 1.0)')
+    parser.add_argument('--iof-thr', type=float, default=0.7, help='截断目标保留阈值 (默认: 0.7)')
+    parser.add_argument('--ext', type=str, default='.png', choices=['.png', '.jpg'], help='切片图像格式')
+    parser.add_argument('--padding-value', type=int, default=0, help='补边像素值 (默认: 0)')
+    parser.add_argument('--skip-empty', action='store_true', help='不输出没有目标的切片')
+    parser.add_argument('--encoder-threads', type=int, default=4, help='每个进程的编码线程数 (默认: 4)')
+    add_runner_arguments(parser)
+
+    args = parser.parse_args()
+    slice_images(args.images, args.labels, args.output, args.format, args.size, args.gap, args.rates,
+                 args.iof_thr, args.ext, args.padding_value, args.skip_empty, args.workers, args.encoder_threads)
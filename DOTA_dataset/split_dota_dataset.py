@@ -5,14 +5,24 @@ DOTA数据集划分脚本
 
 使用方法：
     python DOTA_dataset/split_dota_dataset.py --images path/to/images --labels path/to/labels --output path/to/output --train 0.7 --val 0.2 --test 0.1
+    python DOTA_dataset/split_dota_dataset.py ... --link-mode hardlink    # 图片用硬链接代替复制
+    python DOTA_dataset/split_dota_dataset.py ... --link-mode manifest    # 只写 train.txt / val.txt 图片列表
+    python DOTA_dataset/split_dota_dataset.py ... --stratify              # 按类别分层划分
 """
 
 import os
-import shutil
+import sys
 import random
 import argparse
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'yoloDateset'))
+from file_links import LINK_MODES, CopyEngine, write_image_list
+from stratified_split import print_split_report, read_class_histogram, stratified_split
+
+# 只写图片列表、不放置任何文件的模式
+MANIFEST_MODE = 'manifest'
+
 
 def split_dataset(
     image_dir: str,
@@ -22,7 +32,10 @@ def split_dataset(
     val_ratio: float = 0.2,
     test_ratio: float = 0.1,
     image_ext: str = 'png',
-    seed: int = 0
+    seed: int = 0,
+    link_mode: str = 'copy',
+    copy_threads: int = 8,
+    stratify: bool = False
 ):
     """
     划分DOTA数据集
@@ -36,6 +49,10 @@ def split_dataset(
         test_ratio: 测试集比例
         image_ext: 图片扩展名
         seed: 随机种子
+        link_mode: 图片放置方式 copy / hardlink / symlink / reflink / manifest，
+            manifest 只写 train.txt / val.txt / test.txt 图片列表；标签始终复制
+        copy_threads: 同时进行的复制数
+        stratify: 是否按类别分层划分，使各划分的类别分布接近目标比例
     """
     # 检查比例之和
     total_ratio = train_ratio + val_ratio + test_ratio
@@ -49,40 +66,73 @@ def split_dataset(
     label_dir = Path(label_dir)
     output_dir = Path(output_dir)
 
+    manifest_only = link_mode == MANIFEST_MODE
+
     # 创建输出目录结构
-    for split in ['train', 'val', 'test']:
-        (output_dir / 'images' / split).mkdir(parents=True, exist_ok=True)
-        (output_dir / 'labels' / split).mkdir(parents=True, exist_ok=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if not manifest_only:
+        for split in ['train', 'val', 'test']:
+            (output_dir / 'images' / split).mkdir(parents=True, exist_ok=True)
+            (output_dir / 'labels' / split).mkdir(parents=True, exist_ok=True)
 
     # 获取所有标签文件
     label_files = list(label_dir.glob('*.txt'))
-    random.shuffle(label_files)
-
     total = len(label_files)
-    train_end = int(total * train_ratio)
-    val_end = train_end + int(total * val_ratio)
 
-    train_files = label_files[:train_end]
-    val_files = label_files[train_end:val_end]
-    test_files = label_files[val_end:]
+    if stratify:
+        label_files.sort()
+        counts, class_names = read_class_histogram(label_files, 'dota')
+        assign = stratified_split(counts, [train_ratio, val_ratio, test_ratio], seed)
+        train_files, val_files, test_files = (
+            [f for f, a in zip(label_files, assign) if a == k] for k in range(3))
+        print_split_report(counts, assign, class_names, ['train', 'val', 'test'])
+    else:
+        random.shuffle(label_files)
+
+        train_end = int(total * train_ratio)
+        val_end = train_end + int(total * val_ratio)
+
+        train_files = label_files[:train_end]
+        val_files = label_files[train_end:val_end]
+        test_files = label_files[val_end:]
 
     print(f"数据集总数: {total}")
     print(f"训练集: {len(train_files)} ({len(train_files)/total*100:.1f}%)")
     print(f"验证集: {len(val_files)} ({len(val_files)/total*100:.1f}%)")
     print(f"测试集: {len(test_files)} ({len(test_files)/total*100:.1f}%)")
 
+    if manifest_only:
+        for split_name, file_list in [('train', train_files), ('val', val_files), ('test', test_files)]:
+            if not file_list:
+                continue
+            images = []
+            for label_file in file_list:
+                img_file = image_dir / (label_file.stem + f'.{image_ext}')
+                if img_file.exists():
+                    images.append(img_file)
+                else:
+                    print(f"警告: 找不到图片 {img_file}")
+            write_image_list(output_dir / f'{split_name}.txt', images)
+            print(f"已写出 {output_dir / f'{split_name}.txt'}（{len(images)} 张）")
+        if image_dir.name != 'images' or label_dir != image_dir.parent / 'labels':
+            print("提示：Ultralytics 按 /images/ -> /labels/ 寻找标签，请确认图片目录旁有对应的 labels 目录")
+        print(f"\n数据集划分完成！输出目录: {output_dir}")
+        return
+
+    engine = CopyEngine(copy_threads, link_mode)
+
     def copy_files(file_list, split_name):
-        """复制图片和标签文件"""
+        """复制标签，按 link_mode 放置图片"""
         for label_file in file_list:
-            # 复制标签
-            shutil.copy(label_file, output_dir / 'labels' / split_name / label_file.name)
+            # 复制标签（标签常被就地修改，不使用链接）
+            engine.submit(label_file, output_dir / 'labels' / split_name / label_file.name, mode='copy')
 
-            # 复制对应的图片
+            # 放置对应的图片
             img_name = label_file.stem + f'.{image_ext}'
             img_file = image_dir / img_name
 
             if img_file.exists():
-                shutil.copy(img_file, output_dir / 'images' / split_name / img_name)
+                engine.submit(img_file, output_dir / 'images' / split_name / img_name)
             else:
                 print(f"警告: 找不到图片 {img_file}")
 
@@ -95,6 +145,9 @@ def split_dataset(
     print("正在复制测试集...")
     copy_files(test_files, 'test')
 
+    engine.close()
+    engine.report()
+
     print(f"\n数据集划分完成！输出目录: {output_dir}")
 
 
@@ -116,6 +169,13 @@ if __name__ == '__main__':
                         help='图片扩展名 (默认: png)')
     parser.add_argument('--seed', type=int, default=0,
                         help='随机种子 (默认: 0)')
+    parser.add_argument('--link-mode', choices=list(LINK_MODES) + [MANIFEST_MODE], default='copy',
+                        help='图片放置方式：copy 复制，hardlink 硬链接，symlink 符号链接，reflink 写时复制克隆'
+                             '（不可用时自动回退为复制）；manifest 只写 train.txt / val.txt 图片列表')
+    parser.add_argument('--copy-threads', type=int, default=8,
+                        help='同时进行的复制数 (默认: 8)')
+    parser.add_argument('--stratify', action='store_true',
+                        help='按类别分层划分，保证稀有类别在各划分中都有分布')
 
     args = parser.parse_args()
 
@@ -127,5 +187,8 @@ if __name__ == '__main__':
         args.val,
         args.test,
         args.ext,
-        args.seed
+        args.seed,
+        args.link_mode,
+        args.copy_threads,
+        args.stratify
     )
@@ -8,12 +8,18 @@ DOTA格式每行：x1 y1 x2 y2 x3 y3 x4 y4 category_name difficult
 
 使用方法：
     python DOTA_dataset/verify_dota_obb.py --image path/to/image.png --label path/to/label.txt
+    # 无界面批量验证：--image / --label 为目录，输出 4×4 拼图到 --output 目录
+    python DOTA_dataset/verify_dota_obb.py --batch --image path/to/images --label path/to/labels --output path/to/sheets
 """
 
 import cv2
 import numpy as np
 import os
+import sys
 import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'yoloDateset'))
 
 
 def draw_dota_obb(image_path: str, label_path: str, output_path: str = None):
@@ -147,8 +153,19 @@ if __name__ == "__main__":
     parser.add_argument('--label', '-l', type=str, default=r"E:\work\drawing_analysis\dataset\obb_all_graphes\annotation\ab_af_c_lc_tc_d_an_cn_em_labels\dota_txt\253_23_roi5.txt",
                         help='DOTA格式标签文件路径')
     parser.add_argument('--output', '-o', type=str, default=None,
-                        help='输出图片路径（可选）')
+                        help='输出图片路径（可选）；批量模式下为拼图输出目录')
+    parser.add_argument('--batch', action='store_true',
+                        help='无界面批量模式：--image / --label 为目录，渲染拼图')
+    parser.add_argument('--grid', type=int, nargs=2, default=[4, 4], metavar=('ROWS', 'COLS'),
+                        help='批量模式每张拼图的行数和列数 (默认: 4 4)')
+    parser.add_argument('--thumb', type=int, default=480, help='批量模式缩略图边长 (默认: 480)')
+    parser.add_argument('--workers', '-j', type=int, default=0, help='批量模式并行进程数，0 表示全部核心')
 
     args = parser.parse_args()
 
-    draw_dota_obb(args.image, args.label, args.output)
+    if args.batch:
+        from verify_batch import render_contact_sheets
+        render_contact_sheets(args.label, args.image, args.output or 'verify_sheets', 'dota',
+                              tuple(args.grid), args.thumb, args.workers)
+    else:
+        draw_dota_obb(args.image, args.label, args.output)
@@ -8,20 +8,29 @@ DOTA格式每行：x1 y1 x2 y2 x3 y3 x4 y4 category_name difficult
 
 使用方法：
     python DOTA_dataset/xanylabeling_to_dota.py --input path/to/json --output path/to/output
-    python DOTA_dataset/xanylabeling_to_dota.py --input path/to/json_dir --output path/to/output_dir
+    python DOTA_dataset/xanylabeling_to_dota.py --input path/to/json_dir --output path/to/output_dir --workers 8
 """
 
 import json
 import os
+import sys
 from pathlib import Path
 from typing import Optional
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'yoloDateset'))
+from build_manifest import BuildManifest
+from convert_runner import add_runner_arguments, run_tasks
+
+# 转换器版本：输出格式变化时递增，增量清单会据此触发全量重建
+CONVERTER_VERSION = '1'
+
 
 def convert_json_to_dota(
     json_file: str,
     output_dir: Optional[str] = None,
     imagesource: Optional[str] = None,
-    gsd: Optional[str] = None
+    gsd: Optional[str] = None,
+    verbose: bool = True
 ) -> Optional[str]:
     """
     转换单个JSON文件到DOTA格式
@@ -31,6 +40,7 @@ def convert_json_to_dota(
         output_dir: 输出目录，默认与JSON同目录
         imagesource: 图像来源（可选）
         gsd: 地面采样距离（可选）
+        verbose: 是否打印逐文件信息（批量模式下关闭，由进度条代替）
 
     Returns:
         输出的txt文件路径，失败返回None
@@ -65,7 +75,8 @@ def convert_json_to_dota(
         points = shape.get('points', [])
 
         if len(points) != 4:
-            print(f"警告：{json_file} 中 {label} 的标注点不是4个，跳过")
+            if verbose:
+                print(f"警告：{json_file} 中 {label} 的标注点不是4个，跳过")
             continue
 
         # 获取difficult标记
@@ -83,42 +94,62 @@ def convert_json_to_dota(
     with open(txt_file, 'w', encoding='utf-8') as f:
         f.write('\n'.join(lines))
 
-    print(f"已转换：{json_file} -> {txt_file}")
+    if verbose:
+        print(f"已转换：{json_file} -> {txt_file}")
     return str(txt_file)
 
 
+def convert_json_file(
+    json_file: str,
+    output_dir: Optional[str] = None,
+    imagesource: Optional[str] = None,
+    gsd: Optional[str] = None
+) -> Optional[str]:
+    """批量模式下的单文件任务，不打印逐文件信息"""
+    return convert_json_to_dota(json_file, output_dir, imagesource, gsd, verbose=False)
+
+
 def convert_directory(
     json_dir: str,
     output_dir: Optional[str] = None,
     imagesource: Optional[str] = None,
-    gsd: Optional[str] = None
+    gsd: Optional[str] = None,
+    workers: int = 0,
+    chunk_size: int = 64,
+    incremental: bool = True
 ):
     """
-    批量转换目录下所有JSON文件
+    批量转换目录下所有JSON文件（多进程）
 
     Args:
         json_dir: 包含JSON文件的目录
         output_dir: 输出目录
         imagesource: 图像来源（可选）
         gsd: 地面采样距离（可选）
+        workers: 并行进程数，0 表示全部核心
+        chunk_size: 每个进程任务一次处理的文件数
+        incremental: 是否按构建清单只转换新增/变化的文件，并删除已消失输入的输出
     """
     json_dir = Path(json_dir)
     json_files = list(json_dir.glob('*.json'))
 
     print(f"找到 {len(json_files)} 个JSON文件")
 
-    converted = 0
-    for json_file in json_files:
-        result = convert_json_to_dota(
-            str(json_file),
-            output_dir,
-            imagesource,
-            gsd
-        )
-        if result:
-            converted += 1
+    if not incremental:
+        tasks = [(str(json_file), output_dir, imagesource, gsd) for json_file in json_files]
+        return run_tasks(convert_json_file, tasks, workers, chunk_size)
+
+    manifest = BuildManifest(output_dir or str(json_dir), 'xanylabeling_to_dota', CONVERTER_VERSION,
+                             {'imagesource': imagesource, 'gsd': gsd})
+    todo = manifest.plan(json_files)
+    print(f"增量模式：{len(todo)} 个文件需要转换，{len(json_files) - len(todo)} 个未变化，"
+          f"删除 {manifest.removed} 个过期输出")
 
-    print(f"转换完成：{converted}/{len(json_files)}")
+    tasks = [(json_file, output_dir, imagesource, gsd) for json_file in todo]
+    try:
+        return run_tasks(convert_json_file, tasks, workers, chunk_size, on_success=manifest.record_task)
+    finally:
+        manifest.save()
 
 
 if __name__ == '__main__':
@@ -133,6 +164,9 @@ if __name__ == '__main__':
                         help='图像来源（可选）')
     parser.add_argument('--gsd', type=str, default=0.15,
                         help='地面采样距离（可选）')
+    add_runner_arguments(parser)
+    parser.add_argument('--full', action='store_true',
+                        help='忽略增量清单，全部重新转换')
 
     args = parser.parse_args()
 
@@ -150,7 +184,10 @@ if __name__ == '__main__':
             str(input_path),
             args.output,
             args.imagesource,
-            args.gsd
+            args.gsd,
+            args.workers,
+            args.chunk_size,
+            incremental=not args.full
         )
     else:
         print(f"错误：{args.input} 不存在")
@@ -1,60 +1,179 @@
 # 将coco格式的标注文件转换为yolo格式的标注文件
+#
+# 流式转换：
+# - 安装了 ijson 时单遍增量解析 images / annotations，不把整个 JSON 读入内存；否则回退为 json.load
+# - 标注只保留数值（图片ID、类别、bbox），按 image_id 分组后每个标注文件一次性覆盖写出，
+#   重复运行不会在旧文件后追加；本次没有保留标注的图片，其旧标注文件会被删除
+# - bbox -> 归一化 xywh 整体向量化计算
+# - 可选 obb=True：由分割多边形求最小外接旋转矩形，输出 YOLO-OBB（无多边形时使用 bbox 四角）
 import json
 import os
-import shutil
+import sys
 
-def convert_coco_to_yolo(coco_json_path, target_classes, output_dir):
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'yoloDateset'))
+from annotations import format_yolo_obb
+from obb_geometry import boxes_to_polygons, normalize_polygons
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# 需要增量解析的顶层数组
+COCO_SECTIONS = ('categories', 'images', 'annotations')
+
+
+def iter_coco(coco_json_path):
+    """
+    依次产出 (顶层数组名, 元素)，元素顺序与文件中一致
+
+    安装了 ijson 时单遍流式解析，否则一次性 json.load
+    """
+    if ijson is None:
+        with open(coco_json_path, 'r', encoding='utf-8') as f:
+            coco_data = json.load(f)
+        for section in COCO_SECTIONS:
+            for item in coco_data.get(section, []):
+                yield section, item
+        return
+
+    prefixes = {f'{section}.item': section for section in COCO_SECTIONS}
+    with open(coco_json_path, 'rb') as f:
+        builder = None
+        current = None
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if builder is None:
+                if prefix in prefixes and event == 'start_map':
+                    builder = ijson.ObjectBuilder()
+                    current = prefix
+                    builder.event(event, value)
+                continue
+            builder.event(event, value)
+            if prefix == current and event == 'end_map':
+                yield prefixes[current], builder.value
+                builder = None
+
+
+def _rotated_corners(points):
+    """任意多边形点集 -> 最小外接旋转矩形的 (4, 2) 四角点"""
+    import cv2
+    rect = cv2.minAreaRect(np.asarray(points, dtype=np.float32).reshape(-1, 2))
+    return cv2.boxPoints(rect)
+
+
+def convert_coco_to_yolo(coco_json_path, target_classes, output_dir, obb=False):
     """
     将COCO格式标注转换为YOLO格式
     :param coco_json_path: COCO格式的JSON文件路径
     :param target_classes: 需要保留的目标类别列表
     :param output_dir: YOLO标注输出目录
+    :param obb: 为 True 时由分割多边形生成 YOLO-OBB 标注
     """
     os.makedirs(output_dir, exist_ok=True)
-    
-    with open(coco_json_path, 'r') as f:
-        coco_data = json.load(f)
-    
-    # 创建类别映射
-    category_map = {cat['id']: idx for idx, cat in enumerate(coco_data['categories']) if cat['name'] in target_classes}
-    
-    # 创建图片ID到文件名的映射
-    image_id_map = {img['id']: img for img in coco_data['images']}
-    
-    # 遍历所有标注
-    for ann in coco_data['annotations']:
-        # 跳过不保留的类别
-        if ann['category_id'] not in category_map:
-            continue
-        
-        # 获取对应的图片信息
-        img_info = image_id_map.get(ann['image_id'])
-        if not img_info:
-            continue
-        
-        # 移除图片存在性检查
-        img_w, img_h = img_info['width'], img_info['height']
-        if img_w == 0 or img_h == 0:
-            continue
-        
-        # 转换坐标到YOLO格式
-        x, y, w, h = ann['bbox']
-        x_center = (x + w / 2) / img_w
-        y_center = (y + h / 2) / img_h
-        width = w / img_w
-        height = h / img_h
-        
-        # 验证坐标有效性
-        if not (0 <= x_center <= 1 and 0 <= y_center <= 1):
-            continue
-        
-        # 准备输出路径
-        base_name = os.path.splitext(img_info['file_name'])[0]
+
+    category_map = {}
+    images = {}                      # image_id -> (文件名主干, 宽, 高)
+    ann_image_ids, ann_classes, ann_boxes = [], [], []
+    ann_segments = []                # obb 模式下每个标注的点集（None 表示没有多边形分割）
+    categories_seen = 0
+
+    for section, item in iter_coco(coco_json_path):
+        if section == 'categories':
+            # 类别序号沿用原逻辑：在全部类别中的位置
+            if item['name'] in target_classes:
+                category_map[item['id']] = categories_seen
+            categories_seen += 1
+        elif section == 'images':
+            images[item['id']] = (os.path.splitext(item['file_name'])[0], item['width'], item['height'])
+        else:
+            # 类别过滤需要 categories；categories 在 annotations 之后出现时先全部保留，最后再过滤
+            if categories_seen and item['category_id'] not in category_map:
+                continue
+            ann_image_ids.append(item['image_id'])
+            ann_classes.append(item['category_id'])
+            ann_boxes.append(item['bbox'])
+            if obb:
+                segmentation = item.get('segmentation')
+                if isinstance(segmentation, list) and segmentation:
+                    ann_segments.append([v for part in segmentation for v in part])
+                else:
+                    ann_segments.append(None)
+
+    image_ids = np.asarray(ann_image_ids, dtype=np.int64)
+    category_ids = np.asarray(ann_classes, dtype=np.int64)
+    boxes = np.asarray(ann_boxes, dtype=np.float64).reshape(-1, 4)
+
+    # 类别 ID -> 输出序号查找（-1 表示不保留）
+    cat_keys = np.array(sorted(category_map), dtype=np.int64)
+    cat_values = np.array([category_map[k] for k in cat_keys.tolist()], dtype=np.int64)
+    pos = np.clip(np.searchsorted(cat_keys, category_ids), 0, max(len(cat_keys) - 1, 0))
+    found = (cat_keys[pos] == category_ids) if len(cat_keys) else np.zeros(len(category_ids), bool)
+    class_all = np.where(found, cat_values[pos] if len(cat_keys) else -1, -1)
+
+    # 图片 ID -> 宽高查找，找不到的图片宽高为 0
+    img_keys = np.array(list(images), dtype=np.int64)
+    img_sizes = np.array([v[1:] for v in images.values()], dtype=np.float64).reshape(-1, 2)
+    order = np.argsort(img_keys)
+    img_keys, img_sizes = img_keys[order], img_sizes[order]
+    pos = np.clip(np.searchsorted(img_keys, image_ids), 0, max(len(img_keys) - 1, 0))
+    sizes = np.zeros((len(image_ids), 2))
+    if len(img_keys):
+        hit = img_keys[pos] == image_ids
+        sizes[hit] = img_sizes[pos[hit]]
+
+    # 过滤类别和找不到 / 尺寸为 0 的图片
+    keep = (class_all >= 0) & (sizes[:, 0] > 0) & (sizes[:, 1] > 0)
+
+    # 转换坐标到YOLO格式（向量化）
+    safe = np.where(sizes > 0, sizes, 1.0)
+    x_center = (boxes[:, 0] + boxes[:, 2] / 2) / safe[:, 0]
+    y_center = (boxes[:, 1] + boxes[:, 3] / 2) / safe[:, 1]
+    width = boxes[:, 2] / safe[:, 0]
+    height = boxes[:, 3] / safe[:, 1]
+    # 验证坐标有效性
+    keep &= (x_center >= 0) & (x_center <= 1) & (y_center >= 0) & (y_center <= 1)
+
+    idx = np.flatnonzero(keep)
+    idx = idx[np.argsort(image_ids[idx], kind='stable')]
+    class_idx = class_all[idx]
+    xywhn = np.stack([x_center, y_center, width, height], axis=1)[idx]
+    group_ids, starts = np.unique(image_ids[idx], return_index=True)
+    ends = np.append(starts[1:], len(idx))
+
+    written = set()
+    for image_id, start, end in zip(group_ids.tolist(), starts.tolist(), ends.tolist()):
+        base_name, img_w, img_h = images[image_id]
+        if obb:
+            corners = []
+            for k in idx[start:end].tolist():
+                if ann_segments[k] is not None and len(ann_segments[k]) >= 6:
+                    corners.append(_rotated_corners(ann_segments[k]))
+                else:
+                    x, y, w, h = boxes[k]
+                    corners.append(boxes_to_polygons([[x, y, x + w, y + h]])[0])
+            text = format_yolo_obb(class_idx[start:end], normalize_polygons(np.asarray(corners), (img_w, img_h)))
+            text += '\n'
+        else:
+            text = ''.join(
+                "%d %.6f %.6f %.6f %.6f\n" % (c, *row)
+                for c, row in zip(class_idx[start:end].tolist(), xywhn[start:end].tolist()))
+
+        # 每个标注文件只打开一次，覆盖写入
+        with open(os.path.join(output_dir, f"{base_name}.txt"), 'w') as f:
+            f.write(text)
+        written.add(base_name)
+
+    # 删除本次没有保留标注的图片的旧标注文件
+    removed = 0
+    for base_name, _, _ in images.values():
         txt_path = os.path.join(output_dir, f"{base_name}.txt")
-        
-        with open(txt_path, 'a') as f:
-            line = f"{category_map[ann['category_id']]} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n"
-            f.write(line)
+        if base_name not in written and os.path.exists(txt_path):
+            os.remove(txt_path)
+            removed += 1
+
+    print(f"转换完成：{len(written)} 个标注文件，{len(idx)} 个目标" + (f"，删除旧文件 {removed} 个" if removed else ""))
 
 if __name__ == "__main__":
     # 修改后的调用示例
@@ -65,4 +184,4 @@ if __name__ == "__main__":
         coco_json,
         target_classes,
         output_dir
-    )
\ No newline at end of file
+    )
@@ -1,14 +1,22 @@
 import os
-import shutil
+import sys
 from collections import defaultdict
 import glob
 
-def classify_yolo_images(label_dir, image_dir, output_root):
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'yoloDateset'))
+from file_index import pair_files, report_orphans
+from file_links import CopyEngine
+
+# 支持的图片后缀（按优先级）
+IMAGE_EXTS = ['.jpg', '.jpeg', '.png', '.bmp']
+
+def classify_yolo_images(label_dir, image_dir, output_root, copy_threads=8):
     """
     分类YOLO数据集图片到对应类别目录
     :param label_dir: YOLO标签目录路径
     :param image_dir: 原始图片目录路径
     :param output_root: 分类结果根目录
+    :param copy_threads: 同时进行的复制数
     """
     # 创建分类根目录
     os.makedirs(output_root, exist_ok=True)
@@ -27,27 +35,26 @@ def classify_yolo_images(label_dir, image_dir, output_root):
                 class_id = line.strip().split()[0]
                 class_image_map[class_id].add(base_name)
     
-    # 第二次遍历：复制图片到所有相关类别目录
+    # 标注与图片一次配对，代替逐个扩展名探测
+    pairs, orphan_labels, orphan_images = pair_files(label_dir, image_dir, ('.txt',), IMAGE_EXTS)
+    report_orphans(orphan_labels, orphan_images)
+
+    # 第二次遍历：复制图片到所有相关类别目录（多线程，已存在且未变化的目标跳过）
+    engine = CopyEngine(copy_threads)
     for class_id, basenames in class_image_map.items():
         class_dir = os.path.join(output_root, f"class_{class_id}")
         os.makedirs(class_dir, exist_ok=True)
         
         for base in basenames:
             # 查找源图片文件
-            img_path = None
-            for ext in ['.jpg', '.jpeg', '.png', '.bmp']:
-                temp_path = os.path.join(image_dir, base + ext)
-                if os.path.exists(temp_path):
-                    img_path = temp_path
-                    break
-            
-            if img_path:
+            # 没有源图片的标注已在上面的孤立标注中汇总
+            if base in pairs:
+                img_path = pairs[base][1]
                 # 复制到所有相关类别目录
                 dest_path = os.path.join(class_dir, os.path.basename(img_path))
-                if not os.path.exists(dest_path):
-                    shutil.copy(img_path, dest_path)
-            else:
-                print(f"警告：未找到图片 {base} 的源文件")
+                engine.submit(img_path, dest_path)
+    engine.close()
+    engine.report()
 
 if __name__ == "__main__":
     label_directory = "E:/dataset/WSODD USV_dataset/yolo_labels"  # 修改为实际标签目录
@@ -1,28 +1,26 @@
 import os
-import glob
+import sys
 
-def modify_yolo_classes(input_dir, output_dir, class_mapping):
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'yoloDateset'))
+from relabel import IdRemap, relabel_directory
+
+def modify_yolo_classes(input_dir, output_dir, class_mapping, workers=0):
     """
     批量修改YOLO标注文件中的类别编号
     :param input_dir: 输入标注文件目录
     :param output_dir: 输出标注文件目录
-    :param class_mapping: 类别映射字典 {旧类别: 新类别}
+    :param class_mapping: 类别映射字典 {旧类别: 新类别}，键和值须为整数或整数字符串
+    :param workers: 并行进程数，0 表示全部核心
     """
-    os.makedirs(output_dir, exist_ok=True)
-    
-    for txt_file in glob.glob(os.path.join(input_dir, "*.txt")):
-        output_path = os.path.join(output_dir, os.path.basename(txt_file))
-        
-        with open(txt_file, 'r') as f_in, open(output_path, 'w') as f_out:
-            for line in f_in:
-                parts = line.strip().split()
-                if len(parts) >= 5:
-                    old_cls = parts[0]
-                    # 应用类别映射
-                    new_cls = class_mapping.get(old_cls, old_cls)  # 未指定的类别保持原样
-                    # new_cls = '99'
-                    new_line = f"{new_cls} {' '.join(parts[1:])}\n"
-                    f_out.write(new_line)
+    invalid = [f"{k}: {v}" for k, v in class_mapping.items()
+               if not str(k).strip().lstrip('-').isdigit() or not str(v).strip().lstrip('-').isdigit()]
+    if invalid:
+        raise ValueError(f"类别映射只支持整数类别编号: {', '.join(invalid)}")
+    # 映射编译成查找表，每个文件的类别列一次查表完成，未指定的类别保持原样；
+    # 列数不足 5 的行丢弃，类别不是整数的行原样保留
+    merge = {int(old_cls): int(new_cls) for old_cls, new_cls in class_mapping.items()}
+    id_remap = IdRemap(merge=merge, min_cols=5, keep_malformed=False, keep_non_integer=True)
+    return relabel_directory(input_dir, output_dir, id_remap, workers)
 
 if __name__ == "__main__":
     # 配置参数示例
@@ -2,30 +2,33 @@
 
 import xml.etree.ElementTree as ET
 import os
+import sys
 import glob
-import shutil  # 新增导入
+import shutil
 
-def get_all_classes(annotations_dir):
-    # 使用集合自动去重
-    classes = set()
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'yoloDateset'))
+import image_meta
+from convert_runner import run_tasks
+from file_index import get_index, pair_files, report_orphans
+from file_links import CopyEngine
+from voc_reader import read_voc_records
+
+# 支持的图片后缀（按优先级）
+IMAGE_EXTS = ['.jpg', '.jpeg', '.png', '.bmp']
+
+def get_all_classes(annotations_dir, workers=0):
+    # 每个XML只解析一次（进程池并行，结果缓存供后续转换复用）
+    records = read_voc_records(glob.glob(os.path.join(annotations_dir, "*.xml")), workers)
     
-    # 遍历所有XML文件
-    for xml_file in glob.glob(os.path.join(annotations_dir, "*.xml")):
-        tree = ET.parse(xml_file)
-        root = tree.getroot()
-        
-        # 解析每个object的类别名称
-        for obj in root.iter('object'):
-            name_elem = obj.find('name')
-            if name_elem is not None and name_elem.text:
-                cls_name = name_elem.text.strip()
-                if cls_name:  # 防止空字符串
-                    classes.add(cls_name)
+    # 使用集合自动去重，防止空字符串
+    classes = {name for record in records for name in record.names if name}
     
     return sorted(list(classes))
 
 # 转换VOC到YOLO格式
-def convert_to_yolo(annotations_dir, images_dir, target_classes, output_dir, output_img_dir):
+def convert_to_yolo(annotations_dir, images_dir, target_classes, output_dir, output_img_dir, copy_threads=8, workers=0):
     # 创建输出目录
     os.makedirs(output_dir, exist_ok=True)
     
@@ -35,14 +38,17 @@ def convert_to_yolo(annotations_dir, images_dir, target_classes, output_dir, out
     # 创建图片输出目录
     os.makedirs(output_img_dir, exist_ok=True)
     
+    # 图片复制交给后台线程，与标注转换重叠进行
+    engine = CopyEngine(copy_threads)
+    _, orphan_labels, orphan_images = pair_files(annotations_dir, images_dir, ('.xml',), IMAGE_EXTS)
+    report_orphans(orphan_labels, orphan_images)
     
-    # 遍历所有XML文件
-    for xml_file in glob.glob(os.path.join(annotations_dir, "*.xml")):
-        tree = ET.parse(xml_file)
-        root = tree.getroot()
-        
+    # 所有XML一次解析（已由 get_all_classes 解析过的直接命中缓存）
+    records = read_voc_records(glob.glob(os.path.join(annotations_dir, "*.xml")), workers)
+    
+    for record in records:
         # 获取对应的图片文件
-        base_name = os.path.splitext(os.path.basename(xml_file))[0]
+        base_name = os.path.splitext(os.path.basename(record.path))[0]
         img_path = find_image_file(images_dir, base_name)
         
         if not img_path:
@@ -52,49 +58,26 @@ def convert_to_yolo(annotations_dir, images_dir, target_classes, output_dir, out
         img_w, img_h = get_image_size(img_path)
         if img_w == 0 or img_h == 0:
             continue
-            
-        yolo_lines = []
         
-        # 解析每个object
-        for obj in root.iter('object'):
-            name_elem = obj.find('name')
-            if name_elem is not None and name_elem.text:
-                cls_name = name_elem.text.strip()
-                if cls_name in class_idx:
-                    # 解析边界框
-                    bbox = obj.find('bndbox')
-                    if bbox is not None:
-                        # 添加坐标值存在性检查
-                        xmin_elem = bbox.find('xmin')
-                        ymin_elem = bbox.find('ymin')
-                        xmax_elem = bbox.find('xmax')
-                        ymax_elem = bbox.find('ymax')
-                        
-                        if all(elem is not None and elem.text for elem in [xmin_elem, ymin_elem, xmax_elem, ymax_elem]):
-                            try:
-                                # 转换为浮点数前去除空白字符
-                                xmin = float(xmin_elem.text.strip())
-                                ymin = float(ymin_elem.text.strip())
-                                xmax = float(xmax_elem.text.strip())
-                                ymax = float(ymax_elem.text.strip())
-                                
-                                # 验证坐标值有效性
-                                if xmin >= xmax or ymin >= ymax:
-                                    continue
-                                    
-                                # 转换到YOLO格式
-                                x_center = (xmin + xmax) / 2 / img_w
-                                y_center = (ymin + ymax) / 2 / img_h
-                                width = (xmax - xmin) / img_w
-                                height = (ymax - ymin) / img_h
-                                
-                                # 验证归一化后的值是否在[0,1]范围内
-                                if not (0 <= x_center <= 1 and 0 <= y_center <= 1):
-                                    continue
-                                
-                                yolo_lines.append(f"{class_idx[cls_name]} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}")
-                            except (ValueError, TypeError):
-                                continue
+        # 只保留目标类别、坐标完整且有效的水平框
+        cls_ids = np.array([class_idx.get(name, -1) for name in record.names], dtype=np.int64)
+        xmin, ymin, xmax, ymax = record.bndbox.T
+        valid = (cls_ids >= 0) & np.isfinite(record.bndbox).all(axis=1) & (xmin < xmax) & (ymin < ymax)
+        
+        # 转换到YOLO格式（整个文件一次计算）
+        x_center = (xmin + xmax) / 2 / img_w
+        y_center = (ymin + ymax) / 2 / img_h
+        width = (xmax - xmin) / img_w
+        height = (ymax - ymin) / img_h
+        
+        # 验证归一化后的值是否在[0,1]范围内
+        valid &= (x_center >= 0) & (x_center <= 1) & (y_center >= 0) & (y_center <= 1)
+        
+        yolo_lines = [
+            f"{c} {xc:.6f} {yc:.6f} {w:.6f} {h:.6f}"
+            for c, xc, yc, w, h in zip(cls_ids[valid].tolist(), x_center[valid].tolist(), y_center[valid].tolist(),
+                                       width[valid].tolist(), height[valid].tolist())
+        ]
         
         # 写入YOLO标注文件
         if yolo_lines:
@@ -102,36 +85,49 @@ def convert_to_yolo(annotations_dir, images_dir, target_classes, output_dir, out
             with open(output_path, 'w') as f:
                 f.write('\n'.join(yolo_lines))
             
-            # 复制图片到目标目录
-            if img_path:
-                try:
-                    # 保持原始文件名
-                    img_filename = os.path.basename(img_path)
-                    dest_path = os.path.join(output_img_dir, img_filename)
-                    shutil.copyfile(img_path, dest_path)
-                except Exception as e:
-                    print(f"复制图片失败: {img_path} -> {dest_path} ({str(e)})")
+            # 复制图片到目标目录（失败会在结束时统一打印）
+            # 保持原始文件名
+            img_filename = os.path.basename(img_path)
+            dest_path = os.path.join(output_img_dir, img_filename)
+            engine.submit(img_path, dest_path)
+
+    engine.close()
+    engine.report()
 
-# 辅助函数：查找图片文件
+# 辅助函数：查找图片文件（目录只扫描一次）
 def find_image_file(img_dir, base_name):
-    for ext in ['.jpg', '.jpeg', '.png', '.bmp']:
-        img_path = os.path.join(img_dir, base_name + ext)
-        if os.path.exists(img_path):
-            return img_path
-    return None
+    return get_index(img_dir, IMAGE_EXTS).get(base_name)
 
-# 辅助函数：获取图片尺寸
+# 辅助函数：获取图片尺寸（只读文件头，带持久缓存）
 def get_image_size(img_path):
-    try:
-        import cv2
-        img = cv2.imread(img_path)
-        if img is not None:
-            return img.shape[1], img.shape[0]  # (width, height)
-    except:
-        pass
+    size = image_meta.get_image_size(img_path)
+    if size is not None:
+        return size  # (width, height)
     return 0, 0
 
-def rename_voc_classes(src_annotations_dir, dst_annotations_dir):
+def _rename_voc_file(xml_file, dst_path, class_mapping, needs_rewrite):
+    """重命名单个XML中的类别（进程池任务），不含需重命名类别的文件直接复制"""
+    if not needs_rewrite:
+        shutil.copyfile(xml_file, dst_path)
+        return dst_path
+    
+    tree = ET.parse(xml_file)
+    root = tree.getroot()
+    
+    # 修改类别名称
+    for obj in root.iter('object'):
+        name_elem = obj.find('name')
+        if name_elem is not None and name_elem.text:
+            original_cls = name_elem.text.strip()
+            # 如果存在映射关系则替换
+            if original_cls in class_mapping:
+                name_elem.text = class_mapping[original_cls]
+    
+    # 保存到新路径
+    tree.write(dst_path, encoding='utf-8')
+    return dst_path
+
+def rename_voc_classes(src_annotations_dir, dst_annotations_dir, workers=0):
     """重命名VOC标注文件中的类别并保存到新目录"""
     class_mapping = {
         'boat': 'ship',
@@ -142,23 +138,14 @@ def rename_voc_classes(src_annotations_dir, dst_annotations_dir):
     # 创建目标目录
     os.makedirs(dst_annotations_dir, exist_ok=True)
     
-    # 遍历所有XML文件
-    for xml_file in glob.glob(os.path.join(src_annotations_dir, "*.xml")):
-        tree = ET.parse(xml_file)
-        root = tree.getroot()
-        
-        # 修改类别名称
-        for obj in root.iter('object'):
-            name_elem = obj.find('name')
-            if name_elem is not None and name_elem.text:
-                original_cls = name_elem.text.strip()
-                # 如果存在映射关系则替换
-                if original_cls in class_mapping:
-                    name_elem.text = class_mapping[original_cls]
-        
-        # 保存到新路径
-        dst_path = os.path.join(dst_annotations_dir, os.path.basename(xml_file))
-        tree.write(dst_path, encoding='utf-8')
+    # 由缓存的解析结果判断哪些文件需要改写，只有这些文件做完整的解析和写回
+    records = read_voc_records(glob.glob(os.path.join(src_annotations_dir, "*.xml")), workers)
+    tasks = [
+        (record.path, os.path.join(dst_annotations_dir, os.path.basename(record.path)), class_mapping,
+         any(name in class_mapping for name in record.names))
+        for record in records
+    ]
+    run_tasks(_rename_voc_file, tasks, workers, desc='重命名')
 
 if __name__ == "__main__":
     annotations_path = "E:/dataset/WSODD USV_dataset/annotation"
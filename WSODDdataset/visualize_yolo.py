@@ -2,8 +2,15 @@
 
 import cv2
 import os
+import sys
 import glob
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'yoloDateset'))
+from file_index import get_index
+
+# 支持的图片后缀（按优先级）
+IMAGE_EXTS = ['.jpg', '.jpeg', '.png', '.bmp']
+
 def visualize_yolo_labels(images_dir, labels_dir, output_dir, class_names):
     """
     可视化YOLO格式的标注
@@ -24,7 +31,7 @@ def visualize_yolo_labels(images_dir, labels_dir, output_dir, class_names):
         base_name = os.path.splitext(os.path.basename(label_path))[0]
         img_path = find_image_file(images_dir, base_name)
         
-        if not img_path or not os.path.exists(img_path):
+        if not img_path:
             continue
             
         # 读取图片
@@ -70,12 +77,8 @@ def visualize_yolo_labels(images_dir, labels_dir, output_dir, class_names):
         cv2.imwrite(output_path, img)
 
 def find_image_file(img_dir, base_name):
-    """查找匹配的图片文件"""
-    for ext in ['.jpg', '.jpeg', '.png', '.bmp']:
-        img_path = os.path.join(img_dir, base_name + ext)
-        if os.path.exists(img_path):
-            return img_path
-    return None
+    """查找匹配的图片文件（目录只扫描一次）"""
+    return get_index(img_dir, IMAGE_EXTS).get(base_name)
 
 if __name__ == "__main__":
     # 配置参数（根据实际情况修改）
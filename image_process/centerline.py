@@ -0,0 +1,164 @@
+"""
+二值图中心线提取：骨架 + 子采样 RANSAC 直线拟合
+
+- skeletonize：有 cv2.ximgproc 时用 thinning（Zhang-Suen），否则在金字塔缩小的图上求形态学骨架，
+  再在原分辨率上用距离变换的脊线精化（只保留粗骨架附近的脊线点）
+- fit_line_ransac：随机抽取有限个点做两点 RANSAC（垂直距离），再对全部内点做总体最小二乘精化
+- find_centerline：以上两步的组合
+
+find_central_line.py 和 image_segmentation/watershed_segmentation.py 共用此模块。
+
+使用方法：
+    from centerline import find_centerline
+    skeleton, line_params, points, inlier_mask = find_centerline(binary)
+"""
+
+import math
+
+import cv2
+import numpy as np
+
+
+def morphological_skeleton(binary):
+    """
+    形态学骨架（反复腐蚀，累加 原图 - 开运算），缓冲区复用，不在每轮分配新图像
+
+    参数:
+    - binary: 二值图（非零为前景）
+
+    返回:
+    - skeleton: uint8 骨架图（0 / 255）
+    """
+    element = cv2.getStructuringElement(cv2.MORPH_CROSS, (3, 3))
+    current = (binary > 0).astype(np.uint8) * 255
+    skeleton = np.zeros_like(current)
+    eroded = np.empty_like(current)
+    opened = np.empty_like(current)
+    while cv2.countNonZero(current) > 0:
+        cv2.erode(current, element, dst=eroded)
+        cv2.dilate(eroded, element, dst=opened)
+        cv2.subtract(current, opened, dst=opened)
+        cv2.bitwise_or(skeleton, opened, dst=skeleton)
+        current, eroded = eroded, current
+    return skeleton
+
+
+def skeletonize(binary, max_side=1024):
+    """
+    快速骨架提取
+
+    参数:
+    - binary: 二值图（非零为前景）
+    - max_side: 无 ximgproc 时，金字塔缩小到长边不超过此值后求粗骨架
+
+    返回:
+    - skeleton: uint8 骨架图（0 / 255）
+    """
+    mask = (binary > 0).astype(np.uint8) * 255
+    if hasattr(cv2, 'ximgproc'):
+        return cv2.ximgproc.thinning(mask, thinningType=cv2.ximgproc.THINNING_ZHANGSUEN)
+
+    height, width = mask.shape[:2]
+    levels = max(0, math.ceil(math.log2(max(height, width) / max_side))) if max(height, width) > max_side else 0
+    if levels == 0:
+        return morphological_skeleton(mask)
+
+    # 1. 金字塔缩小后求粗骨架
+    small = mask
+    for _ in range(levels):
+        small = cv2.pyrDown(small)
+    coarse = morphological_skeleton(small > 127)
+
+    # 2. 粗骨架放大回原尺寸并膨胀成搜索带
+    scale = 1 << levels
+    band = cv2.resize(coarse, (width, height), interpolation=cv2.INTER_NEAREST)
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * scale + 1, 2 * scale + 1))
+    cv2.dilate(band, kernel, dst=band)
+
+    # 3. 原分辨率精化：距离变换的局部极大（脊线）且位于搜索带内
+    dist = cv2.distanceTransform(mask, cv2.DIST_L2, 3)
+    local_max = cv2.dilate(dist, np.ones((3, 3), np.uint8))
+    ridge = (dist >= local_max) & (dist > 0) & (band > 0)
+    del dist, local_max
+    return ridge.astype(np.uint8) * 255
+
+
+def _normalize_line(a, b, c):
+    """直线参数归一化为 A² + B² = 1，并统一符号（B > 0，或 B = 0 时 A > 0）"""
+    norm = np.hypot(a, b)
+    a, b, c = a / norm, b / norm, c / norm
+    flip = (b < 0) | ((b == 0) & (a < 0))
+    return np.where(flip, -a, a), np.where(flip, -b, b), np.where(flip, -c, c)
+
+
+def fit_line_ransac(points, residual_threshold=3.0, max_trials=100, max_samples=20000, random_state=42):
+    """
+    子采样 RANSAC 直线拟合 + 内点总体最小二乘精化
+
+    参数:
+    - points: (N, 2) 点坐标 (x, y)
+    - residual_threshold: 内点到直线的最大垂直距离
+    - max_trials: 两点假设的个数（一次性向量化评估）
+    - max_samples: 评估假设时最多使用的点数，超出时随机抽样
+    - random_state: 随机种子
+
+    返回:
+    - line_params: 归一化直线参数 (A, B, C)，Ax + By + C = 0；点数不足时为 None
+    - inlier_mask: (N,) 全部点中的内点
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    n = len(points)
+    if n < 2:
+        return None, np.zeros(n, dtype=bool)
+
+    rng = np.random.default_rng(random_state)
+    sample = points[rng.choice(n, max_samples, replace=False)] if n > max_samples else points
+
+    # 1. 随机两点假设，在抽样点上一次算出所有假设的内点数
+    pairs = rng.integers(0, len(sample), size=(max_trials, 2))
+    p, q = sample[pairs[:, 0]], sample[pairs[:, 1]]
+    a, b = q[:, 1] - p[:, 1], p[:, 0] - q[:, 0]
+    valid = (a != 0) | (b != 0)
+    if not valid.any():
+        return None, np.zeros(n, dtype=bool)
+    a, b, p = a[valid], b[valid], p[valid]
+    a, b, c = _normalize_line(a, b, -(a * p[:, 0] + b * p[:, 1]))
+    counts = (np.abs(np.outer(a, sample[:, 0]) + np.outer(b, sample[:, 1]) + c[:, None])
+              < residual_threshold).sum(axis=1)
+    best = int(np.argmax(counts))
+
+    # 2. 全部点中的内点
+    inlier_mask = np.abs(a[best] * points[:, 0] + b[best] * points[:, 1] + c[best]) < residual_threshold
+    if inlier_mask.sum() < 2:
+        return (float(a[best]), float(b[best]), float(c[best])), inlier_mask
+
+    # 3. 总体最小二乘精化：法向量为内点协方差矩阵最小特征值对应的特征向量
+    inliers = points[inlier_mask]
+    center = inliers.mean(axis=0)
+    _, vectors = np.linalg.eigh(np.cov((inliers - center).T))
+    na, nb = vectors[:, 0]
+    A, B, C = _normalize_line(na, nb, -(na * center[0] + nb * center[1]))
+    A, B, C = float(A), float(B), float(C)
+    inlier_mask = np.abs(A * points[:, 0] + B * points[:, 1] + C) < residual_threshold
+    return (A, B, C), inlier_mask
+
+
+def find_centerline(binary, residual_threshold=3.0, max_trials=100, max_samples=20000, random_state=42):
+    """
+    提取二值图前景的骨架并拟合中心线
+
+    参数:
+    - binary: 二值图（非零为前景）
+    - 其余参数同 fit_line_ransac
+
+    返回:
+    - skeleton: uint8 骨架图
+    - line_params: (A, B, C) 或 None
+    - points: (N, 2) 骨架点 (x, y)
+    - inlier_mask: (N,) 内点
+    """
+    skeleton = skeletonize(binary)
+    ys, xs = np.nonzero(skeleton)
+    points = np.stack([xs, ys], axis=1)
+    line_params, inlier_mask = fit_line_ransac(points, residual_threshold, max_trials, max_samples, random_state)
+    return skeleton, line_params, points, inlier_mask
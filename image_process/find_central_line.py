@@ -1,7 +1,8 @@
 import cv2
 import numpy as np
 import matplotlib.pyplot as plt
-from sklearn.linear_model import RANSACRegressor
+
+from centerline import fit_line_ransac, skeletonize
 
 # 读取图像
 image = cv2.imread("E:/work/车门门环拼接/image/正面打光/normal/厚/5/2/6686_20464.bmp", cv2.IMREAD_GRAYSCALE)
@@ -10,43 +11,20 @@ image = cv2.imread("E:/work/车门门环拼接/image/正面打光/normal/厚/5/2
 _, binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
 
 # 2. 中轴变换（Skeletonization）
-size = np.size(binary)
-skel = np.zeros(binary.shape, np.uint8)
-
-element = cv2.getStructuringElement(cv2.MORPH_CROSS, (3, 3))
-done = False
-
-while not done:
-    eroded = cv2.erode(binary, element)
-    temp = cv2.dilate(eroded, element)
-    temp = cv2.subtract(binary, temp)
-    skel = cv2.bitwise_or(skel, temp)
-    binary = eroded.copy()
-
-    zeros = size - cv2.countNonZero(binary)
-    if zeros == size:
-        done = True
+skel = skeletonize(binary)
 
 # 3. 提取中心线坐标点
 y_coords, x_coords = np.where(skel > 0)
 
 # 4. 使用RANSAC方法拟合直线
-if len(x_coords) > 0:
-    # 准备数据：将x坐标作为特征，y坐标作为目标
-    X = x_coords.reshape(-1, 1)
-    y = y_coords
-    
-    # 使用RANSAC回归器
-    ransac = RANSACRegressor(random_state=42)
-    ransac.fit(X, y)
-    
-    # 获取拟合的直线参数
-    inlier_mask = ransac.inlier_mask_
+if len(x_coords) > 1:
+    # 子采样 RANSAC（垂直距离）+ 内点总体最小二乘精化，得到 Ax + By + C = 0
+    (A, B, C), inlier_mask = fit_line_ransac(np.stack([x_coords, y_coords], axis=1), random_state=42)
     outlier_mask = np.logical_not(inlier_mask)
     
-    # 获取直线参数：y = kx + b
-    k = ransac.estimator_.coef_[0]  # 斜率
-    b = ransac.estimator_.intercept_  # 截距
+    # 获取直线参数：y = kx + b（竖直线时 B 接近 0，斜率取一个很大的值）
+    k = -A / B if abs(B) > 1e-12 else np.sign(-A) * 1e12  # 斜率
+    b = -C / B if abs(B) > 1e-12 else 0.0  # 截距
     
     # 生成拟合直线上的点
     x_min, x_max = min(x_coords), max(x_coords)
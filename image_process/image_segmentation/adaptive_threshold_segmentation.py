@@ -3,7 +3,42 @@ import numpy as np
 import matplotlib.pyplot as plt
 from pathlib import Path
 
-def adaptive_threshold_segmentation(image_path, block_size=11, C=2, save_results=False, output_dir=None):
+from tiling import map_tiles
+
+def show_results(img, gray, adaptive_gaussian, adaptive_mean, block_size, C):
+    """
+    显示原图、两种自适应阈值结果和固定阈值结果
+    """
+    # 方法3：固定阈值
+    _, fixed_threshold = cv2.threshold(gray, 10, 255, cv2.THRESH_BINARY_INV)
+    
+    # 结果展示
+    plt.figure(figsize=(15, 5))
+    plt.subplot(141)
+    plt.imshow(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+    plt.title("原始图像")
+    plt.axis("off")
+    
+    plt.subplot(142)
+    plt.imshow(adaptive_gaussian, cmap="gray")
+    plt.title(f"自适应高斯阈值分割\nblock_size={block_size}, C={C}")
+    plt.axis("off")
+    
+    plt.subplot(143)
+    plt.imshow(adaptive_mean, cmap="gray")
+    plt.title(f"自适应均值阈值分割\nblock_size={block_size}, C={C}")
+    plt.axis("off")
+
+    # 固定阈值
+    plt.subplot(144)
+    plt.imshow(fixed_threshold, cmap="gray")
+    plt.title(f"固定阈值分割\nthreshold=10")
+    
+    plt.tight_layout()
+    plt.show()
+
+def adaptive_threshold_segmentation(image_path, block_size=11, C=2, save_results=False, output_dir=None,
+                                    visualize=True, tile_size=None, workers=0):
     """
     使用局部自适应阈值进行图像分割
     
@@ -13,6 +48,9 @@ def adaptive_threshold_segmentation(image_path, block_size=11, C=2, save_results
         C: 阈值偏移量，默认2
         save_results: 是否保存分割结果，默认False
         output_dir: 保存结果的目录，默认None（与输入图像同目录）
+        visualize: 是否显示分割结果，默认True
+        tile_size: 分块处理的块大小，默认None（整图处理）；分块时重叠为 block_size // 2，结果与整图处理一致
+        workers: 分块处理的线程数，0 为全部核心
     
     返回:
         分割后的图像（自适应高斯阈值和自适应均值阈值两种结果）
@@ -32,52 +70,38 @@ def adaptive_threshold_segmentation(image_path, block_size=11, C=2, save_results
     
     # 局部自适应阈值分割
     # 方法1：自适应高斯阈值
-    adaptive_gaussian = cv2.adaptiveThreshold(
-        gray,
-        255,
-        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,  # 高斯加权局部均值
-        cv2.THRESH_BINARY_INV,           # 二值化类型（反相，使目标为白色）
-        blockSize=block_size,
-        C=C
-    )
+    def gaussian_threshold(tile):
+        return cv2.adaptiveThreshold(
+            tile,
+            255,
+            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,  # 高斯加权局部均值
+            cv2.THRESH_BINARY_INV,           # 二值化类型（反相，使目标为白色）
+            blockSize=block_size,
+            C=C
+        )
     
     # 方法2：自适应均值阈值
-    adaptive_mean = cv2.adaptiveThreshold(
-        gray,
-        255,
-        cv2.ADAPTIVE_THRESH_MEAN_C,     # 简单局部均值
-        cv2.THRESH_BINARY_INV,
-        blockSize=block_size,
-        C=C
-    )
-
-    # 方法3：固定阈值
-    _, fixed_threshold = cv2.threshold(gray, 10, 255, cv2.THRESH_BINARY_INV)
+    def mean_threshold(tile):
+        return cv2.adaptiveThreshold(
+            tile,
+            255,
+            cv2.ADAPTIVE_THRESH_MEAN_C,     # 简单局部均值
+            cv2.THRESH_BINARY_INV,
+            blockSize=block_size,
+            C=C
+        )
+    
+    if tile_size:
+        # 分块处理：重叠为局部块半径，模糊等中间结果只按块分配
+        adaptive_gaussian = map_tiles(gaussian_threshold, gray, tile_size, block_size // 2, workers)
+        adaptive_mean = map_tiles(mean_threshold, gray, tile_size, block_size // 2, workers)
+    else:
+        adaptive_gaussian = gaussian_threshold(gray)
+        adaptive_mean = mean_threshold(gray)
     
     # 结果展示
-    plt.figure(figsize=(15, 5))
-    plt.subplot(141)
-    plt.imshow(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
-    plt.title("原始图像")
-    plt.axis("off")
-    
-    plt.subplot(142)
-    plt.imshow(adaptive_gaussian, cmap="gray")
-    plt.title(f"自适应高斯阈值分割\nblock_size={block_size}, C={C}")
-    plt.axis("off")
-    
-    plt.subplot(143)
-    plt.imshow(adaptive_mean, cmap="gray")
-    plt.title(f"自适应均值阈值分割\nblock_size={block_size}, C={C}")
-    plt.axis("off")
-
-    # 固定阈值
-    plt.subplot(144)
-    plt.imshow(fixed_threshold, cmap="gray")
-    plt.title(f"固定阈值分割\nthreshold=10")
-    
-    plt.tight_layout()
-    plt.show()
+    if visualize:
+        show_results(img, gray, adaptive_gaussian, adaptive_mean, block_size, C)
     
     # 保存结果（如果需要）
     if save_results:
@@ -155,7 +179,7 @@ def crop_image_region(image_path, x=None, y=None, width=None, height=None,
     
     return cropped
 
-def batch_process(folder_path, block_size=11, C=2, save_results=True):
+def batch_process(folder_path, block_size=11, C=2, save_results=True, visualize=True, tile_size=None, workers=0):
     """
     批量处理文件夹中的所有图像
     
@@ -164,6 +188,8 @@ def batch_process(folder_path, block_size=11, C=2, save_results=True):
         block_size: 局部块大小
         C: 阈值偏移量
         save_results: 是否保存结果
+        visualize: 是否显示分割结果
+        tile_size / workers: 分块处理参数，见 adaptive_threshold_segmentation
     """
     folder = Path(folder_path)
     if not folder.exists():
@@ -192,7 +218,10 @@ def batch_process(folder_path, block_size=11, C=2, save_results=True):
                 block_size=block_size, 
                 C=C, 
                 save_results=save_results, 
-                output_dir=str(output_dir)
+                output_dir=str(output_dir),
+                visualize=visualize,
+                tile_size=tile_size,
+                workers=workers
             )
         except Exception as e:
             print(f"处理失败: {e}")
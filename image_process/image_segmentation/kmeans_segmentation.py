@@ -4,7 +4,27 @@ from sklearn.cluster import KMeans
 import argparse
 import os
 
-def kmeans_segmentation(image_path, output_path, n_clusters=4, save_colored=True, visualize=False):
+from tiling import map_tiles
+
+def assign_clusters(tile_bgr, centers_rgb):
+    """
+    按最近聚类中心为一块 BGR 像素分配标签
+
+    参数:
+    - tile_bgr: (h, w, 3) BGR 图像块
+    - centers_rgb: (k, 3) RGB 聚类中心
+
+    返回:
+    - labels: (h, w) uint8 标签
+    """
+    pixels = tile_bgr[..., ::-1].reshape(-1, 3).astype(np.float32)
+    centers = centers_rgb.astype(np.float32)
+    # |p - c|² = |p|² - 2 p·c + |c|²，|p|² 对 argmin 无影响
+    distances = (centers ** 2).sum(axis=1) - 2 * pixels @ centers.T
+    return np.argmin(distances, axis=1).astype(np.uint8).reshape(tile_bgr.shape[:2])
+
+def kmeans_segmentation(image_path, output_path, n_clusters=4, save_colored=True, visualize=False,
+                        tile_size=None, sample_size=200000, workers=0):
     """
     使用K-means均值聚类进行图像分割
     
@@ -14,6 +34,10 @@ def kmeans_segmentation(image_path, output_path, n_clusters=4, save_colored=True
     - n_clusters: 聚类数量，默认为4
     - save_colored: 是否保存彩色分割结果，默认为True
     - visualize: 是否显示分割结果，默认为False
+    - tile_size: 分块处理的块大小，默认None（整图聚类）；给出时在随机抽样的像素上拟合聚类中心，
+      再按块（线程池）把每个像素分配到最近的中心，内存与块大小相关而与整图大小无关
+    - sample_size: 分块处理时用于拟合的像素数，默认200000
+    - workers: 分块处理的线程数，0 为全部核心
     """
     # 检查输入文件是否存在
     if not os.path.exists(image_path):
@@ -31,29 +55,33 @@ def kmeans_segmentation(image_path, output_path, n_clusters=4, save_colored=True
         print(f"错误: 无法读取图像 {image_path}")
         return False
     
-    # 将图像转换为RGB格式（OpenCV默认读取为BGR）
-    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    
     # 获取图像尺寸
     height, width, channels = image.shape
     
-    # 将图像数据重塑为二维数组（样本数 × 特征数）
-    pixels = image_rgb.reshape(-1, 3)
-    
     print(f"图像加载完成，尺寸: {width}×{height}")
     print(f"正在执行K-means聚类，聚类数量: {n_clusters}...")
     
-    # 执行K-means聚类
     kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-    labels = kmeans.fit_predict(pixels)
+    if tile_size:
+        # 在抽样像素上拟合聚类中心（BGR -> RGB），再分块分配标签
+        rng = np.random.default_rng(42)
+        flat = image.reshape(-1, 3)
+        sample = flat[rng.choice(len(flat), min(sample_size, len(flat)), replace=False)][:, ::-1]
+        kmeans.fit(sample)
+        labels = map_tiles(lambda tile: assign_clusters(tile, kmeans.cluster_centers_),
+                           image, tile_size, 0, workers).reshape(-1)
+    else:
+        # 将图像转换为RGB格式（OpenCV默认读取为BGR），重塑为二维数组（样本数 × 特征数）
+        pixels = cv2.cvtColor(image, cv2.COLOR_BGR2RGB).reshape(-1, 3)
+        
+        # 执行K-means聚类
+        labels = kmeans.fit_predict(pixels)
     
-    # 获取聚类中心
-    centers = kmeans.cluster_centers_.astype(int)
+    # 获取聚类中心（确保为uint8，OpenCV处理需要）
+    centers = kmeans.cluster_centers_.astype(int).astype(np.uint8)
     
-    # 创建分割后的图像
+    # 创建分割后的图像（按标签查表）
     segmented_image = centers[labels].reshape(height, width, 3)
-    # 确保图像数据类型为uint8，OpenCV处理需要
-    segmented_image = segmented_image.astype(np.uint8)
     
     # 保存结果
     if save_colored:
@@ -114,6 +142,9 @@ def parse_arguments():
     parser.add_argument('-k', '--clusters', type=int, default=4, help='聚类数量，默认为4')
     parser.add_argument('--no-color', action='store_true', help='保存为灰度分割结果，默认为彩色')
     parser.add_argument('--visualize', action='store_true', help='显示分割结果')
+    parser.add_argument('--tile-size', type=int, default=None, help='分块处理的块大小，超大图像使用以限制内存，默认为整图聚类')
+    parser.add_argument('--sample-size', type=int, default=200000, help='分块处理时用于拟合聚类中心的像素数，默认为200000')
+    parser.add_argument('--workers', type=int, default=0, help='分块处理的线程数，0为全部核心')
     return parser.parse_args()
 
 if __name__ == "__main__":
@@ -125,7 +156,10 @@ if __name__ == "__main__":
         output_path=args.output,
         n_clusters=args.clusters,
         save_colored=not args.no_color,
-        visualize=args.visualize
+        visualize=args.visualize,
+        tile_size=args.tile_size,
+        sample_size=args.sample_size,
+        workers=args.workers
     )
     
     if success:
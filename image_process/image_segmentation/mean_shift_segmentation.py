@@ -3,7 +3,19 @@ import numpy as np
 import argparse
 import os
 
-def mean_shift_segmentation(image_path, output_path, spatial_radius=10, color_radius=30, max_level=1, visualize=False):
+from tiling import map_tiles
+
+def default_halo(spatial_radius, max_level):
+    """
+    MeanShift 分块的默认重叠像素数：每层最多迭代 5 次、每次移动不超过空间半径，
+    逐层放大后累加；取 2^max_level 的整数倍，使各块的金字塔与整图对齐
+    """
+    scale = 1 << max_level
+    reach = 5 * spatial_radius * (2 * scale - 1)
+    return -(-reach // scale) * scale
+
+def mean_shift_segmentation(image_path, output_path, spatial_radius=10, color_radius=30, max_level=1, visualize=False,
+                            tile_size=None, halo=None, workers=0):
     """
     使用MeanShift算法进行图像分割
     
@@ -14,6 +26,10 @@ def mean_shift_segmentation(image_path, output_path, spatial_radius=10, color_ra
     - color_radius: 颜色窗口半径，默认为30
     - max_level: 金字塔最大层数，用于加速计算，默认为1
     - visualize: 是否显示分割结果，默认为False
+    - tile_size: 分块处理的块大小，默认None（整图处理）；会向上取整为 2^max_level 的倍数
+    - halo: 分块的重叠像素数，默认按空间半径和金字塔层数估计（default_halo）；
+      MeanShift 是迭代的局部算法，接缝附近的结果与整图处理近似一致
+    - workers: 分块处理的线程数，0 为全部核心
     """
     # 检查输入文件是否存在
     if not os.path.exists(image_path):
@@ -38,12 +54,21 @@ def mean_shift_segmentation(image_path, output_path, spatial_radius=10, color_ra
     # 应用MeanShift分割
     print(f"正在应用MeanShift分割... 参数: spatial_radius={spatial_radius}, color_radius={color_radius}, max_level={max_level}")
     # 修复：使用正确的参数名 sp, sr, maxLevel
-    segmented_image = cv2.pyrMeanShiftFiltering(
-        image, 
-        sp=spatial_radius,  # 空间窗口半径
-        sr=color_radius,    # 颜色窗口半径
-        maxLevel=max_level  # 金字塔最大层数
-    )
+    def filter_tile(tile):
+        return cv2.pyrMeanShiftFiltering(
+            np.ascontiguousarray(tile), 
+            sp=spatial_radius,  # 空间窗口半径
+            sr=color_radius,    # 颜色窗口半径
+            maxLevel=max_level  # 金字塔最大层数
+        )
+    
+    if tile_size:
+        scale = 1 << max_level
+        tile_size = -(-tile_size // scale) * scale
+        halo = default_halo(spatial_radius, max_level) if halo is None else -(-halo // scale) * scale
+        segmented_image = map_tiles(filter_tile, image, tile_size, halo, workers)
+    else:
+        segmented_image = filter_tile(image)
     
     # 保存分割结果
     cv2.imwrite(output_path, segmented_image)
@@ -53,13 +78,16 @@ def mean_shift_segmentation(image_path, output_path, spatial_radius=10, color_ra
     # 转换为灰度图以便进一步处理
     gray = cv2.cvtColor(segmented_image, cv2.COLOR_BGR2GRAY)
     
-    # 应用自适应阈值获取不同区域
-    thresh = cv2.adaptiveThreshold(
-        gray, 255, 
-        cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-        cv2.THRESH_BINARY_INV, 
-        11, 2
-    )
+    # 应用自适应阈值获取不同区域（分块时 halo 为块半径，与整图结果一致）
+    def threshold_tile(tile):
+        return cv2.adaptiveThreshold(
+            tile, 255, 
+            cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
+            cv2.THRESH_BINARY_INV, 
+            11, 2
+        )
+    
+    thresh = map_tiles(threshold_tile, gray, tile_size, 11 // 2, workers) if tile_size else threshold_tile(gray)
     
     # 保存阈值结果作为掩码参考
     mask_path = os.path.splitext(output_path)[0] + "_mask.png"
@@ -83,7 +111,8 @@ def mean_shift_segmentation(image_path, output_path, spatial_radius=10, color_ra
     return True
 
 
-def batch_process(input_folder, output_folder, spatial_radius=10, color_radius=30, max_level=1):
+def batch_process(input_folder, output_folder, spatial_radius=10, color_radius=30, max_level=1,
+                  tile_size=None, halo=None, workers=0):
     """
     批量处理文件夹中的所有图像
     
@@ -93,6 +122,7 @@ def batch_process(input_folder, output_folder, spatial_radius=10, color_radius=3
     - spatial_radius: 空间窗口半径
     - color_radius: 颜色窗口半径
     - max_level: 金字塔最大层数
+    - tile_size / halo / workers: 分块处理参数，见 mean_shift_segmentation
     """
     # 支持的图像格式
     supported_formats = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif')
@@ -125,7 +155,10 @@ def batch_process(input_folder, output_folder, spatial_radius=10, color_radius=3
             spatial_radius=spatial_radius, 
             color_radius=color_radius, 
             max_level=max_level, 
-            visualize=False
+            visualize=False,
+            tile_size=tile_size,
+            halo=halo,
+            workers=workers
         )
     
     print(f"批量处理完成！所有结果已保存至 '{output_folder}'")
@@ -143,6 +176,9 @@ def parse_arguments():
     parser.add_argument('-l', '--max-level', type=int, default=1, help='金字塔最大层数，默认为1')
     parser.add_argument('-v', '--visualize', action='store_true', help='显示分割结果')
     parser.add_argument('-b', '--batch', action='store_true', help='批量处理模式')
+    parser.add_argument('--tile-size', type=int, default=None, help='分块处理的块大小，超大图像使用以限制内存，默认为整图处理')
+    parser.add_argument('--halo', type=int, default=None, help='分块的重叠像素数，默认按空间半径和金字塔层数估计')
+    parser.add_argument('--workers', type=int, default=0, help='分块处理的线程数，0为全部核心')
     return parser.parse_args()
 
 
@@ -160,7 +196,10 @@ if __name__ == "__main__":
                 args.output,
                 spatial_radius=args.spatial_radius,
                 color_radius=args.color_radius,
-                max_level=args.max_level
+                max_level=args.max_level,
+                tile_size=args.tile_size,
+                halo=args.halo,
+                workers=args.workers
             )
     else:
         # 单文件处理模式
@@ -173,7 +212,10 @@ if __name__ == "__main__":
                 spatial_radius=args.spatial_radius,
                 color_radius=args.color_radius,
                 max_level=args.max_level,
-                visualize=args.visualize
+                visualize=args.visualize,
+                tile_size=args.tile_size,
+                halo=args.halo,
+                workers=args.workers
             )
             
             if success:
@@ -0,0 +1,42 @@
+"""tiling 分块处理的回归测试"""
+
+import cv2
+import numpy as np
+
+from tiling import label_tiles, map_tiles
+
+
+def _components(mask, connectivity):
+    return cv2.connectedComponents(mask, connectivity=connectivity)[1]
+
+
+def test_label_tiles_diagonal_across_tile_corner():
+    mask = np.zeros((64, 64), np.uint8)
+    idx = np.arange(64)
+    mask[idx, idx] = 255
+    mask[idx, 63 - idx] = 255
+    labels, num = label_tiles(lambda m: _components(m, 8), mask, tile_size=32, halo=4)
+    assert num == 1
+    assert (labels[mask > 0] == 1).all()
+
+
+def test_label_tiles_matches_whole_image_components():
+    rng = np.random.default_rng(0)
+    for connectivity in (4, 8):
+        for _ in range(25):
+            mask = ((rng.random((97, 131)) < rng.uniform(0.2, 0.55)) * 255).astype(np.uint8)
+            count, full = cv2.connectedComponents(mask, connectivity=connectivity)
+            labels, num = label_tiles(lambda m: _components(m, connectivity), mask,
+                                      tile_size=int(rng.integers(7, 40)), halo=int(rng.integers(1, 5)), workers=2)
+            assert num == count - 1
+            fg = mask > 0
+            # 与整图结果一一对应（仅编号不同）
+            pairs = np.unique(np.stack([full[fg], labels[fg]], axis=1), axis=0)
+            assert len(pairs) == num
+
+
+def test_map_tiles_matches_whole_image():
+    rng = np.random.default_rng(1)
+    gray = cv2.GaussianBlur((rng.random((300, 400)) * 255).astype(np.uint8), (15, 15), 0)
+    func = lambda g: cv2.adaptiveThreshold(g, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 31, 2)
+    assert np.array_equal(map_tiles(func, gray, tile_size=64, halo=15, workers=2), func(gray))
@@ -0,0 +1,241 @@
+"""
+大图分块处理：按固定尺寸切块（带 halo 重叠）在线程池中处理，只把每块的核心区域写回整图输出
+
+- make_tiles：切块，每块包含核心区域和向外扩展 halo 像素的处理区域
+- map_tiles：逐块处理逐像素输出（阈值、滤波、聚类分配等），halo 不小于算法的邻域半径时结果与整图处理一致
+- label_tiles：逐块处理标签输出（连通域、分水岭），各块标签加偏移后，
+  沿接缝和块角把两块在同一像素上都为有效区域的标签合并（并查集），最后重新连续编号；
+  4 连通和 8 连通（只在块角斜向相连）的区域都能正确合并
+
+OpenCV 的大部分函数会释放 GIL，线程池即可并行；同时在处理中的块数不超过 2 × 线程数，
+中间结果的内存只与块大小有关，与整图大小无关。
+
+使用方法：
+    from tiling import map_tiles, label_tiles
+    binary = map_tiles(lambda g: cv2.adaptiveThreshold(g, 255, cv2.ADAPTIVE_THRESH_MEAN_C,
+                                                       cv2.THRESH_BINARY_INV, 51, 2),
+                       gray, tile_size=2048, halo=26)
+    labels, num = label_tiles(lambda m: cv2.connectedComponents(m, connectivity=8)[1], binary,
+                              tile_size=2048, halo=1)
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+
+class Tile(NamedTuple):
+    """一个分块：核心区域 [y0, y1) × [x0, x1)，处理区域 [hy0, hy1) × [hx0, hx1)"""
+    y0: int
+    y1: int
+    x0: int
+    x1: int
+    hy0: int
+    hy1: int
+    hx0: int
+    hx1: int
+
+    @property
+    def core(self):
+        """核心区域在整图中的切片"""
+        return slice(self.y0, self.y1), slice(self.x0, self.x1)
+
+    @property
+    def region(self):
+        """处理区域在整图中的切片"""
+        return slice(self.hy0, self.hy1), slice(self.hx0, self.hx1)
+
+    @property
+    def local_core(self):
+        """核心区域在处理区域中的切片"""
+        return (slice(self.y0 - self.hy0, self.y1 - self.hy0),
+                slice(self.x0 - self.hx0, self.x1 - self.hx0))
+
+
+def make_tiles(height, width, tile_size, halo):
+    """
+    切块
+
+    参数:
+    - height, width: 图像尺寸
+    - tile_size: 核心区域边长
+    - halo: 处理区域向外扩展的像素数（在图像边缘处截断）
+
+    返回:
+    - tiles: 按行优先排列的 Tile 列表
+    """
+    if tile_size <= 0:
+        raise ValueError(f"块大小必须为正数: {tile_size}")
+    tiles = []
+    for y0 in range(0, height, tile_size):
+        y1 = min(y0 + tile_size, height)
+        for x0 in range(0, width, tile_size):
+            x1 = min(x0 + tile_size, width)
+            tiles.append(Tile(y0, y1, x0, x1,
+                              max(y0 - halo, 0), min(y1 + halo, height),
+                              max(x0 - halo, 0), min(x1 + halo, width)))
+    return tiles
+
+
+def _as_tuple(images):
+    return images if isinstance(images, (tuple, list)) else (images,)
+
+
+def _run_ordered(func, images, tiles, workers):
+    """按块顺序返回 (tile, func(*处理区域))，同时在处理中的块数不超过 2 × 线程数"""
+    images = _as_tuple(images)
+    workers = workers or os.cpu_count() or 1
+
+    def task(tile):
+        return func(*(image[tile.region] for image in images))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for tile in tiles:
+            pending.append((tile, executor.submit(task, tile)))
+            if len(pending) >= 2 * workers:
+                tile, future = pending.popleft()
+                yield tile, future.result()
+        while pending:
+            tile, future = pending.popleft()
+            yield tile, future.result()
+
+
+def map_tiles(func, images, tile_size=2048, halo=32, workers=0):
+    """
+    逐块处理逐像素输出的算法
+
+    参数:
+    - func: func(*crops) -> 与 crop 同尺寸的输出（二维或带通道）
+    - images: 一幅图像，或同尺寸图像的元组（按顺序传给 func）
+    - tile_size: 块大小
+    - halo: 重叠像素数，应不小于算法的邻域半径
+    - workers: 线程数，0 表示全部核心
+
+    返回:
+    - output: 整图输出，dtype 和通道数与 func 的输出一致
+    """
+    height, width = _as_tuple(images)[0].shape[:2]
+    output = None
+    for tile, result in _run_ordered(func, images, make_tiles(height, width, tile_size, halo), workers):
+        if output is None:
+            output = np.empty((height, width) + result.shape[2:], dtype=result.dtype)
+        output[tile.core] = result[tile.local_core]
+    return output
+
+
+def _find(parent, x):
+    root = x
+    while parent[root] != root:
+        root = parent[root]
+    while parent[x] != root:
+        parent[x], x = root, parent[x]
+    return root
+
+
+def label_tiles(func, images, tile_size=2048, halo=32, workers=0, keep_below=0):
+    """
+    逐块处理标签输出的算法，并合并跨接缝的区域
+
+    每块的有效标签（> keep_below）加上偏移后写入整图；相邻两块在同一像素上
+    （一块的核心、另一块的 halo）都为有效标签时视为同一区域并合并。比较的像素为
+    核心左侧一列、上方一行，以及左上角、右上角两个斜向像素（8 连通的区域可能只在块角相连）。
+    小于等于 keep_below 的值（背景、边界等）原样保留
+
+    参数:
+    - func: func(*crops) -> 与 crop 同尺寸的整数标签图
+    - images: 一幅图像，或同尺寸图像的元组
+    - tile_size: 块大小
+    - halo: 重叠像素数（至少为 1）
+    - workers: 线程数，0 表示全部核心
+    - keep_below: 不参与编号的最大标签值（连通域为 0，分水岭为 1）
+
+    返回:
+    - labels: int32 整图标签，有效标签重新连续编号为 keep_below + 1 ... keep_below + num
+    - num: 有效标签数
+    """
+    halo = max(int(halo), 1)
+    height, width = _as_tuple(images)[0].shape[:2]
+    tiles = make_tiles(height, width, tile_size, halo)
+    labels = np.empty((height, width), dtype=np.int32)
+    strips = []  # 每块核心区域左侧一列、上方一行、左上角和右上角（位于 halo 内）的标签
+    offset = 0
+
+    for tile, result in _run_ordered(func, images, tiles, workers):
+        result = result.astype(np.int32, copy=False)
+        ly, lx = tile.local_core
+        core = result[ly, lx]
+        valid = core > keep_below
+        count = int(core[valid].max()) - keep_below if valid.any() else 0
+        shifted = np.where(valid, core + offset, core)
+        labels[tile.core] = shifted
+
+        def strip(values):
+            values = values.astype(np.int32)
+            return np.where(values > keep_below, values + offset, values)
+
+        left = strip(result[ly, lx.start - 1]) if tile.x0 > 0 else None
+        top = strip(result[ly.start - 1, lx]) if tile.y0 > 0 else None
+        corners = []  # (整图 y, 整图 x, 标签)
+        if tile.y0 > 0 and tile.x0 > 0:
+            corners.append((tile.y0 - 1, tile.x0 - 1, int(strip(result[ly.start - 1, lx.start - 1]))))
+        if tile.y0 > 0 and tile.x1 < width:
+            corners.append((tile.y0 - 1, tile.x1, int(strip(result[ly.start - 1, lx.stop]))))
+        # halo 中出现但核心中没有的标签也要占用编号，避免与其他块冲突
+        for values in (left, top, np.array([c[2] for c in corners], dtype=np.int32)):
+            if values is not None and (values > keep_below).any():
+                count = max(count, int(values.max()) - offset - keep_below)
+        strips.append((tile, left, top, corners))
+        offset += count
+
+    # 并查集合并接缝两侧的同一区域
+    parent = list(range(offset + keep_below + 1))
+    for tile, left, top, corners in strips:
+        seams = []
+        if left is not None:
+            seams.append((labels[tile.y0:tile.y1, tile.x0 - 1], left))
+        if top is not None:
+            seams.append((labels[tile.y0 - 1, tile.x0:tile.x1], top))
+        for y, x, value in corners:
+            seams.append((labels[y:y + 1, x], np.array([value], dtype=np.int32)))
+        for a, b in seams:
+            valid = (a > keep_below) & (b > keep_below)
+            if not valid.any():
+                continue
+            pairs = np.unique(np.stack([a[valid], b[valid]], axis=1), axis=0)
+            for u, v in pairs.tolist():
+                ru, rv = _find(parent, u), _find(parent, v)
+                if ru != rv:
+                    parent[max(ru, rv)] = min(ru, rv)
+
+    # 按首个标签的顺序连续编号；只出现在 halo 中的标签不占编号
+    used = np.zeros(offset + keep_below + 1, dtype=bool)
+    for tile in tiles:
+        core = labels[tile.core]
+        used[np.unique(core[core > keep_below])] = True
+    # 合并时总是指向较小的编号，反复取 parent[parent] 即收敛到根
+    roots = np.array(parent, dtype=np.int64)
+    while True:
+        jumped = roots[roots]
+        if np.array_equal(jumped, roots):
+            break
+        roots = jumped
+    root_used = np.zeros(len(parent), dtype=bool)
+    root_used[roots[used]] = True
+    new_id = np.cumsum(root_used) + keep_below
+    lut = np.arange(len(parent), dtype=np.int32)
+    lut[keep_below + 1:] = new_id[roots[keep_below + 1:]]
+    num = int(root_used[keep_below + 1:].sum())
+
+    # 逐块查表，避免整图大小的临时数组
+    def relabel(tile):
+        core = labels[tile.core]
+        valid = core > keep_below
+        core[valid] = lut[core[valid]]
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        list(executor.map(relabel, tiles))
+    return labels, num
@@ -1,15 +1,38 @@
-import cv2
-import numpy as np
-import matplotlib.pyplot as plt
+import csv
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
-from regex import T
-from sympy import true
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from centerline import find_centerline
+from tiling import label_tiles, map_tiles
+
+# 分阶段计时的阶段名（批量处理时写入计时 CSV）
+STAGES = ('read', 'preprocess', 'threshold', 'morphology', 'centerline', 'foreground',
+          'markers', 'watershed', 'results', 'save')
+
+_plt = None
 
-# 设置中文字体
-plt.rcParams['font.sans-serif'] = ['SimHei']  # 用黑体显示中文
-plt.rcParams['axes.unicode_minus'] = False  # 正常显示负号
+
+def get_pyplot():
+    """
+    延迟导入 matplotlib（只有可视化时才需要），首次导入时设置中文字体
+
+    返回:
+    - plt: matplotlib.pyplot 模块
+    """
+    global _plt
+    if _plt is None:
+        import matplotlib.pyplot as plt
+        plt.rcParams['font.sans-serif'] = ['SimHei']  # 用黑体显示中文
+        plt.rcParams['axes.unicode_minus'] = False  # 正常显示负号
+        _plt = plt
+    return _plt
 
 
 # ======================== 算法处理部分 ========================
@@ -23,6 +46,28 @@ def threshold_segmentation(blurred):
     _, thresh = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
     return thresh
 
+def otsu_level(gray):
+    """
+    由整图直方图计算 Otsu 阈值（与 cv2.threshold 的 THRESH_OTSU 一致），不生成整图大小的输出
+
+    参数:
+    - gray: uint8 灰度图
+
+    返回:
+    - level: 阈值
+    """
+    hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel().astype(np.float64)
+    # 类间方差最大的阈值
+    levels = np.arange(256, dtype=np.float64)
+    weight = np.cumsum(hist)
+    mean = np.cumsum(hist * levels)
+    total, total_mean = weight[-1], mean[-1]
+    w0, w1 = weight, total - weight
+    with np.errstate(divide='ignore', invalid='ignore'):
+        between = (total_mean * w0 - mean * total) ** 2 / (w0 * w1)
+    between[~np.isfinite(between)] = -1
+    return float(np.argmax(between))
+
 def morphological_operations(thresh):
     kernel = np.ones((3, 3), np.uint8)
     # 闭运算（先膨胀后腐蚀）填充前景物体内部孔洞
@@ -66,6 +111,53 @@ def fill_by_largest_black_area(closed):
 
     return filled_image, max_area
 
+def line_band_spans(shape, line_params, half_width):
+    """
+    计算直线 Ax + By + C = 0 两侧 |Ax + By + C| < half_width 的带状区域在每行的像素区间
+
+    逐行求解不等式，只需要与图像高度等长的数组，不再构造整幅坐标网格和距离图
+
+    参数:
+    - shape: 图像尺寸 (height, width)
+    - line_params: 归一化的直线参数 (A, B, C)
+    - half_width: 带宽的一半（像素）
+
+    返回:
+    - rows, x_start, x_end: 非空行的行号和列区间 [x_start, x_end)
+    """
+    height, width = shape[:2]
+    A, B, C = line_params
+    ys = np.arange(height, dtype=np.float64)
+    offset = B * ys + C
+    if abs(A) < 1e-12:
+        # 水平线：整行要么全在带内，要么全不在
+        inside = np.abs(offset) < half_width
+        x_start = np.where(inside, 0, width)
+        x_end = np.full(height, width)
+    else:
+        # -half_width < A x + offset < half_width，严格不等式下的整数解
+        lo = (-half_width - offset) / A
+        hi = (half_width - offset) / A
+        lo, hi = np.minimum(lo, hi), np.maximum(lo, hi)
+        x_start = np.clip(np.floor(lo) + 1, 0, width).astype(np.int64)
+        x_end = np.clip(np.ceil(hi), 0, width).astype(np.int64)
+    rows = np.flatnonzero(x_end > x_start)
+    return rows, x_start[rows], x_end[rows]
+
+def fill_line_band(image, line_params, half_width, value=0):
+    """
+    将直线两侧 half_width 像素内的区域原地填充为 value
+
+    参数:
+    - image: 单通道图像（原地修改）
+    - line_params: 归一化的直线参数 (A, B, C)
+    - half_width: 带宽的一半（像素）
+    - value: 填充值
+    """
+    rows, x_start, x_end = line_band_spans(image.shape, line_params, half_width)
+    for y, x0, x1 in zip(rows.tolist(), x_start.tolist(), x_end.tolist()):
+        image[y, x0:x1] = value
+
 def process_with_centerline(closed):
     """
     利用中心线处理二值图
@@ -79,86 +171,45 @@ def process_with_centerline(closed):
     - processed_image: 处理后的图像
     - skeleton_image: 骨架图像
     """
-    try:
-        from skimage.morphology import skeletonize
-        from sklearn.linear_model import RANSACRegressor
-    except ImportError:
-        print("需要安装scikit-image和scikit-learn库")
-        print("请运行: pip install scikit-image scikit-learn")
-        return None, None, closed, None
-
     # 1. 反转二值图（黑色区域为前景）
     inverted = cv2.bitwise_not(closed)
 
-    # 2. 使用skimage的骨架提取
-    skeleton_binary = skeletonize(inverted > 0)
-    skeleton_image = (skeleton_binary * 255).astype(np.uint8)
-
-    # 3. 获取骨架点坐标
-    skeleton_points = np.argwhere(skeleton_binary)
-    if len(skeleton_points) < 2:
+    # 2. 骨架提取 + 子采样 RANSAC 拟合直线（内点垂直距离 < 3）
+    skeleton_image, line_params, skeleton_points, inlier_mask = find_centerline(
+        inverted, residual_threshold=3.0, max_trials=100, random_state=42)
+    if line_params is None:
         return None, None, closed, skeleton_image
+    A, B, C = line_params
 
-    # 4. 使用RANSAC拟合直线
-    X = skeleton_points[:, 1].reshape(-1, 1)  # x坐标
-    y = skeleton_points[:, 0]  # y坐标
-
-    ransac = RANSACRegressor(
-        residual_threshold=3.0,
-        max_trials=100,
-        random_state=42
-    )
-    ransac.fit(X, y)
-
-    # 获取直线参数 y = mx + b
-    slope = ransac.estimator_.coef_[0]
-    intercept = ransac.estimator_.intercept_
-
-    # 转换为标准形式 Ax + By + C = 0
-    A, B, C = -slope, 1, -intercept
-    norm = np.sqrt(A**2 + B**2)
-    if norm > 0:
-        A, B, C = A/norm, B/norm, C/norm
-
-    # 5. 创建中心线图像
+    # 3. 创建中心线图像
     centerline_image = np.zeros_like(closed)
-    inlier_mask = ransac.inlier_mask_
-    if np.any(inlier_mask):
-        inlier_points = skeleton_points[inlier_mask]
-        for y, x in inlier_points:
-            centerline_image[y, x] = 255
+    inlier_points = skeleton_points[inlier_mask]
+    centerline_image[inlier_points[:, 1], inlier_points[:, 0]] = 255
 
-    # 6. 在原图上创建中心线两侧的背景区域
+    # 4. 在原图上创建中心线两侧的背景区域：将距离中心线3个像素内的区域设为黑色
     processed_image = closed.copy()
-    height, width = closed.shape
-
-    # 创建网格坐标
-    y_coords, x_coords = np.mgrid[0:height, 0:width]
-
-    # 计算每个点到直线的距离
-    distances = np.abs(A * x_coords + B * y_coords + C)
-
-    # 将距离中心线3个像素内的区域设为黑色
-    mask = distances < 3
-    processed_image[mask] = 0
+    fill_line_band(processed_image, (A, B, C), 3)
 
-    line_params = (A, B, C)
     return centerline_image, line_params, processed_image, skeleton_image
 
-def extract_foreground_with_centerline(closed):
+def extract_foreground_with_centerline(closed, timings=None):
     """
     基于中心线的前景提取
 
     参数:
     - closed: 闭运算后的二值图像
+    - timings: 分阶段计时字典，给出时记录 centerline / foreground 两个阶段的耗时（秒）
 
     返回:
     - sure_fg: 确定的前景区域
     - filled_image: 填充后的图像
     - centerline_data: 中心线相关数据
     """
+    start = time.perf_counter()
+
     # 1. 利用中心线处理
     centerline_image, line_params, processed_image, skeleton_image = process_with_centerline(closed)
+    centerline_done = time.perf_counter()
 
     # 2. 填充非最大黑色区域为白色
     filled_image, largest_black_area = fill_by_largest_black_area(processed_image)
@@ -167,6 +218,10 @@ def extract_foreground_with_centerline(closed):
     kernel = np.ones((5, 5), np.uint8)
     sure_fg = cv2.erode(filled_image, kernel, iterations=2)
 
+    if timings is not None:
+        timings['centerline'] = centerline_done - start
+        timings['foreground'] = time.perf_counter() - centerline_done
+
     # 4. 准备中心线数据
     centerline_data = {
         'centerline_image': centerline_image,
@@ -186,6 +241,7 @@ def visualize_centerline_process(closed, centerline_data):
     - closed: 闭运算后的二值图像
     - centerline_data: 中心线相关数据
     """
+    plt = get_pyplot()
     if centerline_data is None or centerline_data['skeleton_image'] is None:
         print("无法提取中心线")
         return
@@ -240,6 +296,7 @@ def visualize_simple_process(closed, filled_image, sure_fg, centerline_data):
     - sure_fg: 确定的前景区域
     - centerline_data: 中心线相关数据
     """
+    plt = get_pyplot()
     plt.figure(figsize=(20, 5))
 
     plt.subplot(141)
@@ -300,41 +357,203 @@ def apply_watershed(image, markers):
     markers = cv2.watershed(image, markers)
     return markers
 
+def build_mask_lut(max_marker):
+    """
+    构建 标记值 -> 掩码灰度 的查找表
+
+    区域 i（i >= 2）的灰度为 i * (255 // (max_marker + 1))，背景 1 和边界 -1 为 0。
+    查找表长度为 max_marker + 2，最后一项为 0，边界 -1 直接按负下标取到它，
+    因此 lut[markers] 一次查表即可得到掩码，无需额外的临时数组
+
+    参数:
+    - max_marker: 最大标记值
+
+    返回:
+    - lut: uint8 查找表
+    """
+    max_marker = max(int(max_marker), 1)
+    lut = np.zeros(max_marker + 2, dtype=np.uint8)
+    step = 255 // (max_marker + 1)
+    if step > 0:
+        lut[2:max_marker + 1] = np.arange(2, max_marker + 1) * step
+    return lut
+
+def markers_to_label_map(markers):
+    """
+    分水岭标记转为 uint16 标签图（边界 -1 记为 0，其余保持标记值），可无损保存为 16 位 PNG
+
+    参数:
+    - markers: cv2.watershed 输出的 int32 标记
+
+    返回:
+    - labels: uint16 标签图
+    """
+    if markers.max() > np.iinfo(np.uint16).max:
+        raise ValueError(f"标记数 {markers.max()} 超出 uint16 范围")
+    labels = markers.astype(np.uint16)
+    labels[markers < 0] = 0
+    return labels
+
 def generate_segmentation_results(image, gray, markers):
     # 创建结果图像 - 原始图像上叠加分割边界
     result = image.copy()
     # 在图像上标记分水岭边界（标记为-1的区域）
     result[markers == -1] = [0, 255, 0]  # 边界用绿色标记
     
-    # 创建分割掩码图像
-    mask = np.zeros_like(gray)
-    # 为每个分割区域分配不同的值
-    for i in range(2, markers.max() + 1):
-        mask[markers == i] = i * (255 // (markers.max() + 1))
+    # 创建分割掩码图像：为每个分割区域分配不同的值，整幅标记图一次查表
+    mask = build_mask_lut(markers.max())[markers]
     
     return result, mask
 
-def watershed_algorithm(image):
-    # 1. 图像预处理
-    gray, blurred = preprocess_image(image)
+def benchmark_mask_generation(size=1024, marker_counts=(16, 256, 1024, 4096), repeat=3):
+    """
+    掩码生成的微基准：逐区域比较（原实现）与查找表的耗时随标记数的变化
 
-    # 2. 阈值分割
-    thresh = threshold_segmentation(blurred)
+    参数:
+    - size: 合成标记图的边长
+    - marker_counts: 测试的区域数列表
+    - repeat: 每组重复次数，取最短耗时
+    """
+    def loop_mask(markers):
+        mask = np.zeros(markers.shape, dtype=np.uint8)
+        for i in range(2, markers.max() + 1):
+            mask[markers == i] = i * (255 // (markers.max() + 1))
+        return mask
+
+    def best_of(func, markers):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            out = func(markers)
+            best = min(best, time.perf_counter() - start)
+        return best, out
+
+    rng = np.random.default_rng(0)
+    print(f"标记图 {size}×{size}")
+    print(f"{'区域数':>8} {'逐区域(ms)':>12} {'查找表(ms)':>12} {'加速比':>8}")
+    for count in marker_counts:
+        # 随机种子点的最近邻划分作为标记图，边界像素置为 -1
+        side = int(np.ceil(np.sqrt(count)))
+        cell = int(np.ceil(size / side))
+        markers = (np.arange(size)[:, None] // cell * side + np.arange(size)[None, :] // cell).astype(np.int32) + 2
+        markers[rng.random(markers.shape) < 0.01] = -1
+        t_loop, m_loop = best_of(loop_mask, markers)
+        t_lut, m_lut = best_of(lambda m: build_mask_lut(m.max())[m], markers)
+        assert np.array_equal(m_loop, m_lut)
+        print(f"{markers.max() - 1:>8} {t_loop * 1000:>12.1f} {t_lut * 1000:>12.1f} {t_loop / t_lut:>8.1f}")
+
+def tiled_watershed(image, sure_bg, sure_fg, tile_size=2048, halo=64, workers=0):
+    """
+    分块应用分水岭：种子全局编号，各块在统一编号的标记上做分水岭，只保留核心区域
+
+    确定前景的连通域用 label_tiles 在整图上编号（与整图 connectedComponents 的划分完全一致），
+    因此同一种子在所有块中编号相同，区域数与整图处理一致（编号按块顺序，可能与整图不同），
+    接缝处不需要合并。
+    分水岭的淹没过程只能看到块和 halo 内的像素：盆地延伸到 halo 以外时，
+    接缝附近的边界与整图处理可能不同（近似），halo 越大越接近
+
+    参数:
+    - image: BGR 图像
+    - sure_bg / sure_fg: 确定背景 / 确定前景
+    - tile_size: 块大小
+    - halo: 分水岭的重叠像素数
+    - workers: 线程数，0 表示全部核心
+
+    返回:
+    - markers: 与 apply_watershed 相同约定的整图标记（-1 边界，1 背景，>= 2 区域）
+    - unknown: 未知区域
+    """
+    # 1. 种子全局编号（与 compute_markers 相同：背景 1，区域从 2 开始，未知区域 0）
+    unknown = map_tiles(cv2.subtract, (sure_bg, sure_fg), tile_size, 0, workers)
+    labels, _ = label_tiles(lambda fg: cv2.connectedComponents(fg)[1], sure_fg, tile_size, 1, workers)
+    markers = map_tiles(lambda lab, unk: np.where(unk == 255, 0, lab + 1).astype(np.int32),
+                        (labels, unknown), tile_size, 0, workers)
+    del labels
+
+    # 2. 分块分水岭，cv2.watershed 原地修改标记，每块使用副本
+    def process(image_tile, marker_tile):
+        return apply_watershed(np.ascontiguousarray(image_tile), marker_tile.copy())
+
+    markers = map_tiles(process, (image, markers), tile_size, halo, workers)
+    return markers, unknown
+
+def watershed_algorithm(image, timings=None, tile_size=None, tile_halo=64, tile_workers=0):
+    """
+    分水岭分割主流程
+
+    给出 tile_size 时按块处理：高斯滤波和形态学按块计算（halo 覆盖核半径，结果与整图一致），
+    Otsu 阈值由整图直方图求出后按块应用，种子按块全局编号（与整图一致），分水岭按块计算
+    （区域数与整图一致，盆地超出 tile_halo 时接缝附近的边界为近似）；
+    中心线拟合和最大黑色连通域需要全局信息，仍在整图上计算
 
-    # 3. 形态学操作
-    closed, sure_bg = morphological_operations(thresh)
+    参数:
+    - image: BGR 图像
+    - timings: 分阶段计时字典，给出时按 STAGES 记录各阶段耗时（秒）
+    - tile_size: 块大小，None 为整图处理
+    - tile_halo: 分水岭分块的重叠像素数
+    - tile_workers: 分块处理的线程数，0 表示全部核心
+
+    返回:
+    - result, mask, intermediate_results
+    """
+    if timings is None:
+        timings = {}
+    last = time.perf_counter()
 
-    # 4. 基于中心线的前景提取
-    sure_fg, filled_image, centerline_data = extract_foreground_with_centerline(closed)
+    def lap(stage):
+        nonlocal last
+        now = time.perf_counter()
+        timings[stage] = now - last
+        last = now
 
-    # 5. 计算标记
-    markers, unknown = compute_markers(sure_bg, sure_fg)
+    # 1. 图像预处理
+    if tile_size:
+        gray = map_tiles(lambda tile: cv2.cvtColor(tile, cv2.COLOR_BGR2GRAY), image, tile_size, 0, tile_workers)
+        blurred = map_tiles(lambda tile: cv2.GaussianBlur(tile, (5, 5), 0), gray, tile_size, 2, tile_workers)
+    else:
+        gray, blurred = preprocess_image(image)
+    lap('preprocess')
 
-    # 6. 应用分水岭算法
-    markers = apply_watershed(image, markers)
+    # 2. 阈值分割
+    if tile_size:
+        level = otsu_level(blurred)
+        thresh = map_tiles(lambda tile: cv2.threshold(tile, level, 255, cv2.THRESH_BINARY)[1],
+                           blurred, tile_size, 0, tile_workers)
+    else:
+        thresh = threshold_segmentation(blurred)
+    lap('threshold')
+
+    # 3. 形态学操作（闭运算 2 次 + 膨胀 3 次，3×3 核，影响半径分别为 4 和 3）
+    if tile_size:
+        kernel = np.ones((3, 3), np.uint8)
+        closed = map_tiles(lambda tile: cv2.morphologyEx(tile, cv2.MORPH_CLOSE, kernel, iterations=2),
+                           thresh, tile_size, 4, tile_workers)
+        sure_bg = map_tiles(lambda tile: cv2.dilate(tile, kernel, iterations=3), closed, tile_size, 3, tile_workers)
+    else:
+        closed, sure_bg = morphological_operations(thresh)
+    lap('morphology')
+
+    # 4. 基于中心线的前景提取（内部记录 centerline / foreground）
+    sure_fg, filled_image, centerline_data = extract_foreground_with_centerline(closed, timings)
+    last = time.perf_counter()
+
+    if tile_size:
+        # 5 + 6. 分块计算标记并应用分水岭
+        markers, unknown = tiled_watershed(image, sure_bg, sure_fg, tile_size, tile_halo, tile_workers)
+        lap('watershed')
+        timings['markers'] = 0.0
+    else:
+        # 5. 计算标记
+        markers, unknown = compute_markers(sure_bg, sure_fg)
+        lap('markers')
+
+        # 6. 应用分水岭算法
+        markers = apply_watershed(image, markers)
+        lap('watershed')
 
     # 7. 生成分割结果
     result, mask = generate_segmentation_results(image, gray, markers)
+    lap('results')
 
     # 保存中间结果用于可视化
     intermediate_results = {
@@ -346,6 +565,7 @@ def watershed_algorithm(image):
         'markers': markers,
         'filled_image': filled_image,
         'centerline_data': centerline_data,
+        'largest_black_area': centerline_data.get('largest_black_area', 0) if centerline_data else 0,
         'closed': closed
     }
 
@@ -354,7 +574,7 @@ def watershed_algorithm(image):
 
 # ======================== 结果显示部分 ========================
 
-def save_results(result, mask, output_path):
+def save_results(result, mask, output_path, markers=None, verbose=True):
     """
     保存分割结果和掩码
     
@@ -362,6 +582,8 @@ def save_results(result, mask, output_path):
     - result: 带边界标记的结果图像
     - mask: 分割掩码
     - output_path: 输出路径
+    - markers: 分水岭标记，给出时另存为 16 位 PNG 标签图（*_labels.png）
+    - verbose: 是否打印保存路径
     
     返回:
     - success: 是否保存成功
@@ -374,12 +596,21 @@ def save_results(result, mask, output_path):
         
         # 保存分割结果
         cv2.imwrite(output_path, result)
-        print(f"分割结果已保存到: {output_path}")
+        if verbose:
+            print(f"分割结果已保存到: {output_path}")
         
         # 保存分割掩码
         mask_path = os.path.splitext(output_path)[0] + "_mask.png"
         cv2.imwrite(mask_path, mask)
-        print(f"分割掩码已保存到: {mask_path}")
+        if verbose:
+            print(f"分割掩码已保存到: {mask_path}")
+        
+        # 保存 16 位标签图
+        if markers is not None:
+            labels_path = os.path.splitext(output_path)[0] + "_labels.png"
+            cv2.imwrite(labels_path, markers_to_label_map(markers))
+            if verbose:
+                print(f"标签图已保存到: {labels_path}")
         
         return True
     except Exception as e:
@@ -396,6 +627,7 @@ def visualize_process(image, mask, intermediate_results):
     - mask: 分割掩码
     - intermediate_results: 中间处理结果字典
     """
+    plt = get_pyplot()
     # 可视化主要处理步骤
     plt.figure(figsize=(20, 12))
 
@@ -451,6 +683,7 @@ def visualize_markers_and_mask(intermediate_results, mask):
     - intermediate_results: 中间处理结果字典
     - mask: 分割掩码
     """
+    plt = get_pyplot()
     plt.figure(figsize=(10, 5))
     
     plt.subplot(121)
@@ -474,6 +707,7 @@ def visualize_unknown_region(intermediate_results):
     参数:
     - intermediate_results: 中间处理结果字典
     """
+    plt = get_pyplot()
     plt.figure(figsize=(10, 5))
     
     plt.subplot(111)
@@ -487,7 +721,7 @@ def visualize_unknown_region(intermediate_results):
 
 # ======================== 主函数 ========================
 
-def watershed_segmentation(image_path, output_path, visualize=True):
+def watershed_segmentation(image_path, output_path, visualize=True, save_labels=False, tile_options=None):
     """
     使用分水岭算法进行图像分割
     
@@ -495,6 +729,8 @@ def watershed_segmentation(image_path, output_path, visualize=True):
     - image_path: 输入图像路径
     - output_path: 输出图像路径
     - visualize: 是否显示分割过程和结果，默认为True
+    - save_labels: 是否另存 16 位 PNG 标签图，默认为False
+    - tile_options: 分块处理参数（tile_size / tile_halo / tile_workers），None 为整图处理
     
     返回:
     - success: 是否处理成功
@@ -515,10 +751,11 @@ def watershed_segmentation(image_path, output_path, visualize=True):
     print(f"图像加载完成，尺寸: {width}×{height}")
     
     # 执行分水岭算法
-    result, mask, intermediate_results = watershed_algorithm(image)
+    result, mask, intermediate_results = watershed_algorithm(image, **(tile_options or {}))
     
     # 保存结果
-    save_success = save_results(result, mask, output_path)
+    save_success = save_results(result, mask, output_path,
+                                intermediate_results['markers'] if save_labels else None)
     
     # 显示结果（如果需要）
     if visualize:
@@ -539,14 +776,79 @@ def watershed_segmentation(image_path, output_path, visualize=True):
     return save_success
 
 
-def batch_process(input_folder, output_folder, visualize=False):
+def segment_file(input_path, output_path, save_labels=False, tile_options=None):
+    """
+    分割单个图像文件并记录各阶段耗时（批量处理的进程池任务，不显示、不打印）
+
+    参数:
+    - input_path: 输入图像路径
+    - output_path: 输出图像路径
+    - save_labels: 是否另存 16 位 PNG 标签图
+    - tile_options: 分块处理参数，None 为整图处理
+
+    返回:
+    - (width, height, timings)：图像尺寸和 STAGES 各阶段耗时（秒）
+    """
+    timings = {}
+    start = time.perf_counter()
+    image = cv2.imread(input_path)
+    if image is None:
+        raise IOError(f"无法读取图像 {input_path}")
+    timings['read'] = time.perf_counter() - start
+
+    result, mask, intermediate_results = watershed_algorithm(image, timings, **(tile_options or {}))
+
+    start = time.perf_counter()
+    if not save_results(result, mask, output_path,
+                        intermediate_results['markers'] if save_labels else None, verbose=False):
+        raise IOError(f"保存失败 {output_path}")
+    timings['save'] = time.perf_counter() - start
+
+    height, width = image.shape[:2]
+    return width, height, timings
+
+
+def _init_worker():
+    # 多进程并行时每个进程只用一个 OpenCV 线程，避免线程数超额
+    cv2.setNumThreads(1)
+
+
+def write_timing_csv(rows, csv_path):
+    """
+    写出分阶段计时 CSV 并打印各阶段的平均耗时和占比
+
+    参数:
+    - rows: [(文件名, width, height, timings), ...]
+    - csv_path: CSV 路径
+    """
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['file', 'width', 'height'] + [f'{stage}_s' for stage in STAGES] + ['total_s'])
+        for name, width, height, timings in rows:
+            values = [timings.get(stage, 0.0) for stage in STAGES]
+            writer.writerow([name, width, height] + [f'{v:.4f}' for v in values] + [f'{sum(values):.4f}'])
+
+    if rows:
+        totals = np.array([[t.get(stage, 0.0) for stage in STAGES] for _, _, _, t in rows]).sum(axis=0)
+        print("\n各阶段平均耗时:")
+        for stage, total in zip(STAGES, totals.tolist()):
+            print(f"  {stage:<11} {total / len(rows) * 1000:>9.1f} ms  {total / max(totals.sum(), 1e-12):>6.1%}")
+    print(f"计时结果已保存到: {csv_path}")
+
+
+def batch_process(input_folder, output_folder, visualize=False, save_labels=False, jobs=1, timing_csv=None,
+                  tile_options=None):
     """
     批量处理文件夹中的所有图像
     
     参数:
     - input_folder: 输入文件夹路径
     - output_folder: 输出文件夹路径
-    - visualize: 是否显示分割结果，默认为False
+    - visualize: 是否显示分割结果，默认为False（jobs 不为 1 时忽略）
+    - save_labels: 是否另存 16 位 PNG 标签图，默认为False
+    - jobs: 并行进程数，1 为串行，0 为全部核心
+    - timing_csv: 分阶段计时 CSV 路径，默认为输出文件夹下的 watershed_timings.csv
+    - tile_options: 分块处理参数，None 为整图处理；并行时 tile_workers 为 0 则按 cpu_count // jobs 分配
     
     返回:
     - success: 是否处理成功
@@ -564,29 +866,55 @@ def batch_process(input_folder, output_folder, visualize=False):
     image_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif']
     
     # 获取所有图像文件
-    image_files = [f for f in os.listdir(input_folder) 
-                  if any(f.lower().endswith(ext) for ext in image_extensions)]
+    image_files = sorted(f for f in os.listdir(input_folder)
+                         if any(f.lower().endswith(ext) for ext in image_extensions))
     
     if not image_files:
         print(f"在文件夹 {input_folder} 中未找到支持的图像文件")
         return False
     
-    print(f"找到 {len(image_files)} 个图像文件，开始处理...")
+    jobs = jobs or os.cpu_count() or 1
+    print(f"找到 {len(image_files)} 个图像文件，开始处理（{jobs} 进程）...")
+    tasks = [(image_file, os.path.join(input_folder, image_file),
+              os.path.join(output_folder, f"watershed_{image_file}")) for image_file in image_files]
     
-    # 逐个处理图像
+    rows = []
     success_count = 0
-    for i, image_file in enumerate(image_files, 1):
-        input_path = os.path.join(input_folder, image_file)
-        output_path = os.path.join(output_folder, f"watershed_{image_file}")
-        
-        print(f"\n处理图像 {i}/{len(image_files)}: {image_file}")
-        try:
-            if watershed_segmentation(input_path, output_path, visualize):
-                success_count += 1
-        except Exception as e:
-            print(f"处理失败: {e}")
-    
-    print(f"\n批量处理完成！成功处理 {success_count}/{len(image_files)} 个图像")
+    start = time.perf_counter()
+    if jobs == 1:
+        # 串行处理；显示结果时走单文件流程，不记录计时
+        for i, (image_file, input_path, output_path) in enumerate(tasks, 1):
+            print(f"\n处理图像 {i}/{len(tasks)}: {image_file}")
+            try:
+                if visualize:
+                    success_count += bool(watershed_segmentation(input_path, output_path, visualize, save_labels,
+                                                                 tile_options))
+                else:
+                    rows.append((image_file,) + segment_file(input_path, output_path, save_labels, tile_options))
+                    success_count += 1
+            except Exception as e:
+                print(f"处理失败: {e}")
+    else:
+        # 多进程时每个进程只分到 cpu_count // jobs 个分块线程，避免线程数超额
+        if tile_options and not tile_options.get('tile_workers'):
+            tile_options = dict(tile_options, tile_workers=max(1, (os.cpu_count() or 1) // jobs))
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as executor:
+            futures = {executor.submit(segment_file, input_path, output_path, save_labels, tile_options): image_file
+                       for image_file, input_path, output_path in tasks}
+            for i, future in enumerate(as_completed(futures), 1):
+                image_file = futures[future]
+                try:
+                    rows.append((image_file,) + future.result())
+                    print(f"处理完成 {i}/{len(tasks)}: {image_file}")
+                except Exception as e:
+                    print(f"处理失败 {i}/{len(tasks)}: {image_file}: {e}")
+        rows.sort()
+        success_count = len(rows)
+    
+    print(f"\n批量处理完成！成功处理 {success_count}/{len(image_files)} 个图像，"
+          f"耗时 {time.perf_counter() - start:.1f}s")
+    if rows:
+        write_timing_csv(rows, timing_csv or os.path.join(output_folder, 'watershed_timings.csv'))
     return True
 
 
@@ -606,31 +934,70 @@ def parse_arguments():
                         default='./output/watershed_result.bmp', 
                         help='输出图像路径或文件夹路径')
     parser.add_argument('-v', '--visualize', 
-                        default=True,
+                        default=None,
                         action='store_true', 
-                        help='显示分割结果')
+                        help='显示分割结果（单文件模式默认显示，批量模式需显式指定）')
+    parser.add_argument('--no-visualize', 
+                        dest='visualize',
+                        action='store_false', 
+                        help='不显示分割结果（批量处理时才会记录分阶段计时）')
     parser.add_argument('-b', '--batch', 
                         action='store_true', 
                         help='批量处理模式')
+    parser.add_argument('--save-labels', 
+                        action='store_true', 
+                        help='另存 16 位 PNG 标签图（*_labels.png）')
+    parser.add_argument('-j', '--jobs', 
+                        type=int, 
+                        default=1,
+                        help='批量处理的并行进程数，1 为串行，0 为全部核心 (默认: 1)')
+    parser.add_argument('--timing-csv', 
+                        default=None,
+                        help='批量处理的分阶段计时 CSV 路径 (默认: 输出文件夹/watershed_timings.csv)')
+    parser.add_argument('--tile-size', 
+                        type=int, 
+                        default=None,
+                        help='分块处理的块大小，超大图像使用以限制内存 (默认: 整图处理)')
+    parser.add_argument('--tile-halo', 
+                        type=int, 
+                        default=64,
+                        help='分水岭分块的重叠像素数，区域超出 halo 时接缝附近的边界为近似 (默认: 64)')
+    parser.add_argument('--tile-workers', 
+                        type=int, 
+                        default=0,
+                        help='分块处理的线程数，0 为自动（串行时全部核心，并行时 cpu_count // jobs） (默认: 0)')
+    parser.add_argument('--benchmark', 
+                        action='store_true', 
+                        help='运行掩码生成的微基准')
     return parser.parse_args()
 
 
 if __name__ == "__main__":
     args = parse_arguments()
     
+    tile_options = None
+    if args.tile_size:
+        tile_options = {'tile_size': args.tile_size, 'tile_halo': args.tile_halo, 'tile_workers': args.tile_workers}
+    
     # 根据是否批量处理模式选择不同的处理函数
-    if args.batch:
+    if args.benchmark:
+        benchmark_mask_generation()
+    elif args.batch:
         # 批量处理模式
         if not os.path.isdir(args.input):
             print(f"错误：批量处理模式需要输入文件夹路径，而不是文件路径")
         else:
-            batch_process(args.input, args.output, visualize=args.visualize)
+            # 批量模式只在显式 -v 时显示结果，默认记录分阶段计时
+            batch_process(args.input, args.output, visualize=bool(args.visualize) and args.jobs == 1,
+                          save_labels=args.save_labels, jobs=args.jobs, timing_csv=args.timing_csv,
+                          tile_options=tile_options)
     else:
         # 单文件处理模式
         if not os.path.isfile(args.input):
             print(f"错误：单文件处理模式需要输入文件路径，而不是文件夹路径")
         else:
-            success = watershed_segmentation(args.input, args.output, visualize=args.visualize)
+            success = watershed_segmentation(args.input, args.output, visualize=args.visualize is not False,
+                                             save_labels=args.save_labels, tile_options=tile_options)
             
             if success:
                 print("\n图像分割完成!")
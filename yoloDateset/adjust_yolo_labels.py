@@ -1,5 +1,10 @@
-import os
-import glob
+from relabel import IdRemap, relabel_directory, relabel_file
+
+
+def _shift_remap():
+    """类别编号减1，结果小于0的行被删除"""
+    return IdRemap(shift=-1, min_cols=5, keep_malformed=False)
+
 
 def adjust_yolo_labels(input_file, output_file):
     """
@@ -9,48 +14,27 @@ def adjust_yolo_labels(input_file, output_file):
     :param output_file: 输出的YOLO格式标注文件路径
     """
     try:
-        with open(input_file, 'r') as infile, open(output_file, 'w') as outfile:
-            for line in infile:
-                parts = line.strip().split()
-                if len(parts) < 5:
-                    print(f"跳过无效行: {line.strip()}")
-                    continue
-                try:
-                    class_id = int(parts[0]) - 1  # 类别编号减1
-                    if class_id < 0:
-                        print(f"警告: 类别编号小于0，跳过行: {line.strip()}")
-                        continue
-                    new_line = f"{class_id} " + " ".join(parts[1:]) + "\n"
-                    outfile.write(new_line)
-                except ValueError:
-                    print(f"跳过无法解析的行: {line.strip()}")
-    
+        kept, deleted = relabel_file(input_file, output_file, _shift_remap())
+        if deleted:
+            print(f"警告: {deleted} 行类别编号小于0，已跳过")
         print(f"处理完成，结果已保存到 {output_file}")
     except FileNotFoundError:
         print(f"文件 {input_file} 未找到！")
     except Exception as e:
         print(f"发生错误: {e}")
 
-def adjust_yolo_labels_in_directory(input_dir, output_dir):
+def adjust_yolo_labels_in_directory(input_dir, output_dir, workers=0):
     """
     处理一个文件夹下的所有YOLO格式的标注文件，将类别编号减1，并保存到新的文件中。
 
     :param input_dir: 输入的文件夹路径，包含YOLO格式标注文件
     :param output_dir: 输出的文件夹路径，用于保存处理后的文件
+    :param workers: 并行进程数，0 表示全部核心
     """
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-
-    # 获取文件夹下所有txt文件
-    input_files = glob.glob(os.path.join(input_dir, "*.txt"))
-
-    for input_file in input_files:
-        # 获取文件名
-        file_name = os.path.basename(input_file)
-        output_file = os.path.join(output_dir, file_name)
-
-        # 调用单文件处理函数
-        adjust_yolo_labels(input_file, output_file)
+    stats = relabel_directory(input_dir, output_dir, _shift_remap(), workers)
+    if stats['deleted']:
+        print(f"警告: {stats['deleted']} 行类别编号小于0，已跳过")
+    print(f"处理完成，结果已保存到 {output_dir}")
 
 if __name__ == "__main__":
     # 输入文件路径
@@ -0,0 +1,669 @@
+"""
+标注数据集内存模型（列式 NumPy 存储）
+
+所有格式统一读入 AnnotationSet：
+- class_ids:  (N,)      int32    类别 ID（对应 classes 列表下标）
+- polygons:   (N, 4, 2) float32  四个角点的像素坐标
+- difficult:  (N,)      bool     DOTA difficult 标记
+- offsets:    (M+1,)    int64    CSR 索引，第 i 张图的标注为 offsets[i]:offsets[i+1]
+- image_names / image_files / image_sizes: 每张图的文件名主干、图像文件名、(width, height)
+
+图像尺寸未知时（例如读取 YOLO 标注但未给出图像目录）尺寸记为 (1, 1)，
+此时 polygons 保存的就是归一化坐标，写回 YOLO / YOLO-OBB 时结果不变。
+
+支持的格式（读 / 写）：
+- YOLO        class_id cx cy w h（归一化）
+- YOLO-OBB    class_id x1 y1 x2 y2 x3 y3 x4 y4（归一化）
+- DOTA        x1 y1 x2 y2 x3 y3 x4 y4 category_name difficult（像素）
+- VOC         每图一个 XML，bndbox / robndbox
+- COCO        单个 JSON，bbox + segmentation
+- xAnyLabeling 每图一个 JSON，shape_type=rotation
+
+使用方法：
+    from annotations import read_dota_dir, write_yolo_obb_dir
+    ds = read_dota_dir("dota/labels", image_dir="dota/images")
+    write_yolo_obb_dir(ds, "yolo/labels")
+"""
+
+import json
+import os
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from configs import CLASSES
+from file_index import get_index
+from image_meta import get_image_size
+from obb_geometry import boxes_to_polygons, denormalize_polygons, normalize_polygons, polygons_to_boxes
+from voc_reader import read_voc_records, voc_polygons
+
+# DOTA 头部信息前缀
+DOTA_HEADER_PREFIXES = ('imagesource:', 'gsd:')
+
+
+class ImageAnnotations(NamedTuple):
+    """单张图像的标注视图（数组为 AnnotationSet 中的切片，不复制）"""
+    name: str
+    image_file: str
+    size: Tuple[int, int]
+    class_ids: np.ndarray
+    polygons: np.ndarray
+    difficult: np.ndarray
+
+
+class AnnotationSet:
+    """
+    列式存储的标注数据集
+
+    通过 add_image 逐图追加，数组在首次访问时一次性拼接。
+    """
+
+    def __init__(self, classes: Optional[Sequence[str]] = None):
+        self.classes = list(classes) if classes is not None else list(CLASSES)
+        self.image_names: List[str] = []
+        self.image_files: List[str] = []
+        self._sizes: List[Tuple[int, int]] = []
+        self._counts: List[int] = []
+        self._pending: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._class_ids = np.zeros(0, np.int32)
+        self._polygons = np.zeros((0, 4, 2), np.float32)
+        self._difficult = np.zeros(0, bool)
+
+    # ---------- 构建 ----------
+
+    def add_image(
+        self,
+        name: str,
+        size: Tuple[int, int],
+        class_ids,
+        polygons,
+        difficult=None,
+        image_file: str = ''
+    ):
+        """
+        追加一张图像的标注
+
+        Args:
+            name: 文件名主干（不含扩展名），输出标注文件以此命名
+            size: (width, height)，未知时传 (1, 1) 表示坐标为归一化值
+            class_ids: (n,) 类别 ID
+            polygons: (n, 4, 2) 或 (n, 8) 像素坐标
+            difficult: (n,) difficult 标记，默认全 0
+            image_file: 图像文件名（可选）
+        """
+        class_ids = np.asarray(class_ids, dtype=np.int32).reshape(-1)
+        polygons = np.asarray(polygons, dtype=np.float32).reshape(-1, 4, 2)
+        if difficult is None:
+            difficult = np.zeros(len(class_ids), bool)
+        else:
+            difficult = np.asarray(difficult, dtype=bool).reshape(-1)
+        if not (len(class_ids) == len(polygons) == len(difficult)):
+            raise ValueError(f"{name}: class_ids / polygons / difficult 长度不一致")
+
+        self.image_names.append(name)
+        self.image_files.append(image_file)
+        self._sizes.append((int(size[0]), int(size[1])))
+        self._counts.append(len(class_ids))
+        if len(class_ids):
+            self._pending.append((class_ids, polygons, difficult))
+
+    def _flush(self):
+        if not self._pending:
+            return
+        self._class_ids = np.concatenate([self._class_ids] + [p[0] for p in self._pending])
+        self._polygons = np.concatenate([self._polygons] + [p[1] for p in self._pending])
+        self._difficult = np.concatenate([self._difficult] + [p[2] for p in self._pending])
+        self._pending = []
+
+    # ---------- 列式访问 ----------
+
+    @property
+    def class_ids(self) -> np.ndarray:
+        self._flush()
+        return self._class_ids
+
+    @property
+    def polygons(self) -> np.ndarray:
+        self._flush()
+        return self._polygons
+
+    @property
+    def difficult(self) -> np.ndarray:
+        self._flush()
+        return self._difficult
+
+    @property
+    def offsets(self) -> np.ndarray:
+        offsets = np.zeros(len(self._counts) + 1, np.int64)
+        np.cumsum(self._counts, out=offsets[1:])
+        return offsets
+
+    @property
+    def image_sizes(self) -> np.ndarray:
+        return np.asarray(self._sizes, dtype=np.int32).reshape(-1, 2)
+
+    @property
+    def image_index(self) -> np.ndarray:
+        """(N,) 每个标注所属图像的下标"""
+        return np.repeat(np.arange(len(self._counts)), self._counts)
+
+    def __len__(self) -> int:
+        return len(self.image_names)
+
+    @property
+    def num_objects(self) -> int:
+        return int(sum(self._counts))
+
+    def image(self, i: int) -> ImageAnnotations:
+        offsets = self.offsets
+        s, e = offsets[i], offsets[i + 1]
+        return ImageAnnotations(
+            self.image_names[i], self.image_files[i], self._sizes[i],
+            self.class_ids[s:e], self.polygons[s:e], self.difficult[s:e]
+        )
+
+    def __iter__(self):
+        offsets = self.offsets
+        class_ids, polygons, difficult = self.class_ids, self.polygons, self.difficult
+        for i, name in enumerate(self.image_names):
+            s, e = offsets[i], offsets[i + 1]
+            yield ImageAnnotations(name, self.image_files[i], self._sizes[i],
+                                   class_ids[s:e], polygons[s:e], difficult[s:e])
+
+    def normalized_polygons(self) -> np.ndarray:
+        """(N, 4, 2) float64 归一化坐标，整个数据集一次向量化除法"""
+        sizes = self.image_sizes.astype(np.float64)[self.image_index]
+        return self.polygons.astype(np.float64) / sizes[:, None, :]
+
+
+# ==================== 单图解析 / 格式化 ====================
+
+def polygon_areas(polygons: np.ndarray) -> np.ndarray:
+    """(n, 4, 2) 鞋带公式计算多边形面积"""
+    polygons = np.asarray(polygons, dtype=np.float64).reshape(-1, 4, 2)
+    x, y = polygons[..., 0], polygons[..., 1]
+    return 0.5 * np.abs(np.sum(x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y, axis=1))
+
+
+def _parse_numeric_rows(text: str, ncols: int, exact: bool = True) -> Tuple[np.ndarray, int]:
+    """
+    把每行 ncols 个数值的文本解析为 (n, ncols) float64 数组
+
+    每行列数都等于 ncols 时整个文件一次 np.array 转换；有列数不符或无法解析的行时逐行回退。
+    exact=False 时允许行尾有多余列（截断到前 ncols 列）。
+
+    Returns:
+        (rows, 跳过的行数)
+    """
+    split_lines = [parts for parts in (line.split() for line in text.splitlines()) if parts]
+    if all(len(parts) == ncols for parts in split_lines):
+        try:
+            return np.array(split_lines, dtype=np.float64).reshape(-1, ncols), 0
+        except ValueError:
+            pass
+
+    rows = []
+    skipped = 0
+    for parts in split_lines:
+        if len(parts) < ncols or (exact and len(parts) != ncols):
+            skipped += 1
+            continue
+        try:
+            rows.append([float(v) for v in parts[:ncols]])
+        except ValueError:
+            skipped += 1
+    return np.array(rows, dtype=np.float64).reshape(-1, ncols), skipped
+
+
+def parse_yolo_obb(text: str) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    解析 YOLO-OBB 文本
+
+    Returns:
+        (class_ids (n,), 归一化 polygons (n, 4, 2), 跳过的行数)
+    """
+    rows, skipped = _parse_numeric_rows(text, 9)
+    return rows[:, 0].astype(np.int32), rows[:, 1:].reshape(-1, 4, 2), skipped
+
+
+def parse_yolo_obb_scores(text: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    解析带置信度的 YOLO-OBB 预测文本（ultralytics save_txt + save_conf）：class x1 y1 ... y4 conf
+
+    Returns:
+        (class_ids (n,), 归一化 polygons (n, 4, 2), scores (n,), 跳过的行数)
+    """
+    rows, skipped = _parse_numeric_rows(text, 10)
+    return rows[:, 0].astype(np.int32), rows[:, 1:9].reshape(-1, 4, 2), rows[:, 9], skipped
+
+
+def parse_yolo(text: str) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    解析 YOLO 水平框文本
+
+    Returns:
+        (class_ids (n,), 归一化 polygons (n, 4, 2), 跳过的行数)
+    """
+    rows, skipped = _parse_numeric_rows(text, 5)
+    cx, cy, w, h = rows[:, 1], rows[:, 2], rows[:, 3], rows[:, 4]
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    return rows[:, 0].astype(np.int32), boxes_to_polygons(boxes), skipped
+
+
+def parse_dota(text: str, class_index: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str], int]:
+    """
+    解析 DOTA 文本，跳过头部信息
+
+    Args:
+        text: 文件内容
+        class_index: 类别名 -> ID
+
+    Returns:
+        (class_ids, 像素 polygons (n, 4, 2), difficult, 未知类别名列表, 格式错误行数)
+    """
+    coords, names, difficult = [], [], []
+    bad = 0
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith(DOTA_HEADER_PREFIXES):
+            continue
+        parts = line.split()
+        if len(parts) < 9:
+            bad += 1
+            continue
+        coords.append(parts[:8])
+        names.append(parts[8])
+        difficult.append(len(parts) > 9 and parts[9] == '1')
+
+    try:
+        polygons = np.array(coords, dtype=np.float64).reshape(-1, 4, 2)
+    except ValueError:
+        # 个别行坐标无法解析时逐行过滤
+        keep = []
+        for i, c in enumerate(coords):
+            try:
+                [float(v) for v in c]
+                keep.append(i)
+            except ValueError:
+                bad += 1
+        coords = [coords[i] for i in keep]
+        names = [names[i] for i in keep]
+        difficult = [difficult[i] for i in keep]
+        polygons = np.array(coords, dtype=np.float64).reshape(-1, 4, 2)
+
+    class_ids = np.fromiter((class_index.get(n, -1) for n in names), dtype=np.int32, count=len(names))
+    known = class_ids >= 0
+    unknown = [n for n, k in zip(names, known) if not k]
+    return class_ids[known], polygons[known], np.asarray(difficult, bool)[known], unknown, bad
+
+
+def parse_dota_scores(text: str) -> Tuple[List[str], np.ndarray, np.ndarray, int]:
+    """
+    解析带置信度的 DOTA 预测文本：x1 y1 ... y4 classname score（mmrotate / DOTA devkit 的结果格式）
+
+    Returns:
+        (类别名列表, 像素 polygons (n, 4, 2), scores (n,), 格式错误行数)
+    """
+    names, rows = [], []
+    bad = 0
+    for line in text.splitlines():
+        parts = line.split()
+        if not parts or line.startswith(DOTA_HEADER_PREFIXES):
+            continue
+        if len(parts) < 10:
+            bad += 1
+            continue
+        try:
+            rows.append([float(v) for v in parts[:8]] + [float(parts[9])])
+        except ValueError:
+            bad += 1
+            continue
+        names.append(parts[8])
+    rows = np.array(rows, dtype=np.float64).reshape(-1, 9)
+    return names, rows[:, :8].reshape(-1, 4, 2), rows[:, 8], bad
+
+
+def parse_xanylabeling(
+    data: dict,
+    class_index: Dict[str, int],
+    rotation_only: bool = False
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
+    """
+    解析已加载的 xAnyLabeling JSON 数据
+
+    Args:
+        data: json.load 得到的字典
+        class_index: 类别名 -> ID
+        rotation_only: 只取 rotation 标注（与 json_to_yolo_obb / xanylabeling_to_dota 一致），
+            否则同时接受 rectangle 与四点 polygon
+
+    Returns:
+        (class_ids, 像素 polygons (n, 4, 2) float64, difficult, 未知类别名列表)
+    """
+    class_ids, polygons, difficult, unknown = [], [], [], []
+    for shape in data.get('shapes', []):
+        shape_type = shape.get('shape_type')
+        points = shape.get('points', [])
+        if rotation_only and shape_type != 'rotation':
+            continue
+        if shape_type == 'rectangle' and len(points) == 2:
+            (x1, y1), (x2, y2) = points
+            points = [[x1, y1], [x2, y1], [x2, y2], [x1, y2]]
+        elif shape_type not in ('rotation', 'rectangle', 'polygon') or len(points) != 4:
+            continue
+        label = shape.get('label')
+        if label not in class_index:
+            unknown.append(label)
+            continue
+        class_ids.append(class_index[label])
+        polygons.append(points)
+        difficult.append(bool(shape.get('difficult', False)))
+    return (np.asarray(class_ids, dtype=np.int32),
+            np.asarray(polygons, dtype=np.float64).reshape(-1, 4, 2),
+            np.asarray(difficult, dtype=bool), unknown)
+
+
+def format_yolo_obb(class_ids: np.ndarray, polygons_norm: np.ndarray, precision: int = 6) -> str:
+    """格式化 YOLO-OBB 文本（行间以换行分隔，末尾无换行）"""
+    coords = np.asarray(polygons_norm, dtype=np.float64).reshape(-1, 8)
+    fmt = '%d' + f' %.{precision}f' * 8
+    return '\n'.join(fmt % (c, *row) for c, row in zip(np.asarray(class_ids).tolist(), coords.tolist()))
+
+
+def format_yolo(class_ids: np.ndarray, polygons_norm: np.ndarray, precision: int = 6) -> str:
+    """格式化 YOLO 水平框文本（取多边形的外接框）"""
+    boxes = polygons_to_boxes(polygons_norm)
+    xywh = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2,
+                     boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]], axis=1)
+    fmt = '%d' + f' %.{precision}f' * 4
+    return '\n'.join(fmt % (c, *row) for c, row in zip(np.asarray(class_ids).tolist(), xywh.tolist()))
+
+
+def format_dota(
+    class_names: Sequence[str],
+    polygons: np.ndarray,
+    difficult: np.ndarray,
+    integer: bool = True,
+    imagesource: Optional[str] = None,
+    gsd: Optional[str] = None
+) -> str:
+    """
+    格式化 DOTA 文本
+
+    Args:
+        class_names: 每个标注的类别名
+        polygons: (n, 4, 2) 像素坐标
+        difficult: (n,) difficult 标记
+        integer: 坐标是否截断为整数（与 xanylabeling_to_dota 的 int() 一致）
+        imagesource / gsd: 可选头部信息
+    """
+    lines = []
+    if imagesource:
+        lines.append(f'imagesource:{imagesource}')
+    if gsd:
+        lines.append(f'gsd:{gsd}')
+    coords = np.asarray(polygons, dtype=np.float64).reshape(-1, 8)
+    if integer:
+        coords = np.trunc(coords).astype(np.int64)
+        fmt = ' '.join(['%d'] * 8)
+    else:
+        fmt = ' '.join(['%.1f'] * 8)
+    for name, row, diff in zip(class_names, coords.tolist(), np.asarray(difficult).tolist()):
+        lines.append(f'{fmt % tuple(row)} {name} {int(diff)}')
+    return '\n'.join(lines)
+
+
+# ==================== 目录读写 ====================
+
+def _scan_images(image_dir: Optional[str]) -> Dict[str, str]:
+    """文件名主干 -> 图像路径 的映射（共享目录索引）"""
+    if not image_dir:
+        return {}
+    return get_index(image_dir).paths
+
+
+def _lookup_size(stem: str, images: Dict[str, str]) -> Tuple[Tuple[int, int], str]:
+    """返回 ((width, height), 图像文件名)，找不到图像时为 ((1, 1), '')"""
+    path = images.get(stem)
+    if path is None:
+        return (1, 1), ''
+    size = get_image_size(path)
+    if size is None:
+        return (1, 1), os.path.basename(path)
+    return size, os.path.basename(path)
+
+
+def _read_text(path) -> str:
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _write_text(path, text: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def read_yolo_obb_dir(label_dir: str, image_dir: Optional[str] = None,
+                      classes: Optional[Sequence[str]] = None) -> AnnotationSet:
+    """读取 YOLO-OBB 标注目录；给出 image_dir 时按图像尺寸换算为像素坐标"""
+    ds = AnnotationSet(classes)
+    images = _scan_images(image_dir)
+    for txt_file in sorted(Path(label_dir).glob('*.txt')):
+        class_ids, polygons, _ = parse_yolo_obb(_read_text(txt_file))
+        size, image_file = _lookup_size(txt_file.stem, images)
+        ds.add_image(txt_file.stem, size, class_ids, denormalize_polygons(polygons, size),
+                     image_file=image_file)
+    return ds
+
+
+def read_yolo_dir(label_dir: str, image_dir: Optional[str] = None,
+                  classes: Optional[Sequence[str]] = None) -> AnnotationSet:
+    """读取 YOLO 水平框标注目录"""
+    ds = AnnotationSet(classes)
+    images = _scan_images(image_dir)
+    for txt_file in sorted(Path(label_dir).glob('*.txt')):
+        class_ids, polygons, _ = parse_yolo(_read_text(txt_file))
+        size, image_file = _lookup_size(txt_file.stem, images)
+        ds.add_image(txt_file.stem, size, class_ids, denormalize_polygons(polygons, size),
+                     image_file=image_file)
+    return ds
+
+
+def read_dota_dir(label_dir: str, image_dir: Optional[str] = None,
+                  classes: Optional[Sequence[str]] = None) -> AnnotationSet:
+    """读取 DOTA 标注目录，不在 classes 中的类别被丢弃并汇总提示"""
+    ds = AnnotationSet(classes)
+    class_index = {name: i for i, name in enumerate(ds.classes)}
+    images = _scan_images(image_dir)
+    unknown = set()
+    for txt_file in sorted(Path(label_dir).glob('*.txt')):
+        class_ids, polygons, difficult, names, _ = parse_dota(_read_text(txt_file), class_index)
+        unknown.update(names)
+        size, image_file = _lookup_size(txt_file.stem, images)
+        ds.add_image(txt_file.stem, size, class_ids, polygons, difficult, image_file)
+    if unknown:
+        print(f"警告：以下类别不在类别列表中，已跳过：{sorted(unknown)}")
+    return ds
+
+
+def read_xanylabeling_dir(json_dir: str, classes: Optional[Sequence[str]] = None) -> AnnotationSet:
+    """读取 xAnyLabeling JSON 目录（rotation / rectangle / 四点 polygon）"""
+    ds = AnnotationSet(classes)
+    class_index = {name: i for i, name in enumerate(ds.classes)}
+    unknown = set()
+    for json_file in sorted(Path(json_dir).glob('*.json')):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        class_ids, polygons, difficult, names = parse_xanylabeling(data, class_index)
+        unknown.update(names)
+        size = (data.get('imageWidth') or 1, data.get('imageHeight') or 1)
+        ds.add_image(json_file.stem, size, class_ids, polygons, difficult,
+                     data.get('imagePath') or '')
+    if unknown:
+        print(f"警告：以下类别不在类别列表中，已跳过：{sorted(unknown)}")
+    return ds
+
+
+def read_voc_dir(xml_dir: str, classes: Optional[Sequence[str]] = None, workers: int = 1) -> AnnotationSet:
+    """读取 VOC XML 目录，同时支持 bndbox 与 robndbox（cx cy w h angle，弧度）"""
+    ds = AnnotationSet(classes)
+    class_index = {name: i for i, name in enumerate(ds.classes)}
+    unknown = set()
+    for record in read_voc_records(sorted(Path(xml_dir).glob('*.xml')), workers):
+        width, height = record.size
+        size = (int(width), int(height)) if np.isfinite(width) and np.isfinite(height) else (1, 1)
+        polygons, valid = voc_polygons(record)
+        class_ids = np.array([class_index.get(name, -1) for name in record.names], dtype=np.int64)
+        unknown.update(name for name, c in zip(record.names, class_ids.tolist()) if c < 0)
+        keep = valid & (class_ids >= 0)
+        ds.add_image(Path(record.path).stem, size, class_ids[keep], polygons[keep],
+                     record.difficult[keep], record.filename)
+    if unknown:
+        print(f"警告：以下类别不在类别列表中，已跳过：{sorted(unknown)}")
+    return ds
+
+
+def read_coco(json_path: str, classes: Optional[Sequence[str]] = None) -> AnnotationSet:
+    """
+    读取 COCO JSON；segmentation 恰为 4 个点时作为旋转框，否则使用 bbox
+    classes 为 None 时使用 COCO 中的 categories 顺序
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        coco = json.load(f)
+    if classes is None:
+        classes = [cat['name'] for cat in coco.get('categories', [])]
+    ds = AnnotationSet(classes)
+    class_index = {name: i for i, name in enumerate(ds.classes)}
+    category_map = {cat['id']: class_index.get(cat['name'], -1) for cat in coco.get('categories', [])}
+
+    by_image: Dict[int, list] = {}
+    for ann in coco.get('annotations', []):
+        by_image.setdefault(ann['image_id'], []).append(ann)
+
+    for img in coco.get('images', []):
+        class_ids, polygons = [], []
+        for ann in by_image.get(img['id'], []):
+            class_id = category_map.get(ann['category_id'], -1)
+            if class_id < 0:
+                continue
+            seg = ann.get('segmentation')
+            if isinstance(seg, list) and len(seg) == 1 and len(seg[0]) == 8:
+                polygon = np.array(seg[0], dtype=np.float64).reshape(4, 2)
+            else:
+                x, y, w, h = ann['bbox']
+                polygon = boxes_to_polygons([x, y, x + w, y + h])[0]
+            class_ids.append(class_id)
+            polygons.append(polygon)
+        file_name = img.get('file_name', '')
+        ds.add_image(os.path.splitext(os.path.basename(file_name))[0],
+                     (img.get('width') or 1, img.get('height') or 1),
+                     class_ids, polygons, image_file=file_name)
+    return ds
+
+
+def write_yolo_obb_dir(ds: AnnotationSet, output_dir: str, precision: int = 6):
+    """写出 YOLO-OBB 标注目录，归一化为每张图一次向量化除法"""
+    os.makedirs(output_dir, exist_ok=True)
+    for item in ds:
+        _write_text(os.path.join(output_dir, item.name + '.txt'),
+                    format_yolo_obb(item.class_ids, normalize_polygons(item.polygons, item.size), precision))
+
+
+def write_yolo_dir(ds: AnnotationSet, output_dir: str, precision: int = 6):
+    """写出 YOLO 水平框标注目录"""
+    os.makedirs(output_dir, exist_ok=True)
+    for item in ds:
+        _write_text(os.path.join(output_dir, item.name + '.txt'),
+                    format_yolo(item.class_ids, normalize_polygons(item.polygons, item.size), precision))
+
+
+def write_dota_dir(ds: AnnotationSet, output_dir: str, integer: bool = True,
+                   imagesource: Optional[str] = None, gsd: Optional[str] = None):
+    """写出 DOTA 标注目录"""
+    os.makedirs(output_dir, exist_ok=True)
+    names = np.asarray(ds.classes, dtype=object)
+    for item in ds:
+        _write_text(os.path.join(output_dir, item.name + '.txt'),
+                    format_dota(names[item.class_ids], item.polygons, item.difficult,
+                                integer, imagesource, gsd))
+
+
+def write_xanylabeling_dir(ds: AnnotationSet, output_dir: str, indent: Optional[int] = 2):
+    """写出 xAnyLabeling JSON 目录（shape_type=rotation）"""
+    os.makedirs(output_dir, exist_ok=True)
+    for item in ds:
+        shapes = [{
+            "label": ds.classes[c],
+            "points": poly,
+            "group_id": None,
+            "shape_type": "rotation",
+            "flags": {},
+            **({"difficult": True} if d else {})
+        } for c, poly, d in zip(item.class_ids.tolist(), item.polygons.astype(np.float64).tolist(),
+                                item.difficult.tolist())]
+        data = {
+            "version": "5.0.1",
+            "flags": {},
+            "shapes": shapes,
+            "imagePath": item.image_file or item.name + '.png',
+            "imageData": None,
+            "imageHeight": item.size[1],
+            "imageWidth": item.size[0]
+        }
+        with open(os.path.join(output_dir, item.name + '.json'), 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+
+
+def write_voc_dir(ds: AnnotationSet, output_dir: str):
+    """写出 VOC XML 目录（bndbox 取多边形外接框）"""
+    os.makedirs(output_dir, exist_ok=True)
+    for item in ds:
+        root = ET.Element('annotation')
+        ET.SubElement(root, 'filename').text = item.image_file or item.name + '.png'
+        size = ET.SubElement(root, 'size')
+        ET.SubElement(size, 'width').text = str(item.size[0])
+        ET.SubElement(size, 'height').text = str(item.size[1])
+        ET.SubElement(size, 'depth').text = '3'
+        boxes = np.rint(polygons_to_boxes(item.polygons)).astype(np.int64)
+        for c, box, d in zip(item.class_ids.tolist(), boxes.tolist(), item.difficult.tolist()):
+            obj = ET.SubElement(root, 'object')
+            ET.SubElement(obj, 'name').text = ds.classes[c]
+            ET.SubElement(obj, 'difficult').text = str(int(d))
+            bndbox = ET.SubElement(obj, 'bndbox')
+            for key, value in zip(('xmin', 'ymin', 'xmax', 'ymax'), box):
+                ET.SubElement(bndbox, key).text = str(value)
+        ET.ElementTree(root).write(os.path.join(output_dir, item.name + '.xml'), encoding='utf-8')
+
+
+def write_coco(ds: AnnotationSet, json_path: str):
+    """写出单个 COCO JSON，category_id 从 1 开始"""
+    polygons = ds.polygons.astype(np.float64)
+    boxes = polygons_to_boxes(polygons)
+    areas = polygon_areas(polygons)
+    image_index = ds.image_index
+    sizes = ds.image_sizes
+
+    images = [{
+        "id": i + 1,
+        "file_name": ds.image_files[i] or ds.image_names[i] + '.png',
+        "width": int(sizes[i, 0]),
+        "height": int(sizes[i, 1])
+    } for i in range(len(ds))]
+    annotations = [{
+        "id": k + 1,
+        "image_id": int(image_index[k]) + 1,
+        "category_id": int(c) + 1,
+        "bbox": [box[0], box[1], box[2] - box[0], box[3] - box[1]],
+        "segmentation": [poly],
+        "area": area,
+        "iscrowd": 0
+    } for k, (c, box, poly, area) in enumerate(zip(
+        ds.class_ids.tolist(), boxes.tolist(), polygons.reshape(-1, 8).tolist(), areas.tolist()))]
+    categories = [{"id": i + 1, "name": name} for i, name in enumerate(ds.classes)]
+
+    os.makedirs(os.path.dirname(json_path) or '.', exist_ok=True)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({"images": images, "annotations": annotations, "categories": categories},
+                  f, ensure_ascii=False)
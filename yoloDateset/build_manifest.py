@@ -0,0 +1,153 @@
+"""
+增量转换构建清单
+
+记录 输入文件 -> (内容哈希, mtime, 大小, 输出文件)，以及转换器名称、版本和选项，
+保存在输出目录旁边的 <输出目录名>.<转换器>.manifest.json 中。
+
+再次运行时：
+- 转换器版本或选项变化 -> 先删除旧清单记录的全部输出，再全部重新转换
+- 输入 mtime 和大小都未变且输出仍存在 -> 跳过（不读文件）
+- mtime 变了但内容哈希相同 -> 只更新清单
+- 新增或内容变化的输入 -> 重新转换
+- 输入已删除 -> 删除其输出文件
+
+使用方法：
+    manifest = BuildManifest(output_dir, 'json_to_yolo_obb', CONVERTER_VERSION, {'classes': LABEL2ID})
+    todo = manifest.plan(json_files)
+    run_tasks(func, [(f, output_dir) for f in todo], on_success=manifest.record_task)
+    manifest.save()
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+
+def file_hash(path: str) -> str:
+    """计算文件内容的 SHA-1"""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def manifest_path_for(output_dir: str, converter: str) -> Path:
+    """输出目录旁边的清单文件路径"""
+    out = Path(output_dir).resolve()
+    return out.parent / f'{out.name}.{converter}.manifest.json'
+
+
+class BuildManifest:
+    """增量转换清单"""
+
+    def __init__(self, output_dir: str, converter: str, version: str, options: Optional[dict] = None):
+        self.path = manifest_path_for(output_dir, converter)
+        self.converter = converter
+        self.version = str(version)
+        # 选项经过一次 JSON 往返，保证与从文件读出的值可以直接比较
+        self.options = json.loads(json.dumps(options or {}, ensure_ascii=False, sort_keys=True))
+        self.entries: Dict[str, dict] = {}
+        self._pending: Dict[str, dict] = {}
+        # 版本或选项变化时旧清单的记录，plan 时删除其输出
+        self._stale: Dict[str, dict] = {}
+        self.removed = 0
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            print(f"警告：清单文件损坏，将全部重新转换：{self.path}")
+            return
+        if (data.get('converter') != self.converter or data.get('version') != self.version
+                or data.get('options') != self.options):
+            print("转换器版本或选项已变化，将删除旧输出并全部重新转换")
+            self._stale = data.get('entries', {})
+            return
+        self.entries = data.get('entries', {})
+
+    @staticmethod
+    def _key(path) -> str:
+        return os.path.abspath(path)
+
+    def plan(self, input_files: Sequence, output_for=None) -> List[str]:
+        """
+        找出需要重新转换的输入文件，并删除已消失输入对应的输出（版本或选项变化时删除旧清单的全部输出）
+
+        Args:
+            input_files: 本次的全部输入文件
+            output_for: 可选，输入路径 -> 期望输出路径；给出时输出文件缺失也会触发重转
+
+        Returns:
+            需要转换的输入路径列表
+        """
+        for entry in self._stale.values():
+            output = entry.get('output')
+            if output and os.path.exists(output):
+                os.remove(output)
+                self.removed += 1
+        self._stale = {}
+
+        todo = []
+        current = set()
+        for input_file in input_files:
+            key = self._key(input_file)
+            current.add(key)
+            st = os.stat(input_file)
+            entry = self.entries.get(key)
+            output_ok = entry is not None and os.path.exists(entry['output'])
+            if output_for is not None and entry is not None:
+                output_ok = output_ok and self._key(output_for(input_file)) == entry['output']
+
+            if output_ok and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size:
+                continue
+
+            digest = file_hash(input_file)
+            if output_ok and entry['hash'] == digest:
+                # 只是被 touch 过，内容未变
+                entry['mtime_ns'], entry['size'] = st.st_mtime_ns, st.st_size
+                continue
+
+            self._pending[key] = {'hash': digest, 'mtime_ns': st.st_mtime_ns, 'size': st.st_size}
+            todo.append(str(input_file))
+
+        for key in [k for k in self.entries if k not in current]:
+            output = self.entries.pop(key)['output']
+            if os.path.exists(output):
+                os.remove(output)
+                self.removed += 1
+
+        return todo
+
+    def record(self, input_file, output_file):
+        """记录一次成功的转换"""
+        key = self._key(input_file)
+        entry = self._pending.pop(key, None)
+        if entry is None:
+            st = os.stat(input_file)
+            entry = {'hash': file_hash(input_file), 'mtime_ns': st.st_mtime_ns, 'size': st.st_size}
+        entry['output'] = self._key(output_file)
+        self.entries[key] = entry
+
+    def record_task(self, args: tuple, result):
+        """convert_runner.run_tasks 的 on_success 回调：args[0] 为输入，result 为输出路径"""
+        self.record(args[0], result)
+
+    def save(self):
+        """原子写入清单文件"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({
+                'converter': self.converter,
+                'version': self.version,
+                'options': self.options,
+                'entries': self.entries
+            }, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
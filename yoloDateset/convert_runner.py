@@ -0,0 +1,159 @@
+"""
+标注转换公共运行器
+
+把文件列表按 chunk 分片提交到 ProcessPoolExecutor，汇总 成功/失败/跳过 计数，
+并用单行进度条代替逐文件打印。
+
+转换函数约定：
+- 必须是模块顶层函数（可被 pickle），参数由 tasks 中的元组给出
+- 返回真值表示成功，返回 None/False 表示失败，返回 SKIPPED 表示跳过
+- 抛出异常按失败计，异常信息在结束时统一打印
+- 可选 on_success(args, result) 回调在主进程中对每个成功的任务调用（例如写增量清单）
+
+使用方法：
+    from convert_runner import add_runner_arguments, run_tasks
+    add_runner_arguments(parser)
+    run_tasks(convert_one, [(path, out_dir) for path in files], args.workers, args.chunk_size)
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+CONVERTED = 'converted'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+# 结束时最多打印的错误条数
+MAX_ERRORS_SHOWN = 20
+
+
+def resolve_workers(workers: int) -> int:
+    """workers <= 0 时使用全部 CPU 核心"""
+    if workers is None or workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def add_runner_arguments(parser, default_workers: int = 0, default_chunk_size: int = 64):
+    """给 argparse 解析器添加 --workers / --chunk-size 参数"""
+    parser.add_argument('--workers', '-j', type=int, default=default_workers,
+                        help='并行进程数，0 表示使用全部 CPU 核心，1 表示单进程')
+    parser.add_argument('--chunk-size', type=int, default=default_chunk_size,
+                        help='每个进程任务一次处理的文件数')
+
+
+def _run_chunk(func: Callable, chunk: Sequence[tuple]) -> Tuple[Dict[str, int], List[str], list]:
+    """在工作进程中顺序处理一个分片，返回 (计数, 错误信息, [(分片内下标, 成功结果)])"""
+    counts = {CONVERTED: 0, FAILED: 0, SKIPPED: 0}
+    errors = []
+    succeeded = []
+    for i, args in enumerate(chunk):
+        try:
+            result = func(*args)
+        except Exception as e:
+            result = None
+            errors.append(f"{args[0] if args else ''}: {e}")
+        if isinstance(result, str) and result == SKIPPED:
+            counts[SKIPPED] += 1
+        elif result:
+            counts[CONVERTED] += 1
+            succeeded.append((i, result))
+        else:
+            counts[FAILED] += 1
+    return counts, errors, succeeded
+
+
+class _Progress:
+    """单行进度显示"""
+
+    def __init__(self, total: int, desc: str):
+        self.total = total
+        self.desc = desc
+        self.done = 0
+        self.start = time.perf_counter()
+        self._last_draw = 0.0
+
+    def update(self, counts: Dict[str, int], n: int, force: bool = False):
+        self.done += n
+        now = time.perf_counter()
+        # 限制刷新频率，避免大量小分片时终端输出成为瓶颈
+        if not force and now - self._last_draw < 0.1:
+            return
+        self._last_draw = now
+        elapsed = max(now - self.start, 1e-9)
+        percent = self.done / self.total * 100 if self.total else 100.0
+        sys.stdout.write(
+            f"\r{self.desc}: {self.done}/{self.total} ({percent:.1f}%) "
+            f"成功 {counts[CONVERTED]} 失败 {counts[FAILED]} 跳过 {counts[SKIPPED]} "
+            f"{self.done / elapsed:.1f} 文件/秒"
+        )
+        sys.stdout.flush()
+
+
+def run_tasks(
+    func: Callable,
+    tasks: Sequence[tuple],
+    workers: int = 0,
+    chunk_size: int = 64,
+    desc: str = '转换',
+    on_success: Optional[Callable[[tuple, object], None]] = None
+) -> Dict[str, int]:
+    """
+    并行执行转换任务
+
+    Args:
+        func: 模块顶层的转换函数
+        tasks: 参数元组列表，每个元组对应一次 func 调用
+        workers: 进程数，0 表示全部核心，1 表示在当前进程中顺序执行
+        chunk_size: 每个分片包含的任务数
+        desc: 进度条前缀
+        on_success: 可选回调 on_success(args, result)，在主进程中对每个成功任务调用
+
+    Returns:
+        {'converted': n, 'failed': n, 'skipped': n}
+    """
+    tasks = list(tasks)
+    workers = min(resolve_workers(workers), max(len(tasks), 1))
+    chunk_size = max(chunk_size, 1)
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+
+    totals = {CONVERTED: 0, FAILED: 0, SKIPPED: 0}
+    errors = []
+    progress = _Progress(len(tasks), desc)
+
+    def merge(result, chunk):
+        counts, chunk_errors, succeeded = result
+        for key in totals:
+            totals[key] += counts[key]
+        errors.extend(chunk_errors)
+        if on_success is not None:
+            for i, value in succeeded:
+                on_success(chunk[i], value)
+        progress.update(totals, len(chunk))
+
+    if workers <= 1:
+        for chunk in chunks:
+            merge(_run_chunk(func, chunk), chunk)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_run_chunk, func, chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                merge(future.result(), futures[future])
+
+    progress.update(totals, 0, force=True)
+    elapsed = time.perf_counter() - progress.start
+    print(f"\n{desc}完成：成功 {totals[CONVERTED]}，失败 {totals[FAILED]}，"
+          f"跳过 {totals[SKIPPED]}，总计 {len(tasks)}，耗时 {elapsed:.1f}s（{workers} 进程）")
+
+    if errors:
+        print(f"出错文件 {len(errors)} 个：")
+        for message in errors[:MAX_ERRORS_SHOWN]:
+            print(f"  {message}")
+        if len(errors) > MAX_ERRORS_SHOWN:
+            print(f"  ... 其余 {len(errors) - MAX_ERRORS_SHOWN} 个省略")
+
+    return totals
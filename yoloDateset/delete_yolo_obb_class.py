@@ -14,12 +14,12 @@ class_id x1 y1 x2 y2 x3 y3 x4 y4
 """
 
 import os
-import glob
 
 from configs import CLASSES
+from relabel import IdRemap, relabel_directory
 
 
-def delete_classes(input_dir, output_dir, classes, delete_class_names):
+def delete_classes(input_dir, output_dir, classes, delete_class_names, workers=0):
     """
     从 YOLO-OBB 标注文件中删除指定类别并重映射剩余类别 ID
 
@@ -28,6 +28,7 @@ def delete_classes(input_dir, output_dir, classes, delete_class_names):
         output_dir: 输出标注文件夹路径
         classes: 完整的类别名称列表（索引即为 class_id）
         delete_class_names: 要删除的类别名称列表
+        workers: 并行进程数，0 表示全部核心
     """
     # 找出要删除的 class_id 集合
     delete_class_ids = set()
@@ -58,57 +59,15 @@ def delete_classes(input_dir, output_dir, classes, delete_class_names):
     print(f"类别 ID 重映射：{remap}")
     print("-" * 50)
 
-    os.makedirs(output_dir, exist_ok=True)
-
-    total_files = 0
-    total_deleted = 0
-    total_kept = 0
-
-    txt_files = glob.glob(os.path.join(input_dir, "*.txt"))
-    for txt_file in txt_files:
-        filename = os.path.basename(txt_file)
-        output_path = os.path.join(output_dir, filename)
-
-        kept_lines = []
-        deleted_count = 0
-
-        with open(txt_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-
-                parts = line.split()
-                if len(parts) < 9:
-                    # 行格式不对，保留原样
-                    kept_lines.append(line)
-                    continue
-
-                class_id = int(parts[0])
-                if class_id in delete_class_ids:
-                    deleted_count += 1
-                else:
-                    # 重映射 class_id
-                    new_class_id = remap.get(class_id, class_id)
-                    parts[0] = str(new_class_id)
-                    kept_lines.append(' '.join(parts))
-
-        with open(output_path, 'w', encoding='utf-8') as f:
-            for line in kept_lines:
-                f.write(line + '\n')
-
-        total_files += 1
-        total_deleted += deleted_count
-        total_kept += len(kept_lines)
-
-        if deleted_count > 0:
-            print(f"  {filename}: 删除 {deleted_count} 行，保留 {len(kept_lines)} 行")
+    # 类别列一次查找表重映射，多文件进程池并行
+    id_remap = IdRemap(delete_class_ids, compact=True, min_cols=9, keep_malformed=True, num_classes=len(classes))
+    stats = relabel_directory(input_dir, output_dir, id_remap, workers)
 
     print("-" * 50)
     print(f"处理完成！")
-    print(f"  处理文件数：{total_files}")
-    print(f"  删除标注总数：{total_deleted}")
-    print(f"  保留标注总数：{total_kept}")
+    print(f"  处理文件数：{stats['files']}")
+    print(f"  删除标注总数：{stats['deleted']}")
+    print(f"  保留标注总数：{stats['kept']}")
     print(f"  输出路径：{output_dir}")
 
     # 输出新的类别列表，方便复制到配置文件
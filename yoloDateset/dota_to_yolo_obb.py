@@ -10,15 +10,19 @@ YOLO-OBB每行：  class_id nx1 ny1 nx2 ny2 nx3 ny3 nx4 ny4
 使用方法：
     python dota_to_yolo_obb.py --input path/to/dota/labels --images path/to/images --output path/to/yolo/labels
     python dota_to_yolo_obb.py --input path/to/label.txt --images path/to/image.png --output path/to/output_dir
+    python dota_to_yolo_obb.py --input path/to/dota/labels --images path/to/images --output path/to/yolo/labels --workers 8
 """
 
-import cv2
-import numpy as np
-import os
 import argparse
 from pathlib import Path
 from typing import Optional
 
+from annotations import format_yolo_obb, parse_dota
+from convert_runner import SKIPPED, add_runner_arguments, run_tasks
+from file_index import get_index, pair_files, report_orphans
+from image_meta import get_image_size
+from obb_geometry import normalize_polygons
+
 
 # 类别映射
 LABEL2ID = {
@@ -33,26 +37,6 @@ LABEL2ID = {
     "endMark":8
 }
 
-# 支持的图像后缀
-IMAGE_EXTS = {'.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff'}
-
-
-def get_image_size(image_path: str) -> Optional[tuple]:
-    """
-    读取图像尺寸，兼容中文路径
-
-    Returns:
-        (width, height) 或 None
-    """
-    img = cv2.imread(image_path)
-    if img is None:
-        # 尝试解决中文路径问题
-        img = cv2.imdecode(np.fromfile(image_path, dtype=np.uint8), cv2.IMREAD_COLOR)
-    if img is None:
-        return None
-    h, w = img.shape[:2]
-    return w, h
-
 
 def find_image(txt_path: str, image_dir: str) -> Optional[str]:
     """
@@ -65,18 +49,14 @@ def find_image(txt_path: str, image_dir: str) -> Optional[str]:
     Returns:
         图像文件路径，找不到返回None
     """
-    stem = Path(txt_path).stem
-    for ext in IMAGE_EXTS:
-        image_path = os.path.join(image_dir, stem + ext)
-        if os.path.exists(image_path):
-            return image_path
-    return None
+    return get_index(image_dir).get(Path(txt_path).stem)
 
 
 def convert_dota_to_yolo(
     txt_file: str,
     image_path: str,
-    output_dir: Optional[str] = None
+    output_dir: Optional[str] = None,
+    verbose: bool = True
 ) -> Optional[str]:
     """
     转换单个DOTA标注文件到YOLO-OBB格式
@@ -85,61 +65,32 @@ def convert_dota_to_yolo(
         txt_file: DOTA格式标注文件路径
         image_path: 对应图像文件路径
         output_dir: 输出目录，默认与标注文件同目录
+        verbose: 是否打印逐文件信息（批量模式下关闭，由进度条代替）
 
     Returns:
         输出的txt文件路径，失败返回None
     """
-    # 获取图像尺寸
+    # 获取图像尺寸（只读文件头，带持久缓存）
     size = get_image_size(image_path)
     if size is None:
         print(f"错误：无法读取图像 {image_path}")
         return None
     img_w, img_h = size
 
-    # 读取DOTA标注
+    # 读取DOTA标注（整个文件一次解析为数组）
     with open(txt_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    yolo_lines = []
-    skipped = 0
-
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-
-        # 跳过DOTA头部信息
-        if line.startswith('imagesource:') or line.startswith('gsd:'):
-            continue
-
-        parts = line.split()
-        if len(parts) < 9:
-            skipped += 1
-            continue
+        text = f.read()
 
-        # DOTA格式：x1 y1 x2 y2 x3 y3 x4 y4 category_name [difficult]
-        coords = [float(x) for x in parts[:8]]
-        category = parts[8]
-
-        # 类别映射
-        if category not in LABEL2ID:
+    class_ids, polygons, _, unknown, skipped = parse_dota(text, LABEL2ID)
+    skipped += len(unknown)
+    if verbose:
+        for category in unknown:
             print(f"警告：未知类别 '{category}'，跳过")
-            skipped += 1
-            continue
-
-        class_id = LABEL2ID[category]
 
-        # 归一化坐标
-        normalized = []
-        for i in range(0, 8, 2):
-            nx = coords[i] / img_w
-            ny = coords[i + 1] / img_h
-            normalized.extend([nx, ny])
+    # 归一化坐标：整张图一次向量化除法
+    yolo_text = format_yolo_obb(class_ids, normalize_polygons(polygons, (img_w, img_h)))
 
-        coords_str = ' '.join([f'{v:.6f}' for v in normalized])
-        yolo_lines.append(f'{class_id} {coords_str}')
-
-    if skipped > 0:
+    if skipped > 0 and verbose:
         print(f"警告：{txt_file} 跳过了 {skipped} 行")
 
     # 确定输出路径
@@ -153,24 +104,42 @@ def convert_dota_to_yolo(
 
     # 写入YOLO格式
     with open(out_file, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(yolo_lines))
+        f.write(yolo_text)
 
-    print(f"已转换：{txt_file} -> {out_file} ({len(yolo_lines)} 个标注)")
+    if verbose:
+        print(f"已转换：{txt_file} -> {out_file} ({len(class_ids)} 个标注)")
     return str(out_file)
 
 
+def convert_label_file(txt_file: str, image_dir: str, output_dir: Optional[str] = None):
+    """
+    批量模式下的单文件任务：查找对应图像并转换，找不到图像时跳过
+
+    Returns:
+        输出文件路径；找不到图像返回 SKIPPED；失败返回 None
+    """
+    image_path = find_image(txt_file, image_dir)
+    if image_path is None:
+        return SKIPPED
+    return convert_dota_to_yolo(txt_file, image_path, output_dir, verbose=False)
+
+
 def convert_directory(
     label_dir: str,
     image_dir: str,
-    output_dir: Optional[str] = None
+    output_dir: Optional[str] = None,
+    workers: int = 0,
+    chunk_size: int = 64
 ):
     """
-    批量转换目录下所有DOTA标注文件
+    批量转换目录下所有DOTA标注文件（多进程）
 
     Args:
         label_dir: DOTA标注文件目录
         image_dir: 对应图像目录
         output_dir: 输出目录
+        workers: 并行进程数，0 表示全部核心
+        chunk_size: 每个进程任务一次处理的文件数
     """
     label_dir = Path(label_dir)
     txt_files = sorted(label_dir.glob('*.txt'))
@@ -179,25 +148,11 @@ def convert_directory(
     print(f"图像目录：{image_dir}")
     print(f"找到 {len(txt_files)} 个标注文件")
     print(f"使用类别映射：{LABEL2ID}")
+    _, orphan_labels, orphan_images = pair_files(str(label_dir), image_dir)
+    report_orphans(orphan_labels, orphan_images)
 
-    converted = 0
-    failed = 0
-
-    for txt_file in txt_files:
-        # 查找对应图像
-        image_path = find_image(str(txt_file), image_dir)
-        if image_path is None:
-            print(f"跳过：找不到 {txt_file.stem} 对应的图像文件")
-            failed += 1
-            continue
-
-        result = convert_dota_to_yolo(str(txt_file), image_path, output_dir)
-        if result:
-            converted += 1
-        else:
-            failed += 1
-
-    print(f"\n转换完成：成功 {converted}，失败 {failed}，总计 {len(txt_files)}")
+    tasks = [(str(txt_file), image_dir, output_dir) for txt_file in txt_files]
+    return run_tasks(convert_label_file, tasks, workers, chunk_size)
 
 
 if __name__ == '__main__':
@@ -211,6 +166,7 @@ if __name__ == '__main__':
     parser.add_argument('--output', '-o', type=str,
                         default=r"E:\work\drawing_analysis\dataset\obb_all_graphes\ab_af_c_lc_tc_d_an_cn_em_anno\yolo\labels\val",
                         help='输出目录，默认与输入标注同目录')
+    add_runner_arguments(parser)
 
     args = parser.parse_args()
 
@@ -230,6 +186,6 @@ if __name__ == '__main__':
         convert_dota_to_yolo(str(input_path), image_path, args.output)
 
     elif input_path.is_dir():
-        convert_directory(str(input_path), args.images, args.output)
+        convert_directory(str(input_path), args.images, args.output, args.workers, args.chunk_size)
     else:
         print(f"错误：{args.input} 不存在")
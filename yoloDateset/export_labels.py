@@ -0,0 +1,206 @@
+"""
+xAnyLabeling JSON 单遍多目标导出
+
+每个 JSON 只读取、解析一次，在同一遍中写出：
+- DOTA txt       <output>/dota/
+- YOLO-OBB txt   <output>/yolo_obb/
+- 可选的按类别筛选的变体 <output>/<变体名>/dota、<output>/<变体名>/yolo_obb
+  （变体内类别 ID 按保留类别在 configs.CLASSES 中的顺序重新连续编号）
+
+类别 ID 统一取自 configs.CLASSES，不在其中的类别会被跳过并在结束时汇总。
+图像尺寸取自 JSON 中的 imageWidth / imageHeight，不需要打开图像。
+代替依次运行 xanylabeling_to_dota.py、dota_to_yolo_obb.py 的流程。
+
+使用方法：
+    python yoloDateset/export_labels.py --input path/to/x_json --output path/to/export
+    python yoloDateset/export_labels.py --input path/to/x_json --output path/to/export \
+        --targets dota yolo_obb --variant ab_af_c=angelSteelBack,angelSteelFront,clamp --workers 8
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from annotations import format_dota, format_yolo_obb, parse_xanylabeling
+from configs import CLASSES
+from convert_runner import add_runner_arguments, run_tasks
+from obb_geometry import normalize_polygons
+
+
+TARGETS = ('dota', 'yolo_obb')
+
+CLASS_INDEX = {name: i for i, name in enumerate(CLASSES)}
+CLASS_NAMES = np.asarray(CLASSES, dtype=object)
+
+
+def parse_variant(spec: str) -> Tuple[str, List[str]]:
+    """解析 --variant 参数：名称=类别1,类别2"""
+    if '=' not in spec:
+        raise argparse.ArgumentTypeError(f"变体格式应为 名称=类别1,类别2：{spec}")
+    name, classes = spec.split('=', 1)
+    keep = [c for c in classes.split(',') if c]
+    unknown = [c for c in keep if c not in CLASS_INDEX]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"变体 {name} 中的类别不在 configs.CLASSES 中：{unknown}")
+    return name, keep
+
+
+def build_remap(keep: Sequence[str]) -> np.ndarray:
+    """
+    构建 configs.CLASSES ID -> 变体 ID 的查找表，删除的类别为 -1
+
+    变体内保持 configs.CLASSES 中的相对顺序
+    """
+    keep = set(keep)
+    remap = np.full(len(CLASSES), -1, dtype=np.int32)
+    new_id = 0
+    for old_id, name in enumerate(CLASSES):
+        if name in keep:
+            remap[old_id] = new_id
+            new_id += 1
+    return remap
+
+
+def _write(path: str, text: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def _write_targets(
+    out_root: str,
+    stem: str,
+    targets: Sequence[str],
+    class_ids: np.ndarray,
+    polygons: np.ndarray,
+    difficult: np.ndarray,
+    yolo_ids: np.ndarray,
+    size: Tuple[int, int],
+    imagesource: Optional[str],
+    gsd: Optional[str]
+):
+    """把同一张图的标注写入各目标格式"""
+    if 'dota' in targets:
+        _write(os.path.join(out_root, 'dota', stem + '.txt'),
+               format_dota(CLASS_NAMES[class_ids], polygons, difficult, True, imagesource, gsd))
+    if 'yolo_obb' in targets:
+        _write(os.path.join(out_root, 'yolo_obb', stem + '.txt'),
+               format_yolo_obb(yolo_ids, normalize_polygons(polygons, size)))
+
+
+def export_json_file(
+    json_file: str,
+    output_dir: str,
+    targets: Sequence[str],
+    variants: Dict[str, np.ndarray],
+    imagesource: Optional[str] = None,
+    gsd: Optional[str] = None
+):
+    """
+    导出单个 JSON 到所有目标格式（进程池任务）
+
+    Returns:
+        (文件名主干, 未知类别名元组)；图像尺寸无效时返回 None
+    """
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    size = (data.get('imageWidth', 0), data.get('imageHeight', 0))
+    if size[0] == 0 or size[1] == 0:
+        return None
+
+    class_ids, polygons, difficult, unknown = parse_xanylabeling(data, CLASS_INDEX, rotation_only=True)
+    stem = Path(json_file).stem
+
+    _write_targets(output_dir, stem, targets, class_ids, polygons, difficult,
+                   class_ids, size, imagesource, gsd)
+
+    for name, remap in variants.items():
+        new_ids = remap[class_ids]
+        keep = new_ids >= 0
+        _write_targets(os.path.join(output_dir, name), stem, targets, class_ids[keep],
+                       polygons[keep], difficult[keep], new_ids[keep], size, imagesource, gsd)
+
+    return stem, tuple(unknown)
+
+
+def export_directory(
+    json_dir: str,
+    output_dir: str,
+    targets: Sequence[str] = TARGETS,
+    variants: Optional[Dict[str, List[str]]] = None,
+    imagesource: Optional[str] = None,
+    gsd: Optional[str] = None,
+    workers: int = 0,
+    chunk_size: int = 64
+):
+    """
+    单遍导出目录下所有 JSON
+
+    Args:
+        json_dir: xAnyLabeling JSON 目录
+        output_dir: 导出根目录
+        targets: 目标格式，dota / yolo_obb
+        variants: {变体名: 保留的类别列表}
+        imagesource / gsd: DOTA 头部信息（可选）
+        workers: 并行进程数，0 表示全部核心
+        chunk_size: 每个进程任务一次处理的文件数
+    """
+    variants = variants or {}
+    json_files = sorted(Path(json_dir).glob('*.json'))
+    print(f"找到 {len(json_files)} 个 JSON 文件")
+    print(f"目标格式：{list(targets)}，类别列表：{CLASSES}")
+
+    roots = [output_dir] + [os.path.join(output_dir, name) for name in variants]
+    for root in roots:
+        for target in targets:
+            os.makedirs(os.path.join(root, target), exist_ok=True)
+
+    remaps = {name: build_remap(keep) for name, keep in variants.items()}
+    unknown = set()
+
+    def collect(args, result):
+        unknown.update(result[1])
+
+    tasks = [(str(f), output_dir, tuple(targets), remaps, imagesource, gsd) for f in json_files]
+    totals = run_tasks(export_json_file, tasks, workers, chunk_size, desc='导出', on_success=collect)
+
+    if unknown:
+        print(f"警告：以下类别不在 configs.CLASSES 中，已跳过：{sorted(unknown)}")
+    for name, keep in variants.items():
+        kept = [c for c in CLASSES if c in set(keep)]
+        print(f"\n变体 {name} 的类别列表（可用于 dataset.yaml）：")
+        print("names:")
+        for i, cls in enumerate(kept):
+            print(f"  {i}: {cls}")
+    return totals
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='xAnyLabeling JSON 单遍导出 DOTA / YOLO-OBB')
+    parser.add_argument('--input', type=str,
+                        default=r"E:\work\drawing_analysis\dataset\obb_all_graphes\annotation\ab_af_c_lc_tc_d_an_cn_em_labels\x_json",
+                        help='xAnyLabeling JSON 目录')
+    parser.add_argument('--output', '-o', type=str,
+                        default=r"E:\work\drawing_analysis\dataset\obb_all_graphes\annotation\ab_af_c_lc_tc_d_an_cn_em_labels\export",
+                        help='导出根目录')
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, default=list(TARGETS),
+                        help='目标格式（默认全部）')
+    parser.add_argument('--variant', type=parse_variant, action='append', default=[],
+                        help='按类别筛选的变体，格式：名称=类别1,类别2（可重复指定）')
+    parser.add_argument('--imagesource', type=str, default="drawings",
+                        help='DOTA 图像来源（可选）')
+    parser.add_argument('--gsd', type=str, default=0.15,
+                        help='DOTA 地面采样距离（可选）')
+    add_runner_arguments(parser)
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input):
+        print(f"错误：{args.input} 不存在")
+    else:
+        export_directory(args.input, args.output, args.targets, dict(args.variant),
+                         args.imagesource, args.gsd, args.workers, args.chunk_size)
@@ -0,0 +1,169 @@
+"""
+目录索引：一次 os.scandir 建立 文件名主干 -> 路径 的映射
+
+代替对每个标注文件按扩展名逐个 os.path.exists 探测（网络盘上每次都是一次往返），
+同时顺带给出 标注-图像 配对中的孤立标注和孤立图像。
+
+- 进程内按目录缓存，多进程转换时每个进程只扫描一次
+- 可选持久化：设置环境变量 TOOLSCRIPT_DIR_INDEX 为缓存目录后，索引按目录的 mtime 保存，
+  目录未变化时只需一次 stat（默认关闭）。mtime 距当前不到 MTIME_SETTLE_SECONDS 秒的目录不保存，
+  避免同一 mtime 精度内的后续修改被旧索引掩盖
+
+使用方法：
+    from file_index import find_image, get_index, pair_files
+    image_path = find_image('P0001', image_dir)
+    pairs, orphan_labels, orphan_images = pair_files(label_dir, image_dir)
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# 同一主干有多个图像时按此顺序优先
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+
+# 目录 mtime 距当前不到此秒数时不保存索引（文件系统的 mtime 精度可能只有 1~2 秒）
+MTIME_SETTLE_SECONDS = 3
+
+# 孤立文件报告中最多列出的文件名数
+MAX_ORPHANS_SHOWN = 10
+
+
+def _persist_dir() -> Optional[Path]:
+    env_path = os.environ.get('TOOLSCRIPT_DIR_INDEX')
+    return Path(env_path).expanduser() if env_path else None
+
+
+def _scan(directory: str) -> List[str]:
+    """列出目录下的所有文件名（不含子目录）"""
+    with os.scandir(directory) as it:
+        return [entry.name for entry in it if entry.is_file()]
+
+
+def _load_names(directory: str, mtime_ns: int) -> Optional[List[str]]:
+    persist = _persist_dir()
+    if persist is None:
+        return None
+    path = persist / (hashlib.sha1(directory.encode('utf-8')).hexdigest() + '.json')
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('directory') != directory or data.get('mtime_ns') != mtime_ns:
+        return None
+    return data.get('names')
+
+
+def _save_names(directory: str, mtime_ns: int, names: List[str]):
+    persist = _persist_dir()
+    if persist is None or time.time_ns() - mtime_ns < MTIME_SETTLE_SECONDS * 1_000_000_000:
+        return
+    path = persist / (hashlib.sha1(directory.encode('utf-8')).hexdigest() + '.json')
+    try:
+        persist.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'directory': directory, 'mtime_ns': mtime_ns, 'names': names}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except OSError:
+        # 持久化只是加速，失败时忽略
+        pass
+
+
+class DirectoryIndex:
+    """单个目录的 文件名主干 -> 路径 索引"""
+
+    def __init__(self, directory: str, exts: Sequence[str] = IMAGE_EXTS):
+        """
+        Args:
+            directory: 目录路径
+            exts: 参与索引的扩展名（不区分大小写），同一主干有多个文件时按此顺序优先
+        """
+        self.directory = os.path.abspath(directory)
+        self.exts = tuple(e.lower() for e in exts)
+        self.paths: Dict[str, str] = {}
+        if not os.path.isdir(self.directory):
+            return
+
+        mtime_ns = os.stat(self.directory).st_mtime_ns
+        names = _load_names(self.directory, mtime_ns)
+        if names is None:
+            names = _scan(self.directory)
+            _save_names(self.directory, mtime_ns, names)
+
+        rank = {ext: i for i, ext in enumerate(self.exts)}
+        best: Dict[str, int] = {}
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            r = rank.get(ext.lower())
+            if r is None:
+                continue
+            if stem not in best or r < best[stem]:
+                best[stem] = r
+                self.paths[stem] = os.path.join(self.directory, name)
+
+    def get(self, stem: str) -> Optional[str]:
+        """按文件名主干查找，找不到返回 None"""
+        return self.paths.get(stem)
+
+    def __contains__(self, stem: str) -> bool:
+        return stem in self.paths
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def stems(self):
+        return self.paths.keys()
+
+
+_indexes: Dict[Tuple[str, Tuple[str, ...]], DirectoryIndex] = {}
+
+
+def get_index(directory: str, exts: Sequence[str] = IMAGE_EXTS, refresh: bool = False) -> DirectoryIndex:
+    """返回进程内缓存的目录索引，refresh=True 时重新扫描"""
+    key = (os.path.abspath(directory), tuple(e.lower() for e in exts))
+    index = _indexes.get(key)
+    if index is None or refresh:
+        index = DirectoryIndex(directory, exts)
+        _indexes[key] = index
+    return index
+
+
+def find_image(stem: str, image_dir: str, exts: Sequence[str] = IMAGE_EXTS) -> Optional[str]:
+    """在图像目录中查找与标注同名的图像文件，找不到返回 None"""
+    return get_index(image_dir, exts).get(stem)
+
+
+def pair_files(
+    label_dir: str,
+    image_dir: str,
+    label_exts: Sequence[str] = ('.txt',),
+    image_exts: Sequence[str] = IMAGE_EXTS
+) -> Tuple[Dict[str, Tuple[str, str]], List[str], List[str]]:
+    """
+    按文件名主干配对标注和图像
+
+    Returns:
+        (pairs, orphan_labels, orphan_images)：
+        pairs 为 {主干: (标注路径, 图像路径)}，孤立文件为排好序的路径列表
+    """
+    labels = get_index(label_dir, label_exts)
+    images = get_index(image_dir, image_exts)
+    pairs = {stem: (path, images.paths[stem]) for stem, path in labels.paths.items() if stem in images}
+    orphan_labels = sorted(path for stem, path in labels.paths.items() if stem not in images)
+    orphan_images = sorted(path for stem, path in images.paths.items() if stem not in labels)
+    return pairs, orphan_labels, orphan_images
+
+
+def report_orphans(orphan_labels: Sequence[str], orphan_images: Sequence[str]):
+    """打印孤立标注 / 孤立图像的数量和部分文件名"""
+    for title, paths in (('没有对应图像的标注', orphan_labels), ('没有对应标注的图像', orphan_images)):
+        if not paths:
+            continue
+        names = [os.path.basename(p) for p in paths[:MAX_ORPHANS_SHOWN]]
+        more = f" 等 {len(paths)} 个" if len(paths) > MAX_ORPHANS_SHOWN else ""
+        print(f"{title}：{len(paths)} 个 -> {', '.join(names)}{more}")
@@ -0,0 +1,244 @@
+"""
+数据集文件放置：复制 / 硬链接 / 符号链接 / reflink，多线程复制引擎
+
+划分数据集时图片不需要真的复制一份：
+- hardlink  硬链接，不占额外空间；跨文件系统时自动回退为复制
+- symlink   符号链接，可跨文件系统；Windows 无权限创建时自动回退为复制
+- reflink   写时复制克隆（Linux btrfs / xfs 等的 FICLONE），不支持时自动回退为复制
+- copy      完整复制（原有行为）
+
+标签文件很小且经常被就地修改，调用方应始终用 copy 放置标签，
+避免硬链接修改到源文件。
+
+真正需要复制时，CopyEngine 用线程池同时进行多个复制（网络共享、NVMe 上不再受单文件延迟限制），
+复制本身优先走 copy_file_range / sendfile，并跳过大小和修改时间一致的目标。
+
+使用方法：
+    from file_links import LINK_MODES, CopyEngine
+    with CopyEngine(threads=8, link_mode='hardlink') as engine:
+        engine.submit(src, dst)
+"""
+
+import errno
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+LINK_MODES = ('copy', 'hardlink', 'symlink', 'reflink')
+
+# Linux FICLONE ioctl 号（_IOW(0x94, 9, int)）
+FICLONE = 0x40049409
+
+# 内核复制每次调用的最大字节数
+COPY_BLOCK = 64 << 20
+
+# 判断目标未变化时允许的修改时间误差（秒）
+MTIME_TOLERANCE = 2.0
+
+# 结束时最多打印的错误条数
+MAX_ERRORS_SHOWN = 20
+
+
+def _remove_existing(dst: str):
+    """目标已存在时先删除，链接不会自动覆盖"""
+    if os.path.lexists(dst):
+        os.remove(dst)
+
+
+def reflink(src: str, dst: str):
+    """
+    写时复制克隆文件
+
+    Raises:
+        OSError: 平台或文件系统不支持，或源和目标不在同一文件系统
+    """
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.EOPNOTSUPP, 'reflink 仅支持 Linux')
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.remove(dst)
+            raise
+    shutil.copystat(src, dst)
+
+
+def place_file(src: str, dst: str, mode: str = 'copy') -> str:
+    """
+    按指定方式把 src 放到 dst，失败时回退为复制
+
+    Args:
+        src: 源文件
+        dst: 目标路径（已存在时覆盖）
+        mode: copy / hardlink / symlink / reflink
+
+    Returns:
+        实际使用的方式
+    """
+    if mode not in LINK_MODES:
+        raise ValueError(f"不支持的放置方式：{mode}，可选 {LINK_MODES}")
+    src, dst = os.fspath(src), os.fspath(dst)
+    _remove_existing(dst)
+    if mode != 'copy':
+        try:
+            if mode == 'hardlink':
+                os.link(src, dst)
+            elif mode == 'symlink':
+                os.symlink(os.path.abspath(src), dst)
+            else:
+                reflink(src, dst)
+            return mode
+        except (OSError, NotImplementedError):
+            # 跨文件系统（EXDEV）、文件系统不支持、Windows 无符号链接权限等
+            _remove_existing(dst)
+    copy_file(src, dst)
+    return 'copy'
+
+
+def _copy_range(fsrc, fdst, size: int):
+    """用 copy_file_range / sendfile 在内核中复制，不支持时抛出 OSError"""
+    copy_range = getattr(os, 'copy_file_range', None)
+    if copy_range is None and getattr(os, 'sendfile', None) is None:
+        raise OSError(errno.ENOTSUP, '无内核复制接口')
+    infd, outfd = fsrc.fileno(), fdst.fileno()
+    offset = 0
+    while offset < size:
+        count = min(size - offset, COPY_BLOCK)
+        if copy_range is not None:
+            n = copy_range(infd, outfd, count)
+        else:
+            n = os.sendfile(outfd, infd, offset, count)
+        if n == 0:
+            break
+        offset += n
+    if offset != size:
+        raise OSError(errno.EIO, '复制长度不一致')
+
+
+def copy_file(src: str, dst: str):
+    """
+    复制文件内容和时间戳
+
+    优先使用 os.copy_file_range（同一文件系统上可由服务端 / 文件系统直接完成）
+    或 os.sendfile，不可用时回退为 shutil.copyfile
+    """
+    size = os.stat(src).st_size
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            _copy_range(fsrc, fdst, size)
+    except OSError:
+        shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
+
+
+def is_up_to_date(src: str, dst: str) -> bool:
+    """目标已存在且大小、修改时间与源一致（时间允许 FAT / SMB 的 2 秒精度误差）"""
+    try:
+        s, d = os.stat(src), os.stat(dst)
+    except OSError:
+        return False
+    return s.st_size == d.st_size and abs(s.st_mtime - d.st_mtime) < MTIME_TOLERANCE
+
+
+class CopyEngine:
+    """
+    多线程文件放置引擎
+
+    - 同时进行的复制数由 threads 控制，待处理队列有上限，提交方不会无限堆积任务
+    - 目标已存在且大小和修改时间相同的文件直接跳过
+    - 结束时报告各放置方式的次数、跳过数、失败数和吞吐（MB/s）
+
+    使用方法：
+        with CopyEngine(threads=8, link_mode='hardlink') as engine:
+            engine.submit(src, dst)
+            engine.submit(label, label_dst, mode='copy')
+    """
+
+    def __init__(self, threads: int = 8, link_mode: str = 'copy', skip_existing: bool = True):
+        """
+        Args:
+            threads: 同时进行的复制数
+            link_mode: 默认放置方式 copy / hardlink / symlink / reflink
+            skip_existing: 是否跳过大小和修改时间一致的目标
+        """
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"不支持的放置方式：{link_mode}，可选 {LINK_MODES}")
+        self.threads = max(int(threads), 1)
+        self.link_mode = link_mode
+        self.skip_existing = skip_existing
+        self.counts: Dict[str, int] = {m: 0 for m in LINK_MODES}
+        self.skipped = 0
+        self.bytes = 0
+        self.errors: List[str] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.threads * 4)
+        self._executor = ThreadPoolExecutor(max_workers=self.threads)
+        self._warned = False
+        self._start = time.perf_counter()
+
+    def _place(self, src: str, dst: str, mode: str):
+        try:
+            if self.skip_existing and is_up_to_date(src, dst):
+                with self._lock:
+                    self.skipped += 1
+                return
+            used = place_file(src, dst, mode)
+            size = os.path.getsize(src) if used == 'copy' else 0
+            with self._lock:
+                self.counts[used] += 1
+                self.bytes += size
+                if used != mode and not self._warned:
+                    self._warned = True
+                    print(f"提示：无法使用 {mode}（跨文件系统或不支持），已回退为复制")
+        except Exception as e:
+            with self._lock:
+                self.errors.append(f"{src} -> {dst}: {e}")
+        finally:
+            self._slots.release()
+
+    def submit(self, src, dst, mode: Optional[str] = None):
+        """提交一个放置任务；队列已满时阻塞等待"""
+        self._slots.acquire()
+        self._executor.submit(self._place, os.fspath(src), os.fspath(dst), mode or self.link_mode)
+
+    def close(self):
+        """等待所有任务完成"""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        if exc_type is None:
+            self.report()
+
+    def report(self):
+        """打印放置方式、跳过数、失败数和复制吞吐"""
+        elapsed = max(time.perf_counter() - self._start, 1e-9)
+        used = "，".join(f"{m} {n}" for m, n in self.counts.items() if n) or "无"
+        print(f"文件放置：{used}，跳过 {self.skipped}，失败 {len(self.errors)}，"
+              f"复制 {self.bytes / 1e6:.1f} MB，{self.bytes / 1e6 / elapsed:.1f} MB/s"
+              f"（{self.threads} 线程，{elapsed:.1f}s）")
+        for message in self.errors[:MAX_ERRORS_SHOWN]:
+            print(f"  {message}")
+        if len(self.errors) > MAX_ERRORS_SHOWN:
+            print(f"  ... 其余 {len(self.errors) - MAX_ERRORS_SHOWN} 个省略")
+
+
+def write_image_list(path, image_files):
+    """
+    写出 Ultralytics 可直接读取的图片列表（每行一个绝对路径）
+
+    Ultralytics 通过把路径中的 /images/ 替换为 /labels/ 来寻找标签，
+    因此图片所在目录需要有对应的 labels 目录
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        for image_file in image_files:
+            f.write(os.path.abspath(image_file).replace(os.sep, '/') + '\n')
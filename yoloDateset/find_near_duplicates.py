@@ -0,0 +1,89 @@
+"""
+查找整个标注目录中的近似重复标注
+
+同一文件、同一类别、旋转框 IoU 大于阈值的两个标注视为近似重复（常见于多人标注合并、重复粘贴）。
+标注通过 label_stats 的并行读取一次装入整体数组，候选对在全体框上一次扫描得到，
+只有外接框相交的对才计算精确旋转 IoU。
+
+输出 TSV 每行一对：文件（相对标注目录） / 类别 / 目标序号 i / 目标序号 j / IoU，
+目标序号是该文件中有效标注的顺序（从 0 开始，不计头部信息和格式错误的行）。
+
+使用方法：
+    python yoloDateset/find_near_duplicates.py --format yolo_obb --labels path/to/labels --iou 0.9
+    python yoloDateset/find_near_duplicates.py --format dota --labels path/to/dota/labels --output dups.tsv -j 8
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from convert_runner import add_runner_arguments
+from label_stats import FORMATS, load_labels
+from rotated_iou import overlap_pairs
+
+
+def find_near_duplicates(
+    label_dir: str,
+    fmt: str = 'yolo_obb',
+    iou_threshold: float = 0.9,
+    output: str = 'near_duplicates.tsv',
+    workers: int = 0,
+    chunk_size: int = 256
+) -> int:
+    """
+    查找近似重复标注并写出 TSV
+
+    Args:
+        label_dir: 标注目录
+        fmt: yolo / yolo_obb / dota
+        iou_threshold: IoU 阈值（严格大于）
+        output: 输出 TSV 路径
+        workers: 并行进程数，0 表示全部核心
+        chunk_size: 每个进程任务一次处理的文件数
+
+    Returns:
+        近似重复的对数
+    """
+    table = load_labels(label_dir, fmt, None, workers, chunk_size)
+    files, fi, class_ids = table['files'], table['file_index'], table['class_ids']
+    class_names = table['class_names']
+
+    # 每个目标在其文件中的序号
+    starts = np.searchsorted(fi, np.arange(len(files)))
+    local = np.arange(len(fi)) - starts[fi]
+
+    # (文件, 类别) 分组编号；类别可能为负数或超出类别表，不能用 文件 × 类别数 + 类别 拼接
+    if len(fi):
+        _, groups = np.unique(np.column_stack([fi, class_ids]), axis=0, return_inverse=True)
+        groups = groups.reshape(-1)
+    else:
+        groups = np.zeros(0, np.int64)
+    i, j, ious = overlap_pairs(table['polygons'], groups, iou_threshold)
+    order = np.lexsort((local[j], local[i], fi[i]))
+    i, j, ious = i[order], j[order], ious[order]
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write('file\tclass\ti\tj\tiou\n')
+        for a, b, iou in zip(i.tolist(), j.tolist(), ious.tolist()):
+            c = int(class_ids[a])
+            name = class_names[c] if 0 <= c < len(class_names) else str(c)
+            f.write(f"{os.path.relpath(files[fi[a]], label_dir)}\t{name}\t{local[a]}\t{local[b]}\t{iou:.4f}\n")
+
+    print(f"目标 {len(fi)} 个，IoU > {iou_threshold} 的同类近似重复 {len(i)} 对，"
+          f"涉及 {len(np.unique(fi[i]))} 个文件")
+    print(f"结果已保存至: {output}")
+    return len(i)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='查找近似重复的旋转框标注')
+    parser.add_argument('--format', choices=FORMATS, default='yolo_obb', help='标注格式')
+    parser.add_argument('--labels', '-l', type=str, required=True, help='标注目录')
+    parser.add_argument('--iou', type=float, default=0.9, help='IoU 阈值 (默认: 0.9)')
+    parser.add_argument('--output', '-o', type=str, default='near_duplicates.tsv', help='输出 TSV 路径')
+    add_runner_arguments(parser, default_chunk_size=256)
+
+    args = parser.parse_args()
+    find_near_duplicates(args.labels, args.format, args.iou, args.output, args.workers, args.chunk_size)
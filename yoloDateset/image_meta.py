@@ -0,0 +1,306 @@
+"""
+图像元数据探测公共模块
+
+只读取 PNG / JPEG / BMP / TIFF 文件头获取宽高，不解码像素；
+结果按 路径 + mtime + 文件大小 缓存到本地 SQLite 文件，重复运行时直接命中。
+无法识别的格式才回退到 cv2 完整解码。
+
+使用方法：
+    from image_meta import get_image_size
+    size = get_image_size("path/to/image.png")   # (width, height) 或 None
+
+DOTA_dataset / WSODDdataset 下的脚本需先把 yoloDateset 目录加入 sys.path 再导入。
+缓存位置默认为 ~/.cache/toolscript/image_size_cache.sqlite3，
+可通过环境变量 TOOLSCRIPT_IMAGE_CACHE 修改，设为空字符串则关闭缓存。
+"""
+
+import os
+import sqlite3
+import struct
+from pathlib import Path
+from typing import Optional, Tuple
+
+
+DEFAULT_CACHE_PATH = Path.home() / '.cache' / 'toolscript' / 'image_size_cache.sqlite3'
+
+# JPEG 中携带图像尺寸的 SOF 段标记（排除 DHT=C4、JPG=C8、DAC=CC）
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                     0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# 没有长度字段的独立标记
+_JPEG_STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8}
+
+
+def _tiff_ifd_values(f, base: int, byte_order: str, ifd_offset: int, tags: set) -> dict:
+    """读取 TIFF IFD 中指定 tag 的整数值（只支持 SHORT/LONG）"""
+    f.seek(base + ifd_offset)
+    raw = f.read(2)
+    if len(raw) < 2:
+        return {}
+    count = struct.unpack(byte_order + 'H', raw)[0]
+    entries = f.read(count * 12)
+    values = {}
+    for i in range(len(entries) // 12):
+        tag, typ, _, value = struct.unpack(byte_order + 'HHI4s', entries[i * 12:(i + 1) * 12])
+        if tag not in tags:
+            continue
+        if typ == 3:      # SHORT
+            values[tag] = struct.unpack(byte_order + 'H', value[:2])[0]
+        elif typ == 4:    # LONG
+            values[tag] = struct.unpack(byte_order + 'I', value)[0]
+    return values
+
+
+def _jpeg_exif_orientation(f, segment_end: int) -> int:
+    """解析 APP1 Exif 段中的 Orientation，返回 1~8，解析失败返回 1"""
+    header = f.read(6)
+    if header != b'Exif\x00\x00':
+        return 1
+    base = f.tell()
+    order = f.read(2)
+    if order == b'II':
+        byte_order = '<'
+    elif order == b'MM':
+        byte_order = '>'
+    else:
+        return 1
+    raw = f.read(6)
+    if len(raw) < 6:
+        return 1
+    ifd_offset = struct.unpack(byte_order + 'I', raw[2:])[0]
+    if base + ifd_offset >= segment_end:
+        return 1
+    return _tiff_ifd_values(f, base, byte_order, ifd_offset, {0x0112}).get(0x0112, 1)
+
+
+def _probe_png(f) -> Optional[Tuple[int, int]]:
+    f.seek(8)
+    chunk = f.read(16)
+    if len(chunk) < 16 or chunk[4:8] != b'IHDR':
+        return None
+    return struct.unpack('>II', chunk[8:16])
+
+
+def _probe_bmp(f) -> Optional[Tuple[int, int]]:
+    f.seek(14)
+    raw = f.read(12)
+    if len(raw) < 8:
+        return None
+    header_size = struct.unpack('<I', raw[:4])[0]
+    if header_size == 12:
+        # OS/2 BITMAPCOREHEADER
+        return struct.unpack('<HH', raw[4:8])
+    if len(raw) < 12:
+        return None
+    w, h = struct.unpack('<ii', raw[4:12])
+    # 高度为负表示自上而下存储
+    return abs(w), abs(h)
+
+
+def _probe_tiff(f) -> Optional[Tuple[int, int]]:
+    f.seek(0)
+    head = f.read(8)
+    byte_order = '<' if head[:2] == b'II' else '>'
+    if struct.unpack(byte_order + 'H', head[2:4])[0] != 42:
+        # BigTIFF 等变体交给 cv2 处理
+        return None
+    ifd_offset = struct.unpack(byte_order + 'I', head[4:8])[0]
+    values = _tiff_ifd_values(f, 0, byte_order, ifd_offset, {256, 257})
+    if 256 not in values or 257 not in values:
+        return None
+    return values[256], values[257]
+
+
+def _probe_jpeg(f) -> Optional[Tuple[int, int]]:
+    f.seek(2)
+    orientation = 1
+    while True:
+        byte = f.read(1)
+        if not byte:
+            return None
+        if byte != b'\xff':
+            continue
+        # 跳过填充的 0xFF
+        marker = f.read(1)
+        while marker == b'\xff':
+            marker = f.read(1)
+        if not marker:
+            return None
+        marker = marker[0]
+        if marker in _JPEG_STANDALONE_MARKERS:
+            continue
+        if marker == 0xD9:  # EOI
+            return None
+        raw = f.read(2)
+        if len(raw) < 2:
+            return None
+        length = struct.unpack('>H', raw)[0]
+        segment_start = f.tell()
+        if marker in _JPEG_SOF_MARKERS:
+            raw = f.read(5)
+            if len(raw) < 5:
+                return None
+            h, w = struct.unpack('>HH', raw[1:5])
+            # cv2.imread 默认按 Exif 方向旋转，5~8 表示宽高互换
+            if orientation in (5, 6, 7, 8):
+                w, h = h, w
+            return w, h
+        if marker == 0xE1:
+            orientation = _jpeg_exif_orientation(f, segment_start + length - 2) or orientation
+        f.seek(segment_start + length - 2)
+
+
+def probe_image_size(image_path: str) -> Optional[Tuple[int, int]]:
+    """
+    只读取文件头获取图像尺寸，不解码像素
+
+    Args:
+        image_path: 图像路径（支持中文路径）
+
+    Returns:
+        (width, height)，无法识别的格式或损坏文件返回 None
+    """
+    try:
+        with open(image_path, 'rb') as f:
+            head = f.read(4)
+            if head[:4] == b'\x89PNG':
+                size = _probe_png(f)
+            elif head[:2] == b'\xff\xd8':
+                size = _probe_jpeg(f)
+            elif head[:2] == b'BM':
+                size = _probe_bmp(f)
+            elif head[:4] in (b'II*\x00', b'MM\x00*'):
+                size = _probe_tiff(f)
+            else:
+                size = None
+    except (OSError, struct.error):
+        return None
+
+    if size is None or size[0] <= 0 or size[1] <= 0:
+        return None
+    return int(size[0]), int(size[1])
+
+
+def decode_image_size(image_path: str) -> Optional[Tuple[int, int]]:
+    """完整解码图像获取尺寸，兼容中文路径（仅作为文件头解析失败时的回退）"""
+    import cv2
+    import numpy as np
+
+    img = cv2.imread(image_path)
+    if img is None:
+        # 尝试解决中文路径问题
+        img = cv2.imdecode(np.fromfile(image_path, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+    h, w = img.shape[:2]
+    return w, h
+
+
+class ImageSizeCache:
+    """
+    基于 SQLite 的图像尺寸持久缓存，键为 (绝对路径, mtime_ns, 文件大小)
+
+    SQLite 自带文件锁，多进程同时读写同一缓存文件也是安全的。
+    连接按进程懒加载，fork 出的子进程会重新建立自己的连接。
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path) if db_path else DEFAULT_CACHE_PATH
+        self._conn = None
+        self._pid = None
+        self._disabled = False
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._disabled:
+            return None
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS image_size ('
+                'path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, '
+                'width INTEGER, height INTEGER)'
+            )
+            conn.commit()
+        except (OSError, sqlite3.Error) as e:
+            print(f"警告：图像尺寸缓存不可用（{e}），本次运行不使用缓存")
+            self._disabled = True
+            return None
+        self._conn = conn
+        self._pid = os.getpid()
+        return conn
+
+    def get(self, path: str, mtime_ns: int, size: int) -> Optional[Tuple[int, int]]:
+        conn = self._connect()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                'SELECT width, height FROM image_size WHERE path=? AND mtime_ns=? AND size=?',
+                (path, mtime_ns, size)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        return (row[0], row[1]) if row else None
+
+    def put(self, path: str, mtime_ns: int, size: int, wh: Tuple[int, int]):
+        conn = self._connect()
+        if conn is None:
+            return
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO image_size VALUES (?, ?, ?, ?, ?)',
+                (path, mtime_ns, size, wh[0], wh[1])
+            )
+            conn.commit()
+        except sqlite3.Error:
+            pass
+
+
+_default_cache = None
+
+
+def get_default_cache() -> Optional[ImageSizeCache]:
+    """返回进程内共享的默认缓存，环境变量 TOOLSCRIPT_IMAGE_CACHE 为空字符串时返回 None"""
+    global _default_cache
+    env_path = os.environ.get('TOOLSCRIPT_IMAGE_CACHE')
+    if env_path == '':
+        return None
+    if _default_cache is None:
+        _default_cache = ImageSizeCache(env_path)
+    return _default_cache
+
+
+def get_image_size(image_path: str, use_cache: bool = True) -> Optional[Tuple[int, int]]:
+    """
+    获取图像尺寸：缓存 -> 文件头解析 -> cv2 完整解码
+
+    Args:
+        image_path: 图像路径
+        use_cache: 是否使用持久缓存
+
+    Returns:
+        (width, height) 或 None
+    """
+    try:
+        st = os.stat(image_path)
+    except OSError:
+        return None
+
+    cache = get_default_cache() if use_cache else None
+    key = os.path.abspath(image_path)
+    if cache is not None:
+        hit = cache.get(key, st.st_mtime_ns, st.st_size)
+        if hit is not None:
+            return hit
+
+    size = probe_image_size(image_path)
+    if size is None:
+        size = decode_image_size(image_path)
+
+    if size is not None and cache is not None:
+        cache.put(key, st.st_mtime_ns, st.st_size, size)
+    return size
@@ -0,0 +1,60 @@
+"""
+可替换后端的 JSON 读写
+
+安装了 orjson 时使用 orjson（解析和序列化都快数倍），否则回退为标准库 json。
+两种后端的输出格式相同（UTF-8、不转义中文，缩进为 2 或紧凑格式），但内容不保证逐字节一致：
+- 浮点数的文本表示可能不同（如 1e+16 / 1e16），解析回来的数值相同
+- NaN / Infinity：标准库写出 NaN / Infinity（非标准 JSON），orjson 写为 null
+- 非字符串的字典键：标准库转为字符串，orjson 抛出 TypeError
+需要逐字节可复现的输出时（如与旧文件对比哈希），请在未安装 orjson 的环境中运行。
+
+使用方法：
+    from json_codec import load_json, save_json
+    data = load_json('a.json')
+    save_json(data, 'b.json', compact=True)
+"""
+
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def loads(raw: bytes):
+    """解析 JSON 字节串"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode('utf-8'))
+
+
+def dumps(data, compact: bool = False) -> bytes:
+    """
+    序列化为 UTF-8 字节串
+
+    Args:
+        data: 要序列化的对象
+        compact: True 为紧凑格式（无缩进和空格），False 为 2 空格缩进
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=0 if compact else orjson.OPT_INDENT_2)
+    if compact:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def load_json(path: str):
+    """读取 JSON 文件"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def save_json(data, path: str, compact: bool = False):
+    """写出 JSON 文件，自动创建上级目录"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(dumps(data, compact))
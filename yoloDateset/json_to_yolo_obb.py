@@ -4,13 +4,19 @@
 输入：JSON 文件（shape_type=rotation）
 输出：YOLO-OBB txt 文件（cls x1 y1 x2 y2 x3 y3 x4 y4 x5 y5 x6 y6 x7 y7 x8 y8）
 
-python yoloDateset/json_to_yolo_obb.py --input E:/work/drawing_analysis/dataset/obb_all_graphes/annotation/ab_af_c_c_d_labels/x_json --output E:/work/drawing_analysis/dataset/obb_all_graphes/annotation/ab_af_c_c_d_labels/txt
+python yoloDateset/json_to_yolo_obb.py --input E:/work/drawing_analysis/dataset/obb_all_graphes/annotation/ab_af_c_c_d_labels/x_json --output E:/work/drawing_analysis/dataset/obb_all_graphes/annotation/ab_af_c_c_d_labels/txt --workers 8
 """
 
 import json
 import os
 from pathlib import Path
 
+from build_manifest import BuildManifest
+from convert_runner import add_runner_arguments, run_tasks
+
+
+# 转换器版本：输出格式变化时递增，增量清单会据此触发全量重建
+CONVERTER_VERSION = '1'
 
 # 类别映射
 
@@ -27,13 +33,14 @@ LABEL2ID = {
 }
 
 
-def convert_labelme_to_yolo_obb(json_file: str, output_dir: str = None) -> str:
+def convert_labelme_to_yolo_obb(json_file: str, output_dir: str = None, verbose: bool = True) -> str:
     """
     转换单个 JSON 文件到 YOLO-OBB 格式
 
     Args:
         json_file: JSON 文件路径
         output_dir: 输出目录，默认为 None（与 JSON 同目录）
+        verbose: 是否打印逐文件信息（批量模式下关闭，由进度条代替）
 
     Returns:
         输出的 txt 文件路径
@@ -45,7 +52,8 @@ def convert_labelme_to_yolo_obb(json_file: str, output_dir: str = None) -> str:
     image_height = data.get('imageHeight', 0)
 
     if image_width == 0 or image_height == 0:
-        print(f"警告：{json_file} 图像尺寸无效，跳过")
+        if verbose:
+            print(f"警告：{json_file} 图像尺寸无效，跳过")
         return None
 
     # 获取输出文件路径
@@ -66,14 +74,16 @@ def convert_labelme_to_yolo_obb(json_file: str, output_dir: str = None) -> str:
 
         label = shape.get('label')
         if label not in LABEL2ID:
-            print(f"警告：未知类别 '{label}'，跳过")
+            if verbose:
+                print(f"警告：未知类别 '{label}'，跳过")
             continue
 
         class_id = LABEL2ID[label]
         points = shape.get('points', [])
 
         if len(points) != 4:
-            print(f"警告：{json_file} 中 {label} 的标注点不是 4 个，跳过")
+            if verbose:
+                print(f"警告：{json_file} 中 {label} 的标注点不是 4 个，跳过")
             continue
 
         # 归一化坐标并格式化输出
@@ -92,17 +102,27 @@ def convert_labelme_to_yolo_obb(json_file: str, output_dir: str = None) -> str:
     with open(txt_file, 'w', encoding='utf-8') as f:
         f.write('\n'.join(lines))
 
-    print(f"已转换：{json_file} -> {txt_file}")
+    if verbose:
+        print(f"已转换：{json_file} -> {txt_file}")
     return str(txt_file)
 
 
-def convert_directory(json_dir: str, output_dir: str = None):
+def convert_json_file(json_file: str, output_dir: str = None) -> str:
+    """批量模式下的单文件任务，不打印逐文件信息"""
+    return convert_labelme_to_yolo_obb(json_file, output_dir, verbose=False)
+
+
+def convert_directory(json_dir: str, output_dir: str = None, workers: int = 0, chunk_size: int = 64,
+                      incremental: bool = True):
     """
-    批量转换目录下所有 JSON 文件
+    批量转换目录下所有 JSON 文件（多进程）
 
     Args:
         json_dir: 包含 JSON 文件的目录
         output_dir: 输出目录，默认为 None（与 JSON 同目录）
+        workers: 并行进程数，0 表示全部核心
+        chunk_size: 每个进程任务一次处理的文件数
+        incremental: 是否按构建清单只转换新增/变化的文件，并删除已消失输入的输出
     """
     print(f"使用类别映射：{LABEL2ID}")
 
@@ -111,13 +131,21 @@ def convert_directory(json_dir: str, output_dir: str = None):
 
     print(f"找到 {len(json_files)} 个 JSON 文件")
 
-    converted = 0
-    for json_file in json_files:
-        result = convert_labelme_to_yolo_obb(str(json_file), output_dir)
-        if result:
-            converted += 1
+    if not incremental:
+        tasks = [(str(json_file), output_dir) for json_file in json_files]
+        return run_tasks(convert_json_file, tasks, workers, chunk_size)
+
+    manifest = BuildManifest(output_dir or str(json_dir), 'json_to_yolo_obb', CONVERTER_VERSION,
+                             {'classes': LABEL2ID})
+    todo = manifest.plan(json_files)
+    print(f"增量模式：{len(todo)} 个文件需要转换，{len(json_files) - len(todo)} 个未变化，"
+          f"删除 {manifest.removed} 个过期输出")
 
-    print(f"转换完成：{converted}/{len(json_files)}")
+    tasks = [(json_file, output_dir) for json_file in todo]
+    try:
+        return run_tasks(convert_json_file, tasks, workers, chunk_size, on_success=manifest.record_task)
+    finally:
+        manifest.save()
 
 
 if __name__ == '__main__':
@@ -128,6 +156,9 @@ if __name__ == '__main__':
                         help='输入的 JSON 文件或目录')
     parser.add_argument('--output', '-o', type=str, default=r"E:\work\drawing_analysis\dataset\obb_all_graphes\annotation\ab_af_c_lc_tc_d_an_cn_em_labels\yolo_txt",
                         help='输出目录，默认为 None（与输入 JSON 同目录）')
+    add_runner_arguments(parser)
+    parser.add_argument('--full', action='store_true',
+                        help='忽略增量清单，全部重新转换')
 
     args = parser.parse_args()
 
@@ -136,6 +167,7 @@ if __name__ == '__main__':
     if input_path.is_file():
         convert_labelme_to_yolo_obb(str(input_path), args.output)
     elif input_path.is_dir():
-        convert_directory(str(input_path), args.output)
+        convert_directory(str(input_path), args.output, args.workers, args.chunk_size,
+                          incremental=not args.full)
     else:
         print(f"错误：{args.input} 不存在")
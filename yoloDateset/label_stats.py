@@ -0,0 +1,417 @@
+"""
+数据集标注统计与异常索引（YOLO / YOLO-OBB / DOTA）
+
+一次并行读取把所有标注文件装入 NumPy 数组，之后的统计全部在整体数组上向量化完成：
+- 每个类别的目标数、出现的文件数、面积比例 / 长宽比中位数
+- 框面积（占图像面积比例，log10）和长宽比直方图
+- 异常检测：
+    malformed      格式错误的行
+    empty          没有任何目标的标注文件
+    unknown_class  类别 ID 超出类别列表 / DOTA 类别名不在 configs.CLASSES 中
+    degenerate     面积接近 0 或有重合顶点的框
+    twisted        四个顶点顺序交叉（自相交）的框
+    out_of_range   坐标超出图像范围
+    duplicate      同一文件中类别和坐标都相同的重复框
+
+给出 --images 时按图像尺寸换算为像素坐标（长宽比和 DOTA 的越界检查、面积比例都依赖图像尺寸）；
+不给出时 YOLO 格式在归一化坐标上统计，DOTA 只检查负坐标、不统计面积比例。
+
+输出到 --output 目录：
+- stats.json     完整统计结果
+- stats.html     可直接用浏览器打开的报告
+- anomalies.tsv  紧凑的异常索引：文件 / 异常类型 / 数量
+
+使用方法：
+    python yoloDateset/label_stats.py --format yolo_obb --labels path/to/labels/train --images path/to/images/train --output stats
+    python yoloDateset/label_stats.py --format dota --labels path/to/dota/labels --output stats -j 8
+"""
+
+import argparse
+import html
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from annotations import parse_dota, parse_yolo, parse_yolo_obb, polygon_areas
+from configs import CLASSES
+from convert_runner import add_runner_arguments, run_tasks
+from file_index import get_index
+from image_meta import get_image_size
+
+
+FORMATS = ('yolo', 'yolo_obb', 'dota')
+
+ISSUES = ('malformed', 'empty', 'unknown_class', 'degenerate', 'twisted', 'out_of_range', 'duplicate')
+
+# 退化框阈值：面积小于图像面积的 DEGENERATE_AREA 倍，或有边长小于图像长边的 DEGENERATE_EDGE 倍
+# （DOTA 且图像尺寸未知时按像素绝对值）
+DEGENERATE_AREA = 1e-6
+DEGENERATE_EDGE = 1e-4
+
+# 越界容差（相对图像尺寸）
+RANGE_TOL = 1e-6
+
+# 重复框判定：坐标按图像尺寸的 DUPLICATE_GRID 倍取整后完全相同
+DUPLICATE_GRID = 1e-4
+
+# 长宽比直方图分箱（最后一箱为 >= 16）
+ASPECT_BINS = [1, 1.5, 2, 3, 4, 6, 8, 12, 16]
+
+# 面积比例直方图分箱（log10，两端的箱包含超出范围的值）
+AREA_BINS = np.arange(-7, 0.5, 0.5)
+
+# HTML 报告中每种异常最多列出的文件数
+MAX_FILES_IN_HTML = 50
+
+
+# ==================== 读取 ====================
+
+def load_label_file(label_path: str, fmt: str, image_path: Optional[str] = None) -> tuple:
+    """
+    读取单个标注文件（进程池任务）
+
+    Returns:
+        ((class_ids, polygons, 格式错误行数, 额外类别名, 图像尺寸),)：
+        外层单元素元组保证空文件的结果也是真值；
+        DOTA 中不在 CLASSES 的类别 ID 为 len(CLASSES) + 其在额外类别名中的下标；
+        图像尺寸未知时为 None
+    """
+    with open(label_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    extra_names: List[str] = []
+    if fmt == 'dota':
+        class_index = {name: i for i, name in enumerate(CLASSES)}
+        class_ids, polygons, _, unknown, bad = parse_dota(text, class_index)
+        if unknown:
+            extra_names = sorted(set(unknown))
+            class_index.update({name: len(CLASSES) + j for j, name in enumerate(extra_names)})
+            class_ids, polygons, _, _, bad = parse_dota(text, class_index)
+    elif fmt == 'yolo':
+        class_ids, polygons, bad = parse_yolo(text)
+    else:
+        class_ids, polygons, bad = parse_yolo_obb(text)
+
+    size = get_image_size(image_path) if image_path else None
+    return (class_ids.astype(np.int32), polygons.reshape(-1, 4, 2), bad, extra_names, size),
+
+
+def load_labels(
+    label_dir: str,
+    fmt: str,
+    image_dir: Optional[str] = None,
+    workers: int = 0,
+    chunk_size: int = 256
+) -> dict:
+    """
+    并行读取整个标注目录为整体数组
+
+    Returns:
+        dict：files、file_index (N,)、class_ids (N,)、polygons (N, 4, 2)（文件中的原始坐标）、
+        bad_lines (文件数,)、sizes (文件数, 2)（未知为 NaN）、class_names
+    """
+    label_files = sorted(get_index(label_dir, ('.txt',)).paths.values())
+    images = get_index(image_dir).paths if image_dir else {}
+    tasks = [(path, fmt, images.get(Path(path).stem)) for path in label_files]
+
+    results: Dict[str, tuple] = {}
+
+    def collect(args, result):
+        results[args[0]] = result[0]
+
+    run_tasks(load_label_file, tasks, workers, chunk_size, desc='读取', on_success=collect)
+
+    class_names = list(CLASSES)
+    extra_ids: Dict[str, int] = {}
+    files, counts, class_ids, polygons, bad_lines, sizes = [], [], [], [], [], []
+    for path in label_files:
+        if path not in results:
+            continue
+        ids, polys, bad, extra_names, size = results[path]
+        if extra_names:
+            # 文件内的额外类别编号 -> 全局编号
+            remap = np.arange(len(CLASSES) + len(extra_names), dtype=np.int32)
+            for j, name in enumerate(extra_names):
+                if name not in extra_ids:
+                    extra_ids[name] = len(class_names)
+                    class_names.append(name)
+                remap[len(CLASSES) + j] = extra_ids[name]
+            ids = remap[ids]
+        files.append(path)
+        counts.append(len(ids))
+        class_ids.append(ids)
+        polygons.append(polys)
+        bad_lines.append(bad)
+        sizes.append(size if size is not None else (np.nan, np.nan))
+
+    return {
+        'files': files,
+        'file_index': np.repeat(np.arange(len(files), dtype=np.int64), counts),
+        'class_ids': np.concatenate(class_ids) if class_ids else np.zeros(0, np.int32),
+        'polygons': np.concatenate(polygons).astype(np.float64) if polygons else np.zeros((0, 4, 2)),
+        'bad_lines': np.asarray(bad_lines, dtype=np.int64),
+        'sizes': np.asarray(sizes, dtype=np.float64).reshape(-1, 2),
+        'class_names': class_names,
+    }
+
+
+# ==================== 统计 ====================
+
+def _histogram(values: np.ndarray, edges) -> List[int]:
+    """按左闭区间分箱，两端超出范围的值计入首 / 末箱"""
+    idx = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, len(edges) - 1)
+    return np.bincount(idx, minlength=len(edges)).tolist()
+
+
+def _duplicates(file_index: np.ndarray, class_ids: np.ndarray, polygons: np.ndarray, frame: np.ndarray) -> np.ndarray:
+    """同一文件内 类别 + 取整坐标 完全相同的目标，每组第一个之外的标记为重复"""
+    if not len(class_ids):
+        return np.zeros(0, bool)
+    grid = np.round(polygons.reshape(-1, 8) / (np.tile(frame, 4) * DUPLICATE_GRID)).astype(np.int64)
+    keys = np.column_stack([file_index, class_ids.astype(np.int64), grid])
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    return first[inverse.reshape(-1)] != np.arange(len(class_ids))
+
+
+def compute_stats(table: dict, fmt: str) -> dict:
+    """
+    在整体数组上计算统计和逐目标异常
+
+    Returns:
+        dict：summary / classes / histograms / issues（每种异常的 (文件数,) 计数数组）
+    """
+    files = table['files']
+    fi = table['file_index']
+    class_ids = table['class_ids']
+    class_names = table['class_names']
+    sizes = table['sizes']
+    num_files, num_objects = len(files), len(class_ids)
+
+    size_known = np.isfinite(sizes).all(axis=1)
+    obj_known = size_known[fi]
+    # 度量空间：尺寸已知时为像素坐标；未知时 YOLO 为归一化坐标，DOTA 为像素坐标
+    if fmt == 'dota':
+        points = table['polygons']
+        frame = np.where(obj_known[:, None], sizes[fi], np.nan)
+    else:
+        frame = np.where(obj_known[:, None], sizes[fi], 1.0)
+        points = table['polygons'] * frame[:, None, :]
+    frame_known = np.isfinite(frame).all(axis=1)
+    frame_or_one = np.where(frame_known[:, None], frame, 1.0)
+    frame_area = frame_or_one.prod(axis=1)
+
+    areas = polygon_areas(points)
+    edges = np.roll(points, -1, axis=1) - points
+    lengths = np.hypot(edges[..., 0], edges[..., 1])
+    side_a = (lengths[:, 0] + lengths[:, 2]) / 2
+    side_b = (lengths[:, 1] + lengths[:, 3]) / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        aspect = np.maximum(side_a, side_b) / np.minimum(side_a, side_b)
+    area_frac = np.where(frame_known, areas / frame_area, np.nan)
+
+    # ---------- 逐目标异常 ----------
+    issues_obj = {}
+    issues_obj['unknown_class'] = (class_ids < 0) | (class_ids >= len(CLASSES))
+    issues_obj['degenerate'] = ((areas < DEGENERATE_AREA * frame_area) |
+                                (lengths.min(axis=1) < DEGENERATE_EDGE * frame_or_one.max(axis=1)))
+    cross = edges[..., 0] * np.roll(edges[..., 1], -1, axis=1) - edges[..., 1] * np.roll(edges[..., 0], -1, axis=1)
+    eps = 1e-12 * frame_area[:, None]
+    issues_obj['twisted'] = ((cross > eps).sum(axis=1) == 2) & ((cross < -eps).sum(axis=1) == 2)
+    low = (points < -RANGE_TOL * frame_or_one[:, None, :]).any(axis=(1, 2))
+    high = (points > (1 + RANGE_TOL) * frame_or_one[:, None, :]).any(axis=(1, 2)) & frame_known
+    issues_obj['out_of_range'] = low | high
+    issues_obj['duplicate'] = _duplicates(fi, class_ids, points, frame_or_one)
+
+    objects_per_file = np.bincount(fi, minlength=num_files)
+    issues = {'malformed': table['bad_lines'], 'empty': (objects_per_file == 0).astype(np.int64)}
+    for name, mask in issues_obj.items():
+        issues[name] = np.bincount(fi[mask], minlength=num_files)
+    issues = {name: issues[name] for name in ISSUES}
+
+    # ---------- 类别统计 ----------
+    num_classes = max(len(class_names), int(class_ids.max()) + 1 if num_objects else 0)
+    names = [class_names[c] if c < len(class_names) else str(c) for c in range(num_classes)]
+    valid_cls = class_ids >= 0
+    per_class = np.bincount(class_ids[valid_cls], minlength=num_classes)
+    pairs = np.unique(fi[valid_cls] * num_classes + class_ids[valid_cls])
+    files_per_class = np.bincount(pairs % num_classes, minlength=num_classes) if num_classes else []
+
+    finite_aspect = np.isfinite(aspect)
+    classes = []
+    area_hist_cls, aspect_hist_cls = {}, {}
+    for c in range(num_classes):
+        if not per_class[c]:
+            continue
+        m = class_ids == c
+        af = area_frac[m & np.isfinite(area_frac) & (area_frac > 0)]
+        asp = aspect[m & finite_aspect]
+        classes.append({
+            'id': c, 'name': names[c], 'objects': int(per_class[c]), 'files': int(files_per_class[c]),
+            'median_area_frac': float(np.median(af)) if len(af) else None,
+            'median_aspect': float(np.median(asp)) if len(asp) else None,
+        })
+        area_hist_cls[names[c]] = _histogram(np.log10(af), AREA_BINS)
+        aspect_hist_cls[names[c]] = _histogram(asp, ASPECT_BINS)
+
+    af_all = area_frac[np.isfinite(area_frac) & (area_frac > 0)]
+    return {
+        'summary': {
+            'files': num_files,
+            'objects': num_objects,
+            'files_with_image_size': int(size_known.sum()),
+            'malformed_lines': int(table['bad_lines'].sum()),
+            'coordinate_space': 'pixel' if fmt == 'dota' or size_known.all() else 'mixed/normalized',
+        },
+        'classes': classes,
+        'histograms': {
+            'area_frac_log10_edges': AREA_BINS.tolist(),
+            'area_frac': _histogram(np.log10(af_all), AREA_BINS),
+            'area_frac_per_class': area_hist_cls,
+            'aspect_edges': ASPECT_BINS,
+            'aspect': _histogram(aspect[finite_aspect], ASPECT_BINS),
+            'aspect_per_class': aspect_hist_cls,
+        },
+        'issues': issues,
+    }
+
+
+# ==================== 输出 ====================
+
+def write_anomaly_index(path: str, files: List[str], issues: Dict[str, np.ndarray], label_dir: str):
+    """写出紧凑异常索引：每行 文件（相对标注目录） / 异常类型 / 数量"""
+    rows = []
+    for name in ISSUES:
+        for k in np.flatnonzero(issues[name]).tolist():
+            rows.append((os.path.relpath(files[k], label_dir), name, int(issues[name][k])))
+    rows.sort()
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('file\tissue\tcount\n')
+        f.writelines(f"{file}\t{name}\t{count}\n" for file, name, count in rows)
+
+
+def _bars(labels: List[str], counts: List[int]) -> str:
+    peak = max(counts) if counts and max(counts) else 1
+    rows = ''.join(
+        f'<tr><td>{html.escape(label)}</td><td class="n">{count}</td>'
+        f'<td><div class="bar" style="width:{count / peak * 100:.1f}%"></div></td></tr>'
+        for label, count in zip(labels, counts))
+    return f'<table class="hist">{rows}</table>'
+
+
+def write_html(path: str, report: dict, issue_files: Dict[str, List[str]]):
+    """写出单文件 HTML 报告（无外部依赖）"""
+    summary = report['summary']
+    hist = report['histograms']
+    area_edges = hist['area_frac_log10_edges']
+    area_labels = [f"≥1e{e:g}" if i == len(area_edges) - 1 else f"1e{e:g} – 1e{area_edges[i + 1]:g}"
+                   for i, e in enumerate(area_edges)]
+    aspect_edges = hist['aspect_edges']
+    aspect_labels = [f"≥{e:g}" if i == len(aspect_edges) - 1 else f"{e:g} – {aspect_edges[i + 1]:g}"
+                     for i, e in enumerate(aspect_edges)]
+
+    class_rows = ''.join(
+        f"<tr><td>{c['id']}</td><td>{html.escape(c['name'])}</td><td class='n'>{c['objects']}</td>"
+        f"<td class='n'>{c['files']}</td>"
+        f"<td class='n'>{'' if c['median_area_frac'] is None else format(c['median_area_frac'], '.2e')}</td>"
+        f"<td class='n'>{'' if c['median_aspect'] is None else format(c['median_aspect'], '.2f')}</td></tr>"
+        for c in report['classes'])
+    issue_rows = ''.join(
+        f"<tr><td>{name}</td><td class='n'>{v['files']}</td><td class='n'>{v['count']}</td></tr>"
+        for name, v in report['issues'].items())
+    issue_lists = ''.join(
+        f"<details><summary>{name}（{len(paths)}）</summary><ul>"
+        + ''.join(f"<li>{html.escape(p)}</li>" for p in paths[:MAX_FILES_IN_HTML])
+        + (f"<li>… 其余 {len(paths) - MAX_FILES_IN_HTML} 个见 anomalies.tsv</li>" if len(paths) > MAX_FILES_IN_HTML else '')
+        + "</ul></details>"
+        for name, paths in issue_files.items() if paths)
+
+    page = f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>标注统计</title>
+<style>
+body {{ font-family: sans-serif; margin: 24px; }}
+table {{ border-collapse: collapse; margin-bottom: 16px; }}
+td, th {{ border: 1px solid #ccc; padding: 3px 8px; }}
+td.n {{ text-align: right; }}
+table.hist td:last-child {{ width: 320px; }}
+div.bar {{ background: #4a90d9; height: 12px; }}
+</style></head><body>
+<h2>标注统计：{html.escape(report['label_dir'])}（{report['format']}）</h2>
+<p>文件 {summary['files']}，目标 {summary['objects']}，已知图像尺寸 {summary['files_with_image_size']}，
+格式错误行 {summary['malformed_lines']}，坐标空间 {summary['coordinate_space']}</p>
+<h3>类别</h3>
+<table><tr><th>ID</th><th>类别</th><th>目标数</th><th>文件数</th><th>面积比例中位数</th><th>长宽比中位数</th></tr>{class_rows}</table>
+<h3>面积比例分布</h3>{_bars(area_labels, hist['area_frac'])}
+<h3>长宽比分布</h3>{_bars(aspect_labels, hist['aspect'])}
+<h3>异常</h3>
+<table><tr><th>类型</th><th>文件数</th><th>数量</th></tr>{issue_rows}</table>
+{issue_lists}
+</body></html>
+"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(page)
+
+
+def label_stats(
+    label_dir: str,
+    output_dir: str,
+    fmt: str = 'yolo_obb',
+    image_dir: Optional[str] = None,
+    workers: int = 0,
+    chunk_size: int = 256
+) -> dict:
+    """
+    统计整个标注目录并写出报告
+
+    Args:
+        label_dir: 标注目录
+        output_dir: 报告输出目录
+        fmt: yolo / yolo_obb / dota
+        image_dir: 图像目录（可选，用于读取图像尺寸）
+        workers: 并行进程数，0 表示全部核心
+        chunk_size: 每个进程任务一次处理的文件数
+
+    Returns:
+        写入 stats.json 的报告字典
+    """
+    table = load_labels(label_dir, fmt, image_dir, workers, chunk_size)
+    stats = compute_stats(table, fmt)
+    files = table['files']
+
+    issues = stats.pop('issues')
+    report = {'format': fmt, 'label_dir': os.path.abspath(label_dir),
+              'image_dir': os.path.abspath(image_dir) if image_dir else None, **stats}
+    report['issues'] = {name: {'files': int(np.count_nonzero(counts)), 'count': int(counts.sum())}
+                        for name, counts in issues.items()}
+    issue_files = {name: [os.path.relpath(files[k], label_dir) for k in np.flatnonzero(counts).tolist()]
+                   for name, counts in issues.items()}
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, 'stats.json'), 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    write_html(os.path.join(output_dir, 'stats.html'), report, issue_files)
+    write_anomaly_index(os.path.join(output_dir, 'anomalies.tsv'), files, issues, label_dir)
+
+    summary = report['summary']
+    print(f"文件 {summary['files']}，目标 {summary['objects']}")
+    for c in report['classes']:
+        print(f"  {c['id']:>3} {c['name']:<20} 目标 {c['objects']:>8}  文件 {c['files']:>7}")
+    for name, v in report['issues'].items():
+        if v['files']:
+            print(f"  异常 {name:<14} 文件 {v['files']:>7}  数量 {v['count']:>8}")
+    print(f"报告已保存至: {output_dir}")
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='数据集标注统计与异常索引')
+    parser.add_argument('--format', choices=FORMATS, default='yolo_obb', help='标注格式')
+    parser.add_argument('--labels', '-l', type=str, required=True, help='标注目录')
+    parser.add_argument('--images', '-i', type=str, default=None, help='图像目录（可选，用于读取图像尺寸）')
+    parser.add_argument('--output', '-o', type=str, default='label_stats', help='报告输出目录')
+    add_runner_arguments(parser, default_chunk_size=256)
+
+    args = parser.parse_args()
+    label_stats(args.labels, args.output, args.format, args.images, args.workers, args.chunk_size)
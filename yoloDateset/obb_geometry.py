@@ -0,0 +1,85 @@
+"""
+旋转框批量几何运算
+
+所有函数都对整批框做一次 NumPy 运算，不逐个目标调用 math.cos / math.sin：
+- (cx, cy, w, h, angle) <-> (N, 4, 2) 四角点
+- 水平框 xmin ymin xmax ymax <-> 四角点
+- 像素坐标 <-> 归一化坐标（可选裁剪到 [0, 1]），尺寸可以是单个 (w, h) 或每个框一个 (N, 2)
+
+角度为弧度，图像坐标系（y 轴向下），四角点顺序为
+左上、右上、右下、左下（未旋转时），与 robndbox / DOTA / YOLO-OBB 一致。
+
+使用方法：
+    from obb_geometry import xywha_to_polygons, normalize_polygons
+    corners = xywha_to_polygons(rboxes)                       # (N, 5) -> (N, 4, 2)
+    norm = normalize_polygons(corners, (img_w, img_h), clamp=True)
+"""
+
+import numpy as np
+
+
+def _sizes(size) -> np.ndarray:
+    """(w, h) 或 (N, 2) -> 可与 (N, 4, 2) 广播的数组"""
+    size = np.asarray(size, dtype=np.float64)
+    return size[:, None, :] if size.ndim == 2 else size
+
+
+def xywha_to_polygons(rboxes: np.ndarray) -> np.ndarray:
+    """(N, 5) cx cy w h angle -> (N, 4, 2) 四角点"""
+    cx, cy, w, h, angle = np.asarray(rboxes, dtype=np.float64).reshape(-1, 5).T
+    dx = np.stack([-w / 2, w / 2, w / 2, -w / 2], axis=1)
+    dy = np.stack([-h / 2, -h / 2, h / 2, h / 2], axis=1)
+    cos_a, sin_a = np.cos(angle)[:, None], np.sin(angle)[:, None]
+    return np.stack([cx[:, None] + dx * cos_a - dy * sin_a,
+                     cy[:, None] + dx * sin_a + dy * cos_a], axis=2)
+
+
+def polygons_to_xywha(polygons: np.ndarray) -> np.ndarray:
+    """
+    (N, 4, 2) 四角点 -> (N, 5) cx cy w h angle
+
+    中心取四点均值，w 为第一条边长，h 为第二条边长，angle 为第一条边的方向；
+    对矩形是 xywha_to_polygons 的精确逆运算，非矩形四边形时为近似
+    """
+    polygons = np.asarray(polygons, dtype=np.float64).reshape(-1, 4, 2)
+    center = polygons.mean(axis=1)
+    edge1 = polygons[:, 1] - polygons[:, 0]
+    edge2 = polygons[:, 2] - polygons[:, 1]
+    w = np.hypot(edge1[:, 0], edge1[:, 1])
+    h = np.hypot(edge2[:, 0], edge2[:, 1])
+    angle = np.arctan2(edge1[:, 1], edge1[:, 0])
+    return np.stack([center[:, 0], center[:, 1], w, h, angle], axis=1)
+
+
+def boxes_to_polygons(boxes: np.ndarray) -> np.ndarray:
+    """(n, 4) xmin ymin xmax ymax -> (n, 4, 2) 顺时针四角点"""
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    x1, y1, x2, y2 = boxes.T
+    return np.stack([
+        np.stack([x1, y1], 1), np.stack([x2, y1], 1),
+        np.stack([x2, y2], 1), np.stack([x1, y2], 1)
+    ], axis=1)
+
+
+def polygons_to_boxes(polygons: np.ndarray) -> np.ndarray:
+    """(n, 4, 2) -> (n, 4) 外接水平框 xmin ymin xmax ymax"""
+    polygons = np.asarray(polygons, dtype=np.float64).reshape(-1, 4, 2)
+    return np.concatenate([polygons.min(axis=1), polygons.max(axis=1)], axis=1)
+
+
+def normalize_polygons(polygons: np.ndarray, size, clamp: bool = False) -> np.ndarray:
+    """
+    像素坐标 -> 归一化坐标
+
+    Args:
+        polygons: (n, 4, 2) 像素坐标
+        size: (w, h) 或每个框一个 (n, 2)
+        clamp: 是否裁剪到 [0, 1]（YOLO-OBB 要求）
+    """
+    norm = np.asarray(polygons, dtype=np.float64) / _sizes(size)
+    return np.clip(norm, 0.0, 1.0) if clamp else norm
+
+
+def denormalize_polygons(polygons: np.ndarray, size) -> np.ndarray:
+    """归一化坐标 -> 像素坐标，size 为 (w, h) 或 (n, 2)"""
+    return np.asarray(polygons, dtype=np.float64) * _sizes(size)
@@ -0,0 +1,331 @@
+"""
+标注类别删除 / 重命名 / 合并 / 平移 统一引擎
+
+- YOLO / YOLO-OBB（按 ID）：把重映射规则编译成查找表 lut，整个文件的类别列一次 lut[ids] 完成，
+  lut 值为 -1 表示删除；坐标部分原样保留，不做 float 解析和重新格式化
+- DOTA（按名称）：对文件内的类别名做 np.unique，只对去重后的名称查表，再一次 gather 回每行
+- 每个文件一次性写出，多文件通过 convert_runner 进程池并行
+
+重映射规则（按 ID，依次应用）：
+    merge   {旧ID: 新ID}      合并 / 改号
+    delete  [ID, ...]         删除
+    compact True              删除后把类别表内（< num_classes）剩余 ID 压缩为连续编号
+    shift   n                 所有 ID 加 n，结果小于 0 的行被删除
+未在规则中出现的 ID（包括类别表以外的 ID）保持不变；负数 ID 不参与合并 / 删除 / 压缩，
+只在 shift 不为 0 时平移（结果小于 0 同样删除）
+
+使用方法：
+    python yoloDateset/relabel.py --format yolo_obb --input in --output out --delete tiltedConnection
+    python yoloDateset/relabel.py --format yolo --input in --output out --merge 0=1 4=2 --no-compact
+    python yoloDateset/relabel.py --format yolo --input in --output out --shift -1
+    python yoloDateset/relabel.py --format dota --input in --output out --delete tiltedConnection --rename arrowhead=endMark
+"""
+
+import argparse
+import glob
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from configs import CLASSES
+from convert_runner import add_runner_arguments, run_tasks
+
+
+# 输出缓冲区大小，每个文件一次写出
+WRITE_BUFFER = 1 << 20
+
+DOTA_HEADER_PREFIXES = ('imagesource:', 'gsd:')
+
+
+def build_id_lut(
+    size: int,
+    delete_ids: Iterable[int] = (),
+    merge: Optional[Dict[int, int]] = None,
+    shift: int = 0,
+    compact: bool = False,
+    num_classes: Optional[int] = None
+) -> np.ndarray:
+    """
+    编译类别 ID 查找表
+
+    Args:
+        size: 查找表长度（需大于文件中出现的最大 ID）
+        delete_ids: 要删除的原始 ID
+        merge: {原始ID: 新ID}
+        shift: 最后对所有保留 ID 加上的偏移
+        compact: 删除后是否把剩余 ID 压缩为连续编号
+        num_classes: 类别表长度，compact 只压缩小于此值的 ID，其余 ID 保持不变；None 表示整个查找表
+
+    Returns:
+        (size,) int64，lut[旧ID] = 新ID，-1 表示删除
+    """
+    lut = np.arange(size, dtype=np.int64)
+    for src, dst in (merge or {}).items():
+        if 0 <= src < size:
+            lut[src] = dst
+    delete_ids = [i for i in delete_ids if 0 <= i < size]
+    lut[delete_ids] = -1
+    kept = lut >= 0
+    if compact:
+        inside = kept & (lut < (size if num_classes is None else num_classes))
+        values = np.unique(lut[inside])
+        lut[inside] = np.searchsorted(values, lut[inside])
+    lut[kept] += shift
+    lut[lut < 0] = -1
+    return lut
+
+
+class IdRemap:
+    """按类别 ID 重映射（YOLO / YOLO-OBB）"""
+
+    def __init__(
+        self,
+        delete_ids: Iterable[int] = (),
+        merge: Optional[Dict[int, int]] = None,
+        shift: int = 0,
+        compact: bool = False,
+        min_cols: int = 9,
+        keep_malformed: bool = True,
+        num_classes: Optional[int] = None,
+        keep_non_integer: Optional[bool] = None
+    ):
+        """
+        Args:
+            delete_ids / merge / shift / compact: 见 build_id_lut
+            num_classes: 类别表长度（compact 的范围），None 表示 len(CLASSES)
+            min_cols: 有效行的最少列数（YOLO-OBB 为 9，YOLO 为 5）
+            keep_malformed: 列数不足的行（以及类别无法解析的行）是否原样保留
+            keep_non_integer: 列数足够但类别不是整数的行是否原样保留，None 表示与 keep_malformed 相同
+        """
+        self.delete_ids = sorted(set(delete_ids))
+        self.merge = dict(merge or {})
+        self.shift = shift
+        self.compact = compact
+        self.min_cols = min_cols
+        self.keep_malformed = keep_malformed
+        self.keep_non_integer = keep_malformed if keep_non_integer is None else keep_non_integer
+        self.num_classes = len(CLASSES) if num_classes is None else num_classes
+        self._lut = np.zeros(0, np.int64)
+
+    def lut(self, max_id: int) -> np.ndarray:
+        """返回至少覆盖 max_id 的查找表（按需扩展）"""
+        if max_id >= len(self._lut):
+            size = max(max_id + 1, len(self._lut) * 2, 64)
+            self._lut = build_id_lut(size, self.delete_ids, self.merge, self.shift, self.compact,
+                                     self.num_classes)
+        return self._lut
+
+    def apply(self, text: str) -> Tuple[str, int, int]:
+        """
+        重映射一个文件的内容
+
+        Returns:
+            (输出文本, 保留行数, 删除行数)
+        """
+        rows: List[Tuple[str, str]] = []     # (类别, 其余部分)
+        order: List[int] = []                # 有效行在输出中的位置，-1 占位给原样保留的行
+        passthrough: List[str] = []
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            tokens = line.split()
+            if len(tokens) < self.min_cols or not tokens[0].lstrip('-').isdigit():
+                if self.keep_non_integer if len(tokens) >= self.min_cols else self.keep_malformed:
+                    order.append(-1)
+                    passthrough.append(line)
+                continue
+            order.append(len(rows))
+            rows.append((tokens[0], line[len(tokens[0]):].lstrip()))
+
+        if rows:
+            ids = np.fromiter((int(r[0]) for r in rows), dtype=np.int64, count=len(rows))
+            valid = ids >= 0
+            # 负数 ID 不查表，只平移；平移后小于 0 的行删除
+            new_ids = ids + self.shift
+            new_ids[valid] = self.lut(int(ids.max()))[ids[valid]]
+            keep = (new_ids >= 0) | (~valid & (self.shift == 0))
+            new_ids, keep = new_ids.tolist(), keep.tolist()
+        else:
+            new_ids, keep = [], []
+
+        out = []
+        deleted = 0
+        passthrough_iter = iter(passthrough)
+        for k in order:
+            if k < 0:
+                out.append(next(passthrough_iter))
+            elif keep[k]:
+                out.append(f'{new_ids[k]} {rows[k][1]}')
+            else:
+                deleted += 1
+        return ''.join(line + '\n' for line in out), len(out), deleted
+
+
+class NameRemap:
+    """按类别名称重映射（DOTA），头部信息、空行和格式错误的行原样保留"""
+
+    def __init__(self, name_map: Dict[str, Optional[str]]):
+        """
+        Args:
+            name_map: {旧名称: 新名称}，新名称为 None 表示删除；不在表中的名称保持不变
+        """
+        self.name_map = dict(name_map)
+
+    def apply(self, text: str) -> Tuple[str, int, int]:
+        """
+        重映射一个文件的内容
+
+        Returns:
+            (输出文本, 保留行数, 删除行数)
+        """
+        lines = [line.strip() for line in text.splitlines()]
+        data_idx = []
+        parts_list = []
+        for i, line in enumerate(lines):
+            if not line or line.startswith(DOTA_HEADER_PREFIXES):
+                continue
+            parts = line.split()
+            if len(parts) < 9:
+                continue
+            data_idx.append(i)
+            parts_list.append(parts)
+
+        deleted = 0
+        if parts_list:
+            names = np.array([p[8] for p in parts_list], dtype=object)
+            uniques, inverse = np.unique(names, return_inverse=True)
+            mapped = np.array([self.name_map.get(u, u) for u in uniques], dtype=object)[inverse]
+            for i, parts, new_name in zip(data_idx, parts_list, mapped.tolist()):
+                if new_name is None:
+                    lines[i] = None
+                    deleted += 1
+                elif new_name != parts[8]:
+                    parts[8] = new_name
+                    lines[i] = ' '.join(parts)
+
+        out = [line for line in lines if line is not None]
+        return '\n'.join(out), len(out), deleted
+
+
+def relabel_file(input_path: str, output_path: str, remap) -> Tuple[int, int]:
+    """
+    重映射单个标注文件（进程池任务）
+
+    Returns:
+        (保留行数, 删除行数)
+    """
+    with open(input_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    out_text, kept, deleted = remap.apply(text)
+    with open(output_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER) as f:
+        f.write(out_text)
+    return kept, deleted
+
+
+def relabel_directory(
+    input_dir: str,
+    output_dir: str,
+    remap,
+    workers: int = 0,
+    chunk_size: int = 256
+) -> Dict[str, int]:
+    """
+    批量重映射目录下所有 txt 标注文件
+
+    Args:
+        input_dir: 输入标注文件夹
+        output_dir: 输出标注文件夹
+        remap: IdRemap 或 NameRemap
+        workers: 并行进程数，0 表示全部核心
+        chunk_size: 每个进程任务一次处理的文件数
+
+    Returns:
+        {'files': n, 'kept': n, 'deleted': n, 'failed': n}
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    txt_files = sorted(glob.glob(os.path.join(input_dir, "*.txt")))
+    tasks = [(f, os.path.join(output_dir, os.path.basename(f)), remap) for f in txt_files]
+
+    stats = {'files': 0, 'kept': 0, 'deleted': 0}
+
+    def collect(args, result):
+        stats['files'] += 1
+        stats['kept'] += result[0]
+        stats['deleted'] += result[1]
+
+    totals = run_tasks(relabel_file, tasks, workers, chunk_size, desc='重映射', on_success=collect)
+    stats['failed'] = totals['failed']
+    return stats
+
+
+def resolve_class_ids(items: Sequence[str], classes: Sequence[str]) -> List[int]:
+    """把类别名或数字 ID 解析为 ID，不认识的名称给出警告"""
+    ids = []
+    for item in items:
+        if item.lstrip('-').isdigit():
+            ids.append(int(item))
+        elif item in classes:
+            ids.append(list(classes).index(item))
+        else:
+            print(f"警告：类别 '{item}' 不在类别列表中，跳过")
+    return ids
+
+
+def _parse_pairs(items: Sequence[str]) -> List[Tuple[str, str]]:
+    pairs = []
+    for item in items:
+        if '=' not in item:
+            raise SystemExit(f"错误：参数格式应为 旧=新：{item}")
+        pairs.append(tuple(item.split('=', 1)))
+    return pairs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='标注类别删除 / 重命名 / 合并 / 平移')
+    parser.add_argument('--format', choices=['yolo', 'yolo_obb', 'dota'], default='yolo_obb',
+                        help='标注格式')
+    parser.add_argument('--input', type=str, required=True, help='输入标注文件夹')
+    parser.add_argument('--output', '-o', type=str, required=True, help='输出标注文件夹')
+    parser.add_argument('--delete', nargs='*', default=[],
+                        help='要删除的类别（名称或 ID）')
+    parser.add_argument('--merge', nargs='*', default=[],
+                        help='合并/改号，格式 旧=新（名称或 ID；DOTA 下与 --rename 相同）')
+    parser.add_argument('--rename', nargs='*', default=[],
+                        help='DOTA 类别重命名，格式 旧名称=新名称')
+    parser.add_argument('--shift', type=int, default=0,
+                        help='所有类别 ID 加上的偏移（仅 YOLO / YOLO-OBB）')
+    parser.add_argument('--no-compact', action='store_true',
+                        help='删除类别后不压缩剩余 ID（仅 YOLO / YOLO-OBB）')
+    add_runner_arguments(parser, default_chunk_size=256)
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input):
+        print(f"错误：输入文件夹不存在：{args.input}")
+        raise SystemExit(1)
+
+    if args.format == 'dota':
+        name_map = {name: None for name in args.delete}
+        name_map.update(dict(_parse_pairs(args.merge + args.rename)))
+        remap = NameRemap(name_map)
+        print(f"名称映射：{name_map}")
+    else:
+        merge = {}
+        for a, b in _parse_pairs(args.merge):
+            unknown = [item for item in (a, b) if not item.lstrip('-').isdigit() and item not in CLASSES]
+            if unknown:
+                raise SystemExit(f"错误：--merge 中的类别不在类别列表中：{', '.join(unknown)}")
+            src, dst = resolve_class_ids([a, b], CLASSES)
+            merge[src] = dst
+        remap = IdRemap(resolve_class_ids(args.delete, CLASSES), merge, args.shift,
+                        compact=not args.no_compact and bool(args.delete),
+                        min_cols=9 if args.format == 'yolo_obb' else 5, num_classes=len(CLASSES))
+        print(f"类别 ID 重映射：{dict(enumerate(build_id_lut(len(CLASSES), remap.delete_ids, merge, args.shift, remap.compact, len(CLASSES)).tolist()))}")
+
+    stats = relabel_directory(args.input, args.output, remap, args.workers, args.chunk_size)
+    print(f"  处理文件数：{stats['files']}")
+    print(f"  删除标注总数：{stats['deleted']}")
+    print(f"  保留标注总数：{stats['kept']}")
+    print(f"  输出路径：{args.output}")
@@ -0,0 +1,346 @@
+"""
+单张图像内旋转框的均匀网格空间索引
+
+工程图纸每张有数百个框，"哪些 clampNumber 落在哪个 clamp 里" 这类检查逐对比较是 O(N²)。
+GridIndex 把每个框的外接水平框登记到覆盖的网格单元（CSR 存储），批量查询时：
+- 先由查询框覆盖的单元取出候选，再按外接框过滤，最后只对候选对做精确的旋转框相交计算
+- query_overlaps：与查询框相交的框
+- query_contains：被查询框包含（面积比例 >= min_fraction）的框
+- nearest：离查询点最近的框中心，按单元环逐圈向外搜索
+
+输入就是转换脚本使用的 (N, 4, 2) 四角点数组（像素或归一化坐标均可）。
+associate_dataset 配合 label_stats.load_labels 对整个数据集做跨类别关联：
+全部图像的候选对由一次按 (文件, x) 排序的扫描得到，不逐图建索引，总耗时与目标数成线性。
+
+使用方法：
+    from spatial_index import GridIndex
+    index = GridIndex(member_polygons)
+    q, i = index.query_contains(container_polygons)
+
+    python yoloDateset/spatial_index.py --labels path/to/labels --container clamp --member clampNumber --output assoc.tsv
+"""
+
+import argparse
+import os
+from typing import Tuple
+
+import numpy as np
+
+from annotations import polygon_areas
+from convert_runner import add_runner_arguments
+from label_stats import FORMATS, load_labels
+from obb_geometry import polygons_to_boxes
+from rotated_iou import box_overlap_pairs, intersection_area
+
+_EMPTY = np.zeros(0, np.int64)
+
+
+def _csr(keys: np.ndarray, values: np.ndarray, num_keys: int) -> Tuple[np.ndarray, np.ndarray]:
+    """按 keys 分桶：返回 (starts (num_keys+1,), 按桶排列的 values)"""
+    order = np.argsort(keys, kind='stable')
+    starts = np.zeros(num_keys + 1, np.int64)
+    np.cumsum(np.bincount(keys, minlength=num_keys), out=starts[1:])
+    return starts, values[order]
+
+
+def _expand(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """把若干区间 [start, end) 展开为 (区间下标, 区间内的值)"""
+    lengths = np.maximum(ends - starts, 0)
+    owner = np.repeat(np.arange(len(starts)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return owner, starts[owner] + offsets
+
+
+class GridIndex:
+    """单张图像内旋转框的均匀网格索引"""
+
+    def __init__(self, polygons: np.ndarray, cell_size: float = None):
+        """
+        Args:
+            polygons: (N, 4, 2) 四角点
+            cell_size: 网格边长，默认取框外接矩形长边的中位数
+        """
+        self.polygons = np.asarray(polygons, dtype=np.float64).reshape(-1, 4, 2)
+        self.boxes = polygons_to_boxes(self.polygons)
+        self.centers = self.polygons.mean(axis=1)
+        n = len(self.polygons)
+
+        if n:
+            self.origin = self.boxes[:, :2].min(axis=0)
+            extent = self.boxes[:, 2:].max(axis=0) - self.origin
+            if cell_size is None:
+                cell_size = float(np.median(np.maximum(self.boxes[:, 2] - self.boxes[:, 0],
+                                                       self.boxes[:, 3] - self.boxes[:, 1])))
+            cell_size = cell_size if cell_size > 0 else max(float(extent.max()), 1e-9)
+        else:
+            self.origin = np.zeros(2)
+            extent = np.zeros(2)
+            cell_size = cell_size or 1.0
+        self.cell_size = cell_size
+        self.shape = (np.floor(extent / cell_size).astype(np.int64) + 1)  # (nx, ny)
+
+        # 外接框 -> 覆盖的单元
+        lo, hi = self._cells(self.boxes[:, :2]), self._cells(self.boxes[:, 2:])
+        owner, cell = self._rect_cells(lo, hi)
+        self._box_starts, self._box_items = _csr(cell, owner, int(self.shape.prod()))
+        # 中心点 -> 所在单元（nearest 使用）
+        center_cells = self._cells(self.centers)
+        self._center_starts, self._center_items = _csr(
+            center_cells[:, 1] * self.shape[0] + center_cells[:, 0], np.arange(n), int(self.shape.prod()))
+
+    def __len__(self) -> int:
+        return len(self.polygons)
+
+    def _cells(self, points: np.ndarray, clip: bool = True) -> np.ndarray:
+        """(K, 2) 坐标 -> (K, 2) 单元坐标 (ix, iy)"""
+        cells = np.floor((np.asarray(points) - self.origin) / self.cell_size).astype(np.int64)
+        return np.clip(cells, 0, self.shape - 1) if clip else cells
+
+    def _rect_cells(self, lo: np.ndarray, hi: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """单元矩形 [lo, hi] -> (所属矩形下标, 单元编号)"""
+        widths = hi[:, 0] - lo[:, 0] + 1
+        counts = widths * (hi[:, 1] - lo[:, 1] + 1)
+        owner, k = _expand(np.zeros(len(lo), np.int64), counts)
+        dy, dx = np.divmod(k, widths[owner])
+        return owner, (lo[owner, 1] + dy) * self.shape[0] + lo[owner, 0] + dx
+
+    def candidates(self, query_boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        外接框相交的候选对
+
+        Args:
+            query_boxes: (Q, 4) xmin ymin xmax ymax
+
+        Returns:
+            (查询下标, 框下标)，按查询下标排序且不重复
+        """
+        query_boxes = np.asarray(query_boxes, dtype=np.float64).reshape(-1, 4)
+        if not len(self) or not len(query_boxes):
+            return _EMPTY, _EMPTY
+        # 与网格整体不相交的查询不参与展开
+        inside = ((query_boxes[:, 2] >= self.origin[0]) & (query_boxes[:, 3] >= self.origin[1]) &
+                  (query_boxes[:, 0] <= self.origin[0] + self.shape[0] * self.cell_size) &
+                  (query_boxes[:, 1] <= self.origin[1] + self.shape[1] * self.cell_size))
+        qidx = np.flatnonzero(inside)
+        owner, cell = self._rect_cells(self._cells(query_boxes[qidx, :2]), self._cells(query_boxes[qidx, 2:]))
+        pair_owner, pos = _expand(self._box_starts[cell], self._box_starts[cell + 1])
+        q = qidx[owner[pair_owner]]
+        i = self._box_items[pos]
+
+        key = np.unique(q * len(self) + i)
+        q, i = np.divmod(key, len(self))
+        b, qb = self.boxes[i], query_boxes[q]
+        hit = (qb[:, 0] <= b[:, 2]) & (b[:, 0] <= qb[:, 2]) & (qb[:, 1] <= b[:, 3]) & (b[:, 1] <= qb[:, 3])
+        return q[hit], i[hit]
+
+    def query_overlaps(self, query_polygons: np.ndarray, exact: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        与查询框相交的框
+
+        Args:
+            query_polygons: (Q, 4, 2)
+            exact: True 时按旋转框的交集面积 > 0 判定，False 时只比较外接框
+
+        Returns:
+            (查询下标, 框下标)
+        """
+        query_polygons = np.asarray(query_polygons, dtype=np.float64).reshape(-1, 4, 2)
+        q, i = self.candidates(polygons_to_boxes(query_polygons))
+        if exact and len(q):
+            hit = intersection_area(query_polygons[q], self.polygons[i]) > 0
+            q, i = q[hit], i[hit]
+        return q, i
+
+    def query_contains(self, query_polygons: np.ndarray, min_fraction: float = 0.99) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        被查询框包含的框：框面积落在查询框内的比例 >= min_fraction
+
+        Args:
+            query_polygons: (Q, 4, 2)
+            min_fraction: 包含比例阈值，1.0 表示完全包含
+
+        Returns:
+            (查询下标, 框下标)
+        """
+        query_polygons = np.asarray(query_polygons, dtype=np.float64).reshape(-1, 4, 2)
+        q, i = self.candidates(polygons_to_boxes(query_polygons))
+        if not len(q):
+            return q, i
+        inter = intersection_area(query_polygons[q], self.polygons[i])
+        area = polygon_areas(self.polygons[i])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            hit = (area > 0) & (inter >= (min_fraction - 1e-9) * area)
+        return q[hit], i[hit]
+
+    def nearest(self, points: np.ndarray, max_distance: float = np.inf) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        离每个查询点最近的框中心
+
+        Args:
+            points: (Q, 2) 查询点
+            max_distance: 超过此距离视为没有最近框
+
+        Returns:
+            (框下标, 距离)，没有时下标为 -1、距离为 inf
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        best = np.full(len(points), -1, np.int64)
+        best_dist = np.full(len(points), np.inf)
+        if not len(self) or not len(points):
+            return best, best_dist
+
+        nx, ny = self.shape
+        home = self._cells(points, clip=False)
+        # 最远需要搜索到覆盖整个网格的环；网格外的查询点从第一个与网格相交的环开始
+        far = np.maximum(np.maximum(np.abs(home[:, 0]), np.abs(home[:, 0] - nx + 1)),
+                         np.maximum(np.abs(home[:, 1]), np.abs(home[:, 1] - ny + 1)))
+        near = np.maximum(np.maximum(np.maximum(-home[:, 0], home[:, 0] - nx + 1), 0),
+                          np.maximum(np.maximum(-home[:, 1], home[:, 1] - ny + 1), 0))
+        pending = np.arange(len(points))
+        r = 0
+        while len(pending):
+            # 与网格不相交的环里不可能有候选，直接跳到最近的起始环
+            r = max(r, int(near[pending].min()))
+            active = pending[near[pending] <= r]
+            if r == 0:
+                ring = np.zeros((1, 2), np.int64)
+            else:
+                side = np.arange(-r, r + 1)
+                inner = np.arange(-r + 1, r)
+                ring = np.concatenate([
+                    np.stack([side, np.full_like(side, -r)], 1), np.stack([side, np.full_like(side, r)], 1),
+                    np.stack([np.full_like(inner, -r), inner], 1), np.stack([np.full_like(inner, r), inner], 1)])
+            cells = home[active][:, None, :] + ring[None, :, :]
+            valid = (cells[..., 0] >= 0) & (cells[..., 0] < nx) & (cells[..., 1] >= 0) & (cells[..., 1] < ny)
+            owner = np.repeat(np.arange(len(active)), valid.sum(axis=1))
+            cell_ids = cells[valid][:, 1] * nx + cells[valid][:, 0]
+            pair_owner, pos = _expand(self._center_starts[cell_ids], self._center_starts[cell_ids + 1])
+            if len(pos):
+                qa = active[owner[pair_owner]]
+                items = self._center_items[pos]
+                dist = np.hypot(*(self.centers[items] - points[qa]).T)
+                # 每个查询取本圈最近的
+                order = np.lexsort((dist, qa))
+                qa, items, dist = qa[order], items[order], dist[order]
+                first = np.r_[True, qa[1:] != qa[:-1]]
+                qa, items, dist = qa[first], items[first], dist[first]
+                better = dist < best_dist[qa]
+                best[qa[better]] = items[better]
+                best_dist[qa[better]] = dist[better]
+
+            # 第 r+1 圈及以外的中心距离至少为 r 个单元
+            done = (best_dist[active] <= r * self.cell_size) | (far[active] <= r) | (r * self.cell_size > max_distance)
+            pending = np.setdiff1d(pending, active[done], assume_unique=True)
+            r += 1
+
+        too_far = best_dist > max_distance
+        best[too_far] = -1
+        best_dist[too_far] = np.inf
+        return best, best_dist
+
+
+# ==================== 跨类别关联 ====================
+
+def associate(
+    polygons: np.ndarray,
+    class_ids: np.ndarray,
+    container_class: int,
+    member_class: int,
+    min_fraction: float = 0.99
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    单张图像内：每个 member 类别的框被哪个 container 类别的框包含
+
+    Returns:
+        (container 目标下标, member 目标下标)，下标为该图像内的目标序号
+    """
+    containers = np.flatnonzero(class_ids == container_class)
+    members = np.flatnonzero(class_ids == member_class)
+    if not len(containers) or not len(members):
+        return _EMPTY, _EMPTY
+    q, i = GridIndex(polygons[members]).query_contains(polygons[containers], min_fraction)
+    return containers[q], members[i]
+
+
+def associate_dataset(
+    label_dir: str,
+    container: str,
+    member: str,
+    fmt: str = 'yolo_obb',
+    min_fraction: float = 0.99,
+    output: str = 'associations.tsv',
+    workers: int = 0,
+    chunk_size: int = 256
+) -> dict:
+    """
+    整个标注目录的 container / member 关联，写出 TSV 并统计孤立目标
+
+    TSV 每行：文件 / container 序号 / member 序号；member 序号为 -1 表示没有 member 的 container，
+    container 序号为 -1 表示不在任何 container 内的 member
+
+    Returns:
+        {'pairs': n, 'empty_containers': n, 'orphan_members': n}
+    """
+    table = load_labels(label_dir, fmt, None, workers, chunk_size)
+    files, fi = table['files'], table['file_index']
+    class_names = table['class_names']
+    for name in (container, member):
+        if name not in class_names:
+            raise ValueError(f"类别 {name} 不在类别列表中：{class_names}")
+    container_id, member_id = class_names.index(container), class_names.index(member)
+
+    class_ids, polygons = table['class_ids'], table['polygons']
+    containers = np.flatnonzero(class_ids == container_id)
+    members = np.flatnonzero(class_ids == member_id)
+
+    # 全数据集一次扫描：同一文件内外接框相交的 container / member 对
+    sel = np.concatenate([containers, members])
+    a, b = box_overlap_pairs(polygons_to_boxes(polygons[sel]), fi[sel])
+    a, b = sel[a], sel[b]
+    swap = class_ids[a] == member_id
+    c, m = np.where(swap, b, a), np.where(swap, a, b)
+    cross = (class_ids[c] == container_id) & (class_ids[m] == member_id) & (c != m)
+    c, m = c[cross], m[cross]
+    inter = intersection_area(polygons[c], polygons[m])
+    area = polygon_areas(polygons[m])
+    hit = (area > 0) & (inter >= (min_fraction - 1e-9) * area)
+    c, m = c[hit], m[hit]
+
+    empty = np.setdiff1d(containers, c)
+    orphan = np.setdiff1d(members, m)
+    # 每个目标在其文件中的序号
+    starts = np.searchsorted(fi, np.arange(len(files)))
+    local = np.arange(len(fi)) - starts[fi]
+
+    rows_file = np.concatenate([fi[c], fi[empty], fi[orphan]])
+    rows_c = np.concatenate([local[c], local[empty], np.full(len(orphan), -1)])
+    rows_m = np.concatenate([local[m], np.full(len(empty), -1), local[orphan]])
+    order = np.lexsort((rows_m, rows_c, rows_file))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write('file\tcontainer\tmember\n')
+        f.writelines(f"{os.path.relpath(files[k], label_dir)}\t{x}\t{y}\n"
+                     for k, x, y in zip(rows_file[order].tolist(), rows_c[order].tolist(), rows_m[order].tolist()))
+
+    stats = {'pairs': len(c), 'empty_containers': len(empty), 'orphan_members': len(orphan)}
+    print(f"{container} 包含 {member}：{stats['pairs']} 对；"
+          f"没有 {member} 的 {container} {stats['empty_containers']} 个，"
+          f"不在任何 {container} 内的 {member} {stats['orphan_members']} 个")
+    print(f"结果已保存至: {output}")
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='跨类别包含关系检查（网格空间索引）')
+    parser.add_argument('--format', choices=FORMATS, default='yolo_obb', help='标注格式')
+    parser.add_argument('--labels', '-l', type=str, required=True, help='标注目录')
+    parser.add_argument('--container', type=str, required=True, help='外层类别名，例如 clamp')
+    parser.add_argument('--member', type=str, required=True, help='内层类别名，例如 clampNumber')
+    parser.add_argument('--min-fraction', type=float, default=0.99,
+                        help='member 面积落在 container 内的最小比例 (默认: 0.99)')
+    parser.add_argument('--output', '-o', type=str, default='associations.tsv', help='输出 TSV 路径')
+    add_runner_arguments(parser, default_chunk_size=256)
+
+    args = parser.parse_args()
+    associate_dataset(args.labels, args.container, args.member, args.format, args.min_fraction,
+                      args.output, args.workers, args.chunk_size)
@@ -1,8 +1,10 @@
-import os, shutil, random
-random.seed(0)
+import os, random, argparse
 import numpy as np
 # from sklearn.model_selection import train_test_split
 
+from file_links import LINK_MODES, CopyEngine, write_image_list
+from stratified_split import print_split_report, read_class_histogram, stratified_split
+
 # 数据集划分比例
 val_size = 0.2
 test_size = 0.1
@@ -15,27 +17,80 @@ txtpath = r'E:\work\drawing_analysis\dataset\obb_all_graphes\annotation\ab_af_c_
 # 输出路径
 output_dir = r'E:\work\drawing_analysis\dataset\obb_all_graphes\ab_af_c_c_d_a_anno'
 
-# 创建输出目录
-os.makedirs(f'{output_dir}/images/train', exist_ok=True)
-os.makedirs(f'{output_dir}/images/val', exist_ok=True)
-os.makedirs(f'{output_dir}/images/test', exist_ok=True)
-os.makedirs(f'{output_dir}/labels/train', exist_ok=True)
-os.makedirs(f'{output_dir}/labels/val', exist_ok=True)
-os.makedirs(f'{output_dir}/labels/test', exist_ok=True)
-
-listdir = np.array([i for i in os.listdir(txtpath) if 'txt' in i])
-random.shuffle(listdir)
-train, val, test = listdir[:int(len(listdir) * (1 - val_size - test_size))], listdir[int(len(listdir) * (1 - val_size - test_size)):int(len(listdir) * (1 - test_size))], listdir[int(len(listdir) * (1 - test_size)):]
-print(f'train set size:{len(train)} val set size:{len(val)} test set size:{len(test)}')
-
-for i in train:
-    shutil.copy('{}/{}.{}'.format(imgpath, i[:-4], postfix), f'{output_dir}/images/train/{i[:-4]}.{postfix}')
-    shutil.copy('{}/{}'.format(txtpath, i), f'{output_dir}/labels/train/{i}')
-
-for i in val:
-    shutil.copy('{}/{}.{}'.format(imgpath, i[:-4], postfix), f'{output_dir}/images/val/{i[:-4]}.{postfix}')
-    shutil.copy('{}/{}'.format(txtpath, i), f'{output_dir}/labels/val/{i}')
-
-for i in test:
-    shutil.copy('{}/{}.{}'.format(imgpath, i[:-4], postfix), f'{output_dir}/images/test/{i[:-4]}.{postfix}')
-    shutil.copy('{}/{}'.format(txtpath, i), f'{output_dir}/labels/test/{i}')
\ No newline at end of file
+# 只写图片列表、不放置任何文件的模式
+MANIFEST_MODE = 'manifest'
+
+
+def split_data(imgpath, txtpath, output_dir, val_size=0.2, test_size=0.1, postfix='png',
+               link_mode='copy', seed=0, copy_threads=8, stratify=False):
+    """
+    划分 YOLO 数据集
+
+    Args:
+        imgpath: 图片目录
+        txtpath: 标签目录
+        output_dir: 输出目录
+        val_size / test_size: 验证集 / 测试集比例
+        postfix: 图片扩展名
+        link_mode: 图片放置方式 copy / hardlink / symlink / reflink / manifest，
+            manifest 只写 train.txt / val.txt / test.txt 图片列表；标签始终复制
+        seed: 随机种子
+        copy_threads: 同时进行的复制数
+        stratify: 是否按类别分层划分，使各划分的类别分布接近目标比例
+    """
+    random.seed(seed)
+
+    listdir = np.array([i for i in os.listdir(txtpath) if 'txt' in i])
+    if stratify:
+        listdir.sort()
+        counts, class_names = read_class_histogram([os.path.join(txtpath, i) for i in listdir], 'yolo')
+        assign = stratified_split(counts, [1 - val_size - test_size, val_size, test_size], seed)
+        train, val, test = listdir[assign == 0], listdir[assign == 1], listdir[assign == 2]
+        print_split_report(counts, assign, class_names, ['train', 'val', 'test'])
+    else:
+        random.shuffle(listdir)
+        train, val, test = listdir[:int(len(listdir) * (1 - val_size - test_size))], listdir[int(len(listdir) * (1 - val_size - test_size)):int(len(listdir) * (1 - test_size))], listdir[int(len(listdir) * (1 - test_size)):]
+    print(f'train set size:{len(train)} val set size:{len(val)} test set size:{len(test)}')
+
+    splits = {'train': train, 'val': val, 'test': test}
+
+    if link_mode == MANIFEST_MODE:
+        # Ultralytics 直接读取图片列表，按 /images/ -> /labels/ 寻找标签，不触碰图片
+        os.makedirs(output_dir, exist_ok=True)
+        for split, names in splits.items():
+            if len(names) == 0:
+                continue
+            images = ['{}/{}.{}'.format(imgpath, i[:-4], postfix) for i in names]
+            write_image_list(f'{output_dir}/{split}.txt', images)
+            print(f'{split} list: {output_dir}/{split}.txt')
+        return
+
+    # 创建输出目录
+    for split in splits:
+        os.makedirs(f'{output_dir}/images/{split}', exist_ok=True)
+        os.makedirs(f'{output_dir}/labels/{split}', exist_ok=True)
+
+    with CopyEngine(copy_threads, link_mode) as engine:
+        for split, names in splits.items():
+            for i in names:
+                engine.submit('{}/{}.{}'.format(imgpath, i[:-4], postfix), f'{output_dir}/images/{split}/{i[:-4]}.{postfix}')
+                engine.submit('{}/{}'.format(txtpath, i), f'{output_dir}/labels/{split}/{i}', mode='copy')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='YOLO 数据集划分')
+    parser.add_argument('--images', type=str, default=imgpath, help='图片目录')
+    parser.add_argument('--labels', type=str, default=txtpath, help='标签目录')
+    parser.add_argument('--output', '-o', type=str, default=output_dir, help='输出目录')
+    parser.add_argument('--val', type=float, default=val_size, help='验证集比例')
+    parser.add_argument('--test', type=float, default=test_size, help='测试集比例')
+    parser.add_argument('--ext', type=str, default=postfix, help='图片扩展名')
+    parser.add_argument('--link-mode', choices=list(LINK_MODES) + [MANIFEST_MODE], default='copy',
+                        help='图片放置方式：copy 复制，hardlink 硬链接，symlink 符号链接，reflink 写时复制克隆'
+                             '（不可用时自动回退为复制）；manifest 只写 train.txt / val.txt 图片列表')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--copy-threads', type=int, default=8, help='同时进行的复制数')
+    parser.add_argument('--stratify', action='store_true', help='按类别分层划分')
+    args = parser.parse_args()
+
+    split_data(args.images, args.labels, args.output, args.val, args.test, args.ext, args.link_mode, args.seed, args.copy_threads, args.stratify)
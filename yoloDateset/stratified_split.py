@@ -0,0 +1,156 @@
+"""
+按类别分层的数据集划分（迭代分层，Sechidis et al. 2011）
+
+随机划分时 endMark、clampNumber 这类稀有类别可能全部落入训练集。
+这里先把每个标签文件的类别直方图读成一个 (文件数, 类别数) 的计数矩阵（每个文件只读一次），
+之后的分配只在矩阵上进行：
+- 每轮取剩余样本最少的类别，把含该类别的文件逐个分给该类别缺口最大的划分
+- 缺口相同时取总样本缺口最大的划分，仍相同时随机
+- 不含任何目标的文件最后按各划分的样本缺口补齐
+
+使用方法：
+    from stratified_split import read_class_histogram, stratified_split, print_split_report
+    counts, class_names = read_class_histogram(label_files, 'dota')
+    assign = stratified_split(counts, [0.7, 0.2, 0.1], seed=0)
+    print_split_report(counts, assign, class_names, ['train', 'val', 'test'])
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from configs import CLASSES
+
+
+def read_class_histogram(label_files: Sequence, fmt: str = 'yolo') -> Tuple[np.ndarray, List[str]]:
+    """
+    读取每个标签文件的类别直方图
+
+    Args:
+        label_files: 标签文件列表
+        fmt: 'yolo'（YOLO / YOLO-OBB，首列为类别 ID）或 'dota'（第 9 列为类别名）
+
+    Returns:
+        (counts, class_names)：counts 为 (文件数, 类别数) int32；
+        类别按 configs.CLASSES 顺序，不在其中的类别追加在后面
+    """
+    file_index = []
+    labels = []
+    for i, label_file in enumerate(label_files):
+        with open(label_file, 'r', encoding='utf-8') as f:
+            text = f.read()
+        for line in text.splitlines():
+            parts = line.split()
+            if fmt == 'dota':
+                if len(parts) < 9:
+                    continue
+                labels.append(parts[8])
+            else:
+                if len(parts) < 5 or not parts[0].isdigit():
+                    continue
+                labels.append(int(parts[0]))
+            file_index.append(i)
+
+    if fmt == 'dota':
+        seen = set(labels)
+        class_names = [c for c in CLASSES if c in seen] + sorted(seen - set(CLASSES))
+        name_to_id = {name: j for j, name in enumerate(class_names)}
+        class_ids = np.fromiter((name_to_id[name] for name in labels), dtype=np.int64, count=len(labels))
+    else:
+        class_ids = np.asarray(labels, dtype=np.int64)
+        num_classes = max(len(CLASSES), int(class_ids.max()) + 1 if len(class_ids) else 0)
+        class_names = [CLASSES[j] if j < len(CLASSES) else str(j) for j in range(num_classes)]
+
+    counts = np.zeros((len(label_files), len(class_names)), dtype=np.int32)
+    np.add.at(counts, (np.asarray(file_index, dtype=np.int64), class_ids), 1)
+    return counts, class_names
+
+
+def stratified_split(counts: np.ndarray, ratios: Sequence[float], seed: int = 0) -> np.ndarray:
+    """
+    迭代分层划分
+
+    Args:
+        counts: (文件数, 类别数) 类别计数矩阵
+        ratios: 各划分的比例，比例为 0 的划分不分配任何文件
+        seed: 随机种子
+
+    Returns:
+        (文件数,) int64，每个文件所属划分的下标
+    """
+    rng = np.random.default_rng(seed)
+    ratios = np.asarray(ratios, dtype=np.float64)
+    ratios = ratios / ratios.sum()
+    presence = counts > 0
+    n = len(presence)
+    usable = np.flatnonzero(ratios > 0)
+
+    desired_samples = ratios * n
+    desired_labels = np.outer(ratios, presence.sum(axis=0)).astype(np.float64)   # (划分数, 类别数)
+    assign = np.full(n, -1, dtype=np.int64)
+    remaining = presence.copy()
+    label_left = remaining.sum(axis=0)
+
+    while True:
+        active = np.flatnonzero(label_left > 0)
+        if len(active) == 0:
+            break
+        label = active[np.argmin(label_left[active])]
+        rows = np.flatnonzero(remaining[:, label])
+        rng.shuffle(rows)
+        for i in rows:
+            need = desired_labels[usable, label]
+            candidates = usable[need == need.max()]
+            if len(candidates) > 1:
+                need = desired_samples[candidates]
+                candidates = candidates[need == need.max()]
+            split = candidates[0] if len(candidates) == 1 else rng.choice(candidates)
+            assign[i] = split
+            desired_labels[split] -= presence[i]
+            desired_samples[split] -= 1
+        label_left -= remaining[rows].sum(axis=0)
+        remaining[rows] = False
+
+    # 不含目标的文件按样本缺口补齐
+    empty = np.flatnonzero(assign < 0)
+    if len(empty):
+        rng.shuffle(empty)
+        quota = np.zeros(len(ratios), dtype=np.int64)
+        quota[usable] = np.floor(np.clip(desired_samples[usable], 0, None)).astype(np.int64)
+        # 取整后剩余的名额给小数部分最大的划分
+        short = len(empty) - quota.sum()
+        if short > 0:
+            frac = np.clip(desired_samples[usable], 0, None) - quota[usable]
+            for k in np.argsort(-frac, kind='stable')[:short]:
+                quota[usable[k]] += 1
+            short = len(empty) - quota.sum()
+            if short > 0:
+                quota[usable[0]] += short
+        assign[empty] = np.repeat(np.arange(len(ratios)), quota)[:len(empty)]
+
+    return assign
+
+
+def print_split_report(
+    counts: np.ndarray,
+    assign: np.ndarray,
+    class_names: Sequence[str],
+    split_names: Sequence[str]
+):
+    """打印每个划分的文件数和各类别实例数（括号内为该类别落在此划分的比例）"""
+    num_splits = len(split_names)
+    per_split = np.zeros((num_splits, counts.shape[1]), dtype=np.int64)
+    np.add.at(per_split, assign, counts)
+    files = np.bincount(assign, minlength=num_splits)
+    totals = per_split.sum(axis=0)
+
+    width = max([len(name) for name in class_names] + [8])
+    header = f"{'类别':<{width}}" + "".join(f"{name:>16}" for name in split_names)
+    print(header)
+    print(f"{'文件数':<{width}}" + "".join(f"{n:>16}" for n in files))
+    for j, name in enumerate(class_names):
+        cells = []
+        for s in range(num_splits):
+            share = per_split[s, j] / totals[j] * 100 if totals[j] else 0.0
+            cells.append(f"{per_split[s, j]:>8} ({share:5.1f}%)")
+        print(f"{name:<{width}}" + "".join(f"{cell:>16}" for cell in cells))
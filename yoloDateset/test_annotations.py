@@ -0,0 +1,30 @@
+"""annotations 文本解析的回归测试"""
+
+import numpy as np
+
+from annotations import parse_yolo, parse_yolo_obb, parse_yolo_obb_scores
+
+
+def test_parse_yolo_obb_mixed_line_lengths():
+    # 短行与长行的总列数恰好是整数倍时，不能整体重排成错误的行
+    text = '0 .1 .1 .2 .1 .2 .2 .1\n1 .3 .3 .4 .3 .4 .4 .3 .4 .9\n'
+    class_ids, polygons, skipped = parse_yolo_obb(text)
+    assert class_ids.tolist() == []
+    assert polygons.shape == (0, 4, 2)
+    assert skipped == 2
+
+
+def test_parse_yolo_obb_skips_only_bad_lines():
+    text = '0 .1 .1 .2 .1 .2 .2 .1 .1\n2 .1 .1\n1 .3 .3 .4 .3 .4 .4 .3 .4\n'
+    class_ids, polygons, skipped = parse_yolo_obb(text)
+    assert class_ids.tolist() == [0, 1]
+    assert np.allclose(polygons[1], [[.3, .3], [.4, .3], [.4, .4], [.3, .4]])
+    assert skipped == 1
+
+
+def test_parse_yolo_and_scores_mixed_line_lengths():
+    class_ids, _, skipped = parse_yolo('0 .5 .5 .1\n1 .5 .5 .1 .1 .2\n')
+    assert class_ids.tolist() == [] and skipped == 2
+    class_ids, _, scores, skipped = parse_yolo_obb_scores(
+        '0 .1 .1 .2 .1 .2 .2 .1 .1\n1 .1 .1 .2 .1 .2 .2 .1 .1 .9 .5\n3 .1 .1 .2 .1 .2 .2 .1 .1 .7\n')
+    assert class_ids.tolist() == [3] and scores.tolist() == [.7] and skipped == 2
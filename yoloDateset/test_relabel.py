@@ -0,0 +1,43 @@
+"""relabel 类别重映射的回归测试：与逐行实现的旧行为保持一致"""
+
+from relabel import IdRemap, build_id_lut
+
+COORDS = '0.1 0.2 0.3 0.2 0.3 0.4 0.1 0.4'
+
+
+def _ids(text):
+    return [line.split()[0] for line in text.splitlines()]
+
+
+def test_compact_only_renumbers_ids_inside_class_list():
+    lut = build_id_lut(8, delete_ids=[1], compact=True, num_classes=4)
+    assert lut.tolist() == [0, -1, 1, 2, 4, 5, 6, 7]
+
+
+def test_delete_keeps_unknown_and_negative_ids():
+    remap = IdRemap([1], compact=True, min_cols=9, num_classes=4)
+    text = '\n'.join(f'{i} {COORDS}' for i in (0, 1, 2, 3, 7, -1)) + '\n'
+    out, kept, deleted = remap.apply(text)
+    assert _ids(out) == ['0', '1', '2', '7', '-1']
+    assert (kept, deleted) == (5, 1)
+
+
+def test_merge_keeps_negative_ids():
+    remap = IdRemap(merge={0: 2}, min_cols=5, keep_malformed=False)
+    out, _, deleted = remap.apply('0 0.5 0.5 0.1 0.1\n-2 0.5 0.5 0.1 0.1\n')
+    assert _ids(out) == ['2', '-2']
+    assert deleted == 0
+
+
+def test_shift_deletes_rows_below_zero():
+    remap = IdRemap(shift=-1, min_cols=5, keep_malformed=False)
+    out, kept, deleted = remap.apply('0 0.5 0.5 0.1 0.1\n3 0.5 0.5 0.1 0.1\n-1 0.5 0.5 0.1 0.1\n')
+    assert _ids(out) == ['2']
+    assert (kept, deleted) == (1, 2)
+
+
+def test_keep_non_integer_classes_but_drop_short_lines():
+    remap = IdRemap(merge={0: 1}, min_cols=5, keep_malformed=False, keep_non_integer=True)
+    out, kept, deleted = remap.apply('0 0.5 0.5 0.1 0.1\ncar 0.5 0.5 0.1 0.1\n0 0.5\n')
+    assert out == '1 0.5 0.5 0.1 0.1\ncar 0.5 0.5 0.1 0.1\n'
+    assert (kept, deleted) == (2, 0)
@@ -0,0 +1,227 @@
+"""
+旋转框标注批量验证：无界面渲染拼图（contact sheet）
+
+对整个划分的 标注-图像 对，在进程池中：
+- 按文件头得到原图尺寸，用 IMREAD_REDUCED_* 缩小解码（不解码全分辨率像素）
+- 缩放到缩略图后，同一类别的所有框一次 cv2.polylines 绘制
+- 每 行×列 张缩略图拼成一张 JPEG，底部附类别颜色图例
+
+审核时按顺序翻看 sheet_00000.jpg、sheet_00001.jpg……即可，
+每张缩略图下方标注文件名和目标数，需要细看时再用单张验证脚本打开。
+
+使用方法：
+    python yoloDateset/verify_batch.py --format yolo_obb --labels path/to/labels/val --images path/to/images/val --output path/to/sheets
+    python yoloDateset/verify_batch.py --format dota --labels path/to/dota/labels --images path/to/images --output path/to/sheets --grid 5 5 --thumb 360
+"""
+
+import argparse
+import os
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from annotations import parse_dota, parse_yolo_obb
+from configs import CLASSES
+from convert_runner import add_runner_arguments, run_tasks
+from file_index import pair_files, report_orphans
+from image_meta import get_image_size
+from obb_geometry import denormalize_polygons
+
+
+FORMATS = ('yolo_obb', 'dota')
+
+# 类别颜色 (BGR)
+COLORS = [(0, 0, 255), (0, 255, 0), (255, 0, 0), (0, 255, 255), (255, 255, 0),
+          (255, 0, 255), (0, 128, 255), (255, 128, 0), (128, 0, 255), (0, 255, 128)]
+
+# 不在 configs.CLASSES 中的 DOTA 类别用灰色绘制
+OTHER_COLOR = (160, 160, 160)
+OTHER_ID = len(CLASSES)
+
+# 缩略图下方文字栏高度、图例栏高度
+CAPTION_H = 22
+LEGEND_H = 28
+
+# polylines 亚像素绘制的小数位数（坐标乘以 2**SHIFT）
+SHIFT = 4
+
+_REDUCED_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                  (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+
+def read_reduced(image_path: str, target: int, size: Optional[Tuple[int, int]] = None) -> Optional[np.ndarray]:
+    """
+    按目标边长选择 IMREAD_REDUCED_* 缩小解码，缩小后的长边不小于 target
+
+    Args:
+        image_path: 图像路径（支持中文路径）
+        target: 缩略图边长
+        size: 原图 (w, h)，已知时避免重复读取文件头
+    """
+    size = size or get_image_size(image_path)
+    flag = cv2.IMREAD_COLOR
+    if size is not None:
+        for factor, reduced in _REDUCED_FLAGS:
+            if max(size) / factor >= target:
+                flag = reduced
+                break
+    data = np.fromfile(image_path, dtype=np.uint8)
+    return cv2.imdecode(data, flag)
+
+
+def load_polygons(label_path: str, fmt: str, size: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """读取标注为 (类别 ID, 像素坐标多边形)，DOTA 中不在 configs.CLASSES 的类别记为 OTHER_ID"""
+    with open(label_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if fmt == 'dota':
+        class_index = {name: i for i, name in enumerate(CLASSES)}
+        class_ids, polygons, _, unknown, _ = parse_dota(text, class_index)
+        if unknown:
+            class_index.update(dict.fromkeys(unknown, OTHER_ID))
+            class_ids, polygons, _, _, _ = parse_dota(text, class_index)
+        return class_ids, polygons
+    class_ids, polygons, _ = parse_yolo_obb(text)
+    return class_ids, denormalize_polygons(polygons, size)
+
+
+def render_thumbnail(image_path: str, label_path: str, fmt: str, thumb: int) -> np.ndarray:
+    """渲染一张缩略图（含文件名栏），图像无法读取时返回带提示的灰色图块"""
+    tile = np.full((thumb + CAPTION_H, thumb, 3), 40, dtype=np.uint8)
+    size = get_image_size(image_path)
+    img = read_reduced(image_path, thumb, size) if size is not None else None
+    if img is None:
+        cv2.putText(tile, 'read failed', (8, thumb // 2), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 1)
+        caption = os.path.basename(image_path)
+    else:
+        scale = thumb / max(size)
+        tw, th = max(int(size[0] * scale), 1), max(int(size[1] * scale), 1)
+        tile[:th, :tw] = cv2.resize(img, (tw, th), interpolation=cv2.INTER_AREA)
+
+        class_ids, polygons = load_polygons(label_path, fmt, size)
+        pts = np.round(polygons * scale * (1 << SHIFT)).astype(np.int32)
+        # 同一类别的所有框一次绘制
+        for class_id in np.unique(class_ids).tolist():
+            color = OTHER_COLOR if fmt == 'dota' and class_id == OTHER_ID else COLORS[class_id % len(COLORS)]
+            cv2.polylines(tile, list(pts[class_ids == class_id]), True, color, 1, cv2.LINE_AA, SHIFT)
+        caption = f"{Path(image_path).stem}  [{len(class_ids)}]"
+
+    cv2.putText(tile, caption[:48], (4, thumb + CAPTION_H - 6), cv2.FONT_HERSHEY_SIMPLEX, 0.42,
+                (230, 230, 230), 1, cv2.LINE_AA)
+    return tile
+
+
+def _legend(width: int, class_names: Sequence[str]) -> np.ndarray:
+    bar = np.full((LEGEND_H, width, 3), 20, dtype=np.uint8)
+    x = 6
+    for i, name in enumerate(class_names):
+        (text_w, _), _ = cv2.getTextSize(name, cv2.FONT_HERSHEY_SIMPLEX, 0.45, 1)
+        if x + text_w + 24 > width:
+            break
+        cv2.rectangle(bar, (x, 8), (x + 12, 20), COLORS[i % len(COLORS)], -1)
+        cv2.putText(bar, name, (x + 16, 19), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (230, 230, 230), 1, cv2.LINE_AA)
+        x += text_w + 30
+    return bar
+
+
+def render_sheet(
+    sheet_path: str,
+    items: Sequence[Tuple[str, str]],
+    fmt: str,
+    grid: Tuple[int, int],
+    thumb: int,
+    quality: int = 85
+) -> Optional[str]:
+    """
+    渲染一张拼图并写出 JPEG（进程池任务）
+
+    Args:
+        sheet_path: 输出 JPEG 路径
+        items: [(图像路径, 标注路径), ...]，不超过 行×列 个
+        fmt: yolo_obb / dota
+        grid: (行, 列)
+        thumb: 缩略图边长
+        quality: JPEG 质量
+
+    Returns:
+        输出路径，失败返回 None
+    """
+    rows, cols = grid
+    tile_h = thumb + CAPTION_H
+    sheet = np.zeros((rows * tile_h, cols * thumb, 3), dtype=np.uint8)
+    for k, (image_path, label_path) in enumerate(items):
+        r, c = divmod(k, cols)
+        sheet[r * tile_h:(r + 1) * tile_h, c * thumb:(c + 1) * thumb] = render_thumbnail(
+            image_path, label_path, fmt, thumb)
+    sheet = np.vstack([sheet, _legend(sheet.shape[1], CLASSES)])
+
+    ok, buf = cv2.imencode('.jpg', sheet, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        return None
+    buf.tofile(sheet_path)
+    return sheet_path
+
+
+def render_contact_sheets(
+    label_dir: str,
+    image_dir: str,
+    output_dir: str,
+    fmt: str = 'yolo_obb',
+    grid: Tuple[int, int] = (4, 4),
+    thumb: int = 480,
+    workers: int = 0
+) -> List[str]:
+    """
+    批量渲染整个划分的拼图
+
+    Args:
+        label_dir: 标注目录
+        image_dir: 图像目录
+        output_dir: 拼图输出目录
+        fmt: yolo_obb / dota
+        grid: 每张拼图的 (行, 列)
+        thumb: 缩略图边长
+        workers: 并行进程数，0 表示全部核心
+
+    Returns:
+        拼图路径列表（按文件名顺序）
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    pairs, orphan_labels, orphan_images = pair_files(label_dir, image_dir)
+    report_orphans(orphan_labels, orphan_images)
+
+    items = [(pairs[stem][1], pairs[stem][0]) for stem in sorted(pairs)]
+    per_sheet = grid[0] * grid[1]
+    tasks = []
+    index_lines = []
+    for n, start in enumerate(range(0, len(items), per_sheet)):
+        sheet_path = os.path.join(output_dir, f'sheet_{n:05d}.jpg')
+        chunk = items[start:start + per_sheet]
+        tasks.append((sheet_path, chunk, fmt, tuple(grid), thumb))
+        index_lines.extend(f"{os.path.basename(sheet_path)}\t{k}\t{Path(image).stem}"
+                           for k, (image, _) in enumerate(chunk))
+
+    # 拼图序号 -> 文件名 的索引，方便从拼图定位原文件
+    with open(os.path.join(output_dir, 'index.tsv'), 'w', encoding='utf-8') as f:
+        f.write('sheet\tslot\tstem\n' + '\n'.join(index_lines) + '\n')
+
+    print(f"共 {len(items)} 对标注/图像，生成 {len(tasks)} 张拼图（{grid[0]}×{grid[1]}）")
+    run_tasks(render_sheet, tasks, workers, chunk_size=1, desc='渲染')
+    return [task[0] for task in tasks]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='旋转框标注批量验证（无界面拼图输出）')
+    parser.add_argument('--format', choices=FORMATS, default='yolo_obb', help='标注格式')
+    parser.add_argument('--labels', '-l', type=str, required=True, help='标注目录')
+    parser.add_argument('--images', '-i', type=str, required=True, help='图像目录')
+    parser.add_argument('--output', '-o', type=str, required=True, help='拼图输出目录')
+    parser.add_argument('--grid', type=int, nargs=2, default=[4, 4], metavar=('ROWS', 'COLS'),
+                        help='每张拼图的行数和列数 (默认: 4 4)')
+    parser.add_argument('--thumb', type=int, default=480, help='缩略图边长 (默认: 480)')
+    add_runner_arguments(parser)
+
+    args = parser.parse_args()
+    render_contact_sheets(args.labels, args.images, args.output, args.format,
+                          tuple(args.grid), args.thumb, args.workers)
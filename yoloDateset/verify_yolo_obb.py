@@ -1,3 +1,4 @@
+import argparse
 import cv2
 import numpy as np
 import os
@@ -93,8 +94,24 @@ if __name__ == "__main__":
     # 请根据您本地的实际路径替换以下内
     image_file = r"E:\work\drawing_analysis\dataset\obb_all_graphes\annotation\253_26_roi5.png"
     label_file = r"E:\work\drawing_analysis\dataset\obb_all_graphes\ab_af_c_lc_tc_d_an_cn_em_anno\yolo\labels\train\253_26_roi5.txt"
-    
-    # CLASSES 已从 configs.py 导入
-    class_list = CLASSES
-    
-    draw_yolo_obb(image_file, label_file, class_list)
+
+    parser = argparse.ArgumentParser(description='验证 YOLO-OBB 格式标注')
+    parser.add_argument('--image', '-i', type=str, default=image_file, help='图片路径；批量模式下为图像目录')
+    parser.add_argument('--label', '-l', type=str, default=label_file, help='标签路径；批量模式下为标签目录')
+    parser.add_argument('--batch', action='store_true', help='无界面批量模式：渲染整个目录的拼图')
+    parser.add_argument('--output', '-o', type=str, default='verify_sheets', help='批量模式拼图输出目录')
+    parser.add_argument('--grid', type=int, nargs=2, default=[4, 4], metavar=('ROWS', 'COLS'),
+                        help='批量模式每张拼图的行数和列数 (默认: 4 4)')
+    parser.add_argument('--thumb', type=int, default=480, help='批量模式缩略图边长 (默认: 480)')
+    parser.add_argument('--workers', '-j', type=int, default=0, help='批量模式并行进程数，0 表示全部核心')
+    args = parser.parse_args()
+
+    if args.batch:
+        from verify_batch import render_contact_sheets
+        render_contact_sheets(args.label, args.image, args.output, 'yolo_obb',
+                              tuple(args.grid), args.thumb, args.workers)
+    else:
+        # CLASSES 已从 configs.py 导入
+        class_list = CLASSES
+
+        draw_yolo_obb(args.image, args.label, class_list)
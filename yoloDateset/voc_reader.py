@@ -0,0 +1,178 @@
+"""
+VOC XML 公共读取模块
+
+用 iterparse 只提取 size、filename、object/name、difficult、bndbox、robndbox，
+装入 NumPy 数组；安装了 lxml 时使用 lxml 解析，否则使用标准库 ElementTree。
+
+- 解析结果按 路径 + mtime + 文件大小 缓存在进程内，同一次运行中
+  类别统计、类别重命名、格式转换共用一次解析
+- read_voc_records 通过 convert_runner 进程池并行解析多个文件
+
+使用方法：
+    from voc_reader import read_voc_records, voc_polygons
+    records = read_voc_records(xml_files, workers=8)
+    for record in records:
+        polygons, valid = voc_polygons(record)
+"""
+
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from convert_runner import run_tasks
+from obb_geometry import boxes_to_polygons, xywha_to_polygons
+
+try:
+    from lxml import etree as _etree
+except ImportError:
+    import xml.etree.ElementTree as _etree
+
+
+BNDBOX_KEYS = ('xmin', 'ymin', 'xmax', 'ymax')
+ROBNDBOX_KEYS = ('cx', 'cy', 'w', 'h', 'angle')
+
+
+class VocRecord(NamedTuple):
+    """一个 VOC XML 的解析结果，缺失的数值为 NaN"""
+    path: str
+    filename: str
+    size: Tuple[float, float]       # (width, height)，缺少 size 时为 (nan, nan)
+    names: Tuple[str, ...]          # 每个 object 的类别名（已去除首尾空白）
+    difficult: np.ndarray           # (n,) bool
+    bndbox: np.ndarray              # (n, 4) xmin ymin xmax ymax
+    robndbox: np.ndarray            # (n, 5) cx cy w h angle（弧度）
+
+
+def _float(text: str) -> float:
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+def parse_voc(xml_path: str) -> VocRecord:
+    """iterparse 解析单个 VOC XML（进程池任务）"""
+    xml_path = os.fspath(xml_path)
+    stack: List[str] = []
+    size: Dict[str, float] = {}
+    filename = ''
+    names, difficult, bndbox, robndbox = [], [], [], []
+    obj: Optional[dict] = None
+
+    for event, elem in _etree.iterparse(xml_path, events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            stack.append(tag)
+            if tag == 'object' and len(stack) == 2:
+                obj = {'name': '', 'difficult': False, 'bndbox': {}, 'robndbox': {}}
+            continue
+
+        depth = len(stack)
+        parent = stack[-2] if depth >= 2 else None
+        text = (elem.text or '').strip()
+        if obj is not None:
+            if depth == 3 and tag == 'name':
+                obj['name'] = text
+            elif depth == 3 and tag == 'difficult':
+                obj['difficult'] = text == '1'
+            elif depth == 4 and parent in ('bndbox', 'robndbox'):
+                obj[parent][tag] = _float(text)
+            elif depth == 2 and tag == 'object':
+                names.append(obj['name'])
+                difficult.append(obj['difficult'])
+                bndbox.append([obj['bndbox'].get(k, np.nan) for k in BNDBOX_KEYS]
+                              if obj['bndbox'] else [np.nan] * 4)
+                robndbox.append([obj['robndbox'].get(k, np.nan) for k in ROBNDBOX_KEYS]
+                                if obj['robndbox'] else [np.nan] * 5)
+                obj = None
+                elem.clear()
+        elif depth == 3 and parent == 'size':
+            size[tag] = _float(text)
+        elif depth == 2 and tag == 'filename':
+            filename = text
+        stack.pop()
+
+    return VocRecord(
+        path=xml_path,
+        filename=filename,
+        size=(size.get('width', np.nan), size.get('height', np.nan)),
+        names=tuple(names),
+        difficult=np.asarray(difficult, dtype=bool),
+        bndbox=np.asarray(bndbox, dtype=np.float64).reshape(-1, 4),
+        robndbox=np.asarray(robndbox, dtype=np.float64).reshape(-1, 5)
+    )
+
+
+# 进程内缓存：绝对路径 -> ((mtime_ns, 文件大小), VocRecord)
+_cache: Dict[str, Tuple[Tuple[int, int], VocRecord]] = {}
+
+
+def _stat_key(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def load_voc(xml_path: str) -> VocRecord:
+    """带进程内缓存的 parse_voc"""
+    key = os.path.abspath(xml_path)
+    stat_key = _stat_key(key)
+    hit = _cache.get(key)
+    if hit is not None and hit[0] == stat_key:
+        return hit[1]
+    record = parse_voc(xml_path)
+    _cache[key] = (stat_key, record)
+    return record
+
+
+def read_voc_records(
+    xml_files: Sequence[str],
+    workers: int = 0,
+    chunk_size: int = 64
+) -> List[VocRecord]:
+    """
+    批量读取 VOC XML，未命中缓存的文件在进程池中解析
+
+    Args:
+        xml_files: XML 文件列表
+        workers: 并行进程数，0 表示全部核心
+        chunk_size: 每个进程任务一次处理的文件数
+
+    Returns:
+        与 xml_files 顺序一致的 VocRecord 列表（解析失败的文件不在其中）
+    """
+    keys = [os.path.abspath(f) for f in xml_files]
+    stat_keys = {}
+    todo = []
+    for key in keys:
+        stat_keys[key] = _stat_key(key)
+        hit = _cache.get(key)
+        if hit is None or hit[0] != stat_keys[key]:
+            todo.append((key,))
+
+    def collect(args, record):
+        _cache[args[0]] = (stat_keys[args[0]], record)
+
+    if todo:
+        run_tasks(parse_voc, todo, workers, chunk_size, desc='解析XML', on_success=collect)
+    return [_cache[key][1] for key in keys if key in _cache]
+
+
+def voc_polygons(record: VocRecord, prefer_rotated: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    每个 object 的四角点像素坐标
+
+    Args:
+        record: VocRecord
+        prefer_rotated: 同时存在 robndbox 与 bndbox 时是否优先使用 robndbox
+
+    Returns:
+        (polygons, valid)：polygons 为 (n, 4, 2)，valid 为 (n,) bool，两种框都不完整时为 False
+    """
+    rob_ok = np.isfinite(record.robndbox).all(axis=1)
+    box_ok = np.isfinite(record.bndbox).all(axis=1)
+    use_rob = rob_ok & (prefer_rotated | ~box_ok)
+
+    polygons = boxes_to_polygons(record.bndbox)
+    polygons[use_rob] = xywha_to_polygons(record.robndbox[use_rob])
+    return polygons, use_rob | box_ok
@@ -1,50 +1,28 @@
 import os
-import xml.etree.ElementTree as ET
-import math
 import glob
+import argparse
+
+from convert_runner import add_runner_arguments
+from obb_geometry import normalize_polygons, xywha_to_polygons
+from voc_reader import load_voc, read_voc_records, voc_polygons
 
 def parse_robndbox(cx, cy, w, h, angle):
     """
     根据 cx, cy, w, h, angle(弧度) 计算出带有旋转的四个角点。
     返回: [(x1,y1), (x2,y2), (x3,y3), (x4,y4)]
     """
-    # math.cos/sin 的参数为弧度
-    cos_a = math.cos(angle)
-    sin_a = math.sin(angle)
-    
-    # 图像坐标系通常 y 轴向下。获取未旋转时的四个相对顶点的坐标：
-    # top-left
-    dx1, dy1 = -w / 2, -h / 2
-    # top-right
-    dx2, dy2 = w / 2, -h / 2
-    # bottom-right
-    dx3, dy3 = w / 2, h / 2
-    # bottom-left
-    dx4, dy4 = -w / 2, h / 2
-    
-    pts = [(dx1, dy1), (dx2, dy2), (dx3, dy3), (dx4, dy4)]
-    
-    corners = []
-    for dx, dy in pts:
-        # 基本旋转矩阵计算
-        rx = cx + dx * cos_a - dy * sin_a
-        ry = cy + dx * sin_a + dy * cos_a
-        corners.append((rx, ry))
-        
-    return corners
+    # 批量版本见 obb_geometry.xywha_to_polygons
+    return [tuple(p) for p in xywha_to_polygons([cx, cy, w, h, angle])[0].tolist()]
 
-def convert_xml_to_yolo_obb(xml_path, out_dir, class_mapping):
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
-    
-    size = root.find("size")
-    if size is None:
-        return
-        
-    img_w = float(size.find("width").text)
-    img_h = float(size.find("height").text)
+def convert_xml_to_yolo_obb(xml_path, out_dir, class_mapping, record=None):
+    """
+    转换单个 XML；record 为 None 时通过 voc_reader 解析（带缓存）
+    """
+    if record is None:
+        record = load_voc(xml_path)
     
-    if img_w <= 0 or img_h <= 0:
+    img_w, img_h = record.size
+    if not (img_w > 0 and img_h > 0):
         return
 
     # 准备输出的 txt 文件
@@ -52,63 +30,40 @@ def convert_xml_to_yolo_obb(xml_path, out_dir, class_mapping):
     out_file_path = os.path.join(out_dir, out_file_name)
     
     # 提取所有 object
-    objects = root.findall("object")
-    if not objects:
+    if not record.names:
         return
-        
+    
+    # robndbox 优先，兼容水平框 bndbox；两者都没有的 object 跳过
+    polygons, valid = voc_polygons(record)
+    
+    class_ids = []
+    for name in record.names:
+        # 如果遇到字典中没有的类别，自动添加到字典中
+        if name not in class_mapping:
+            class_mapping[name] = len(class_mapping)
+        class_ids.append(class_mapping[name])
+    
+    # YOLO OBB 中要求坐标必须属于 [0, 1] 归一化区间，整个文件一次归一化和裁剪
+    norm = normalize_polygons(polygons[valid], (img_w, img_h), clamp=True).reshape(-1, 8)
+    class_ids = [c for c, ok in zip(class_ids, valid.tolist()) if ok]
+    
     with open(out_file_path, "w", encoding="utf-8") as f:
-        for obj in objects:
-            name = obj.find("name").text
-            
-            # 如果遇到字典中没有的类别，自动添加到字典中
-            if name not in class_mapping:
-                class_mapping[name] = len(class_mapping)
-                
-            class_id = class_mapping[name]
-            
-            # 判断是否为 robndbox (旋转框格式)
-            robndbox = obj.find("robndbox")
-            if robndbox is not None:
-                cx = float(robndbox.find("cx").text)
-                cy = float(robndbox.find("cy").text)
-                w = float(robndbox.find("w").text)
-                h = float(robndbox.find("h").text)
-                angle = float(robndbox.find("angle").text)
-                
-                corners = parse_robndbox(cx, cy, w, h, angle)
-            else:
-                # 兼容水平框 bndbox (非旋转框)
-                bndbox = obj.find("bndbox")
-                if bndbox is not None:
-                    xmin = float(bndbox.find("xmin").text)
-                    ymin = float(bndbox.find("ymin").text)
-                    xmax = float(bndbox.find("xmax").text)
-                    ymax = float(bndbox.find("ymax").text)
-                    corners = [
-                        (xmin, ymin),
-                        (xmax, ymin),
-                        (xmax, ymax),
-                        (xmin, ymax)
-                    ]
-                else:
-                    continue
-            
-            # YOLO OBB 中要求坐标必须属于 [0, 1] 归一化区间
-            norm_corners = []
-            for x, y in corners:
-                nx = max(0.0, min(1.0, x / img_w))
-                ny = max(0.0, min(1.0, y / img_h))
-                norm_corners.append(nx)
-                norm_corners.append(ny)
-            
-            # 格式: class_index x1 y1 x2 y2 x3 y3 x4 y4
-            f.write(f"{class_id} " + " ".join([f"{v:.6f}" for v in norm_corners]) + "\n")
+        # 格式: class_index x1 y1 x2 y2 x3 y3 x4 y4
+        f.write("".join(
+            f"{class_id} " + " ".join([f"{v:.6f}" for v in row]) + "\n"
+            for class_id, row in zip(class_ids, norm.tolist())))
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='VOC XML（bndbox / robndbox）转 YOLO-OBB')
     # 配置 XML 存放目录和想要保存 Labels 的同级目录
     # 注意修改为你的真实目录
-    xml_dir = r"E:\work\drawing_analysis\dataset\obb_all_graphes\xml"
-    out_dir = r"E:\work\drawing_analysis\dataset\obb_all_graphes\labels"
+    parser.add_argument('--input', type=str, default=r"E:\work\drawing_analysis\dataset\obb_all_graphes\xml",
+                        help='XML 目录')
+    parser.add_argument('--output', '-o', type=str, default=r"E:\work\drawing_analysis\dataset\obb_all_graphes\labels",
+                        help='YOLO-OBB 标签输出目录')
+    add_runner_arguments(parser)
+    args = parser.parse_args()
+    xml_dir, out_dir = args.input, args.output
     
     os.makedirs(out_dir, exist_ok=True)
     
@@ -121,9 +76,14 @@ if __name__ == "__main__":
     xml_files = glob.glob(os.path.join(xml_dir, "*.xml"))
     print(f"找到 {len(xml_files)} 个 XML 文件")
     
+    # XML 在进程池中并行解析；新类别的编号依赖文件顺序，写出在主进程中按顺序进行
+    records = {record.path: record for record in read_voc_records(xml_files, args.workers, args.chunk_size)}
     for xml_path in xml_files:
+        record = records.get(os.path.abspath(xml_path))
+        if record is None:
+            continue
         try:
-            convert_xml_to_yolo_obb(xml_path, out_dir, class_mapping)
+            convert_xml_to_yolo_obb(xml_path, out_dir, class_mapping, record)
         except Exception as e:
             print(f"处理文件 {xml_path} 时出现错误: {e}")
             
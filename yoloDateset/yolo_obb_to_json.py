@@ -5,12 +5,19 @@
 输出：JSON 文件（shape_type=rotation）
 
 python yoloDateset/yolo_obb_to_json.py --input E:/work/drawing_analysis/dataset/obb_all_graphes/annotation/all_labels副本/ --output yoloDateset/output/json --width 1915 --height 1660
+python yoloDateset/yolo_obb_to_json.py --input path/to/labels --output path/to/json --images path/to/images --workers 8
 """
 
 import json
 import os
 from pathlib import Path
 
+import numpy as np
+
+from convert_runner import add_runner_arguments, run_tasks
+from file_index import get_index
+from image_meta import get_image_size
+from obb_geometry import denormalize_polygons
 
 # 类别映射（ID到名称）
 ID2LABEL = {
@@ -26,7 +33,8 @@ ID2LABEL = {
 
 
 def convert_yolo_obb_to_json(txt_file: str, image_width: int, image_height: int,
-                             output_dir: str = None, image_path: str = None) -> str:
+                             output_dir: str = None, image_path: str = None,
+                             verbose: bool = True) -> str:
     """
     转换单个 YOLO-OBB txt 文件到 JSON 格式
 
@@ -36,20 +44,23 @@ def convert_yolo_obb_to_json(txt_file: str, image_width: int, image_height: int,
         image_height: 图像高度
         output_dir: 输出目录，默认为 None（与 txt 同目录）
         image_path: 图像路径，默认为 None（自动生成）
+        verbose: 是否打印逐文件信息（批量模式下关闭，由进度条代替）
 
     Returns:
         输出的 JSON 文件路径
     """
     if image_width <= 0 or image_height <= 0:
-        print(f"错误：图像尺寸无效 (width={image_width}, height={image_height})")
+        if verbose:
+            print(f"错误：图像尺寸无效 (width={image_width}, height={image_height})")
         return None
 
     # 读取 YOLO-OBB 文件
     with open(txt_file, 'r', encoding='utf-8') as f:
         lines = f.readlines()
 
-    # 构建 shapes 列表
-    shapes = []
+    # 先收集有效行，再整体反归一化
+    labels = []
+    coords_list = []
     for line_idx, line in enumerate(lines):
         line = line.strip()
         if not line:
@@ -57,36 +68,41 @@ def convert_yolo_obb_to_json(txt_file: str, image_width: int, image_height: int,
 
         parts = line.split()
         if len(parts) != 9:  # class_id + 8个坐标值
-            print(f"警告：{txt_file} 第 {line_idx+1} 行格式错误（应有9个值，实际{len(parts)}个），跳过")
+            if verbose:
+                print(f"警告：{txt_file} 第 {line_idx+1} 行格式错误（应有9个值，实际{len(parts)}个），跳过")
             continue
 
         try:
             class_id = int(parts[0])
             coords = [float(x) for x in parts[1:]]
         except ValueError as e:
-            print(f"警告：{txt_file} 第 {line_idx+1} 行数据解析失败: {e}，跳过")
+            if verbose:
+                print(f"警告：{txt_file} 第 {line_idx+1} 行数据解析失败: {e}，跳过")
             continue
 
         if class_id not in ID2LABEL:
-            print(f"警告：{txt_file} 第 {line_idx+1} 行包含未知类别 ID '{class_id}'，跳过")
+            if verbose:
+                print(f"警告：{txt_file} 第 {line_idx+1} 行包含未知类别 ID '{class_id}'，跳过")
             continue
 
-        # 将归一化坐标转换为像素坐标
-        points = []
-        for i in range(0, len(coords), 2):
-            px = coords[i] * image_width
-            py = coords[i+1] * image_height
-            points.append([px, py])
+        labels.append(ID2LABEL[class_id])
+        coords_list.append(coords)
 
-        # 构建 shape 对象
-        shape = {
-            "label": ID2LABEL[class_id],
+    # 将归一化坐标转换为像素坐标（一次向量化计算）
+    points_all = denormalize_polygons(np.asarray(coords_list, dtype=np.float64).reshape(-1, 4, 2),
+                                      (image_width, image_height)).tolist()
+
+    # 构建 shapes 列表
+    shapes = [
+        {
+            "label": label,
             "points": points,
             "group_id": None,
             "shape_type": "rotation",
             "flags": {}
         }
-        shapes.append(shape)
+        for label, points in zip(labels, points_all)
+    ]
 
     # 获取输出文件路径
     txt_path = Path(txt_file)
@@ -118,20 +134,48 @@ def convert_yolo_obb_to_json(txt_file: str, image_width: int, image_height: int,
     with open(json_file, 'w', encoding='utf-8') as f:
         json.dump(json_data, f, indent=2, ensure_ascii=False)
 
-    print(f"已转换：{txt_file} -> {json_file} (共 {len(shapes)} 个标注)")
+    if verbose:
+        print(f"已转换：{txt_file} -> {json_file} (共 {len(shapes)} 个标注)")
     return str(json_file)
 
 
+def find_image(stem: str, image_dir: str):
+    """在图像目录中查找与标注同名的图像文件，找不到返回 None"""
+    return get_index(image_dir).get(stem)
+
+
+def convert_txt_file(txt_file: str, image_width: int, image_height: int,
+                     output_dir: str = None, image_dir: str = None) -> str:
+    """
+    批量模式下的单文件任务：指定 image_dir 时按同名图像的实际尺寸转换，
+    找不到图像则使用给定的默认尺寸
+    """
+    image_path = None
+    if image_dir:
+        found = find_image(Path(txt_file).stem, image_dir)
+        size = get_image_size(found) if found else None
+        if size is not None:
+            image_width, image_height = size
+            image_path = os.path.basename(found)
+
+    return convert_yolo_obb_to_json(txt_file, image_width, image_height,
+                                    output_dir, image_path, verbose=False)
+
+
 def convert_directory(txt_dir: str, image_width: int, image_height: int,
-                     output_dir: str = None):
+                     output_dir: str = None, image_dir: str = None,
+                     workers: int = 0, chunk_size: int = 64):
     """
-    批量转换目录下所有 txt 文件
+    批量转换目录下所有 txt 文件（多进程）
 
     Args:
         txt_dir: 包含 txt 文件的目录
-        image_width: 图像宽度
-        image_height: 图像高度
+        image_width: 图像宽度（指定 image_dir 时作为找不到图像的回退值）
+        image_height: 图像高度（同上）
         output_dir: 输出目录，默认为 None（与 txt 同目录）
+        image_dir: 图像目录，指定后按同名图像的实际尺寸反归一化（只读文件头）
+        workers: 并行进程数，0 表示全部核心
+        chunk_size: 每个进程任务一次处理的文件数
     """
     print(f"使用类别映射：{ID2LABEL}")
 
@@ -140,13 +184,8 @@ def convert_directory(txt_dir: str, image_width: int, image_height: int,
 
     print(f"找到 {len(txt_files)} 个 txt 文件")
 
-    converted = 0
-    for txt_file in txt_files:
-        result = convert_yolo_obb_to_json(str(txt_file), image_width, image_height, output_dir)
-        if result:
-            converted += 1
-
-    print(f"转换完成：{converted}/{len(txt_files)}")
+    tasks = [(str(txt_file), image_width, image_height, output_dir, image_dir) for txt_file in txt_files]
+    return run_tasks(convert_txt_file, tasks, workers, chunk_size)
 
 
 if __name__ == '__main__':
@@ -157,21 +196,31 @@ if __name__ == '__main__':
                         help='输入的 txt 文件或目录')
     parser.add_argument('--output', '-o', type=str, default=None,
                         help='输出目录，默认为 None（与输入 txt 同目录）')
-    parser.add_argument('--width', '-W', type=int, required=True,
-                        help='图像宽度（像素）')
-    parser.add_argument('--height', '-H', type=int, required=True,
-                        help='图像高度（像素）')
+    parser.add_argument('--width', '-W', type=int, default=0,
+                        help='图像宽度（像素），指定 --images 时作为回退值')
+    parser.add_argument('--height', '-H', type=int, default=0,
+                        help='图像高度（像素），指定 --images 时作为回退值')
+    parser.add_argument('--images', type=str, default=None,
+                        help='图像目录（可选），按同名图像的实际尺寸转换')
     parser.add_argument('--image-path', type=str, default=None,
                         help='图像路径（仅用于单文件转换，默认使用同名 .png 文件）')
+    add_runner_arguments(parser)
 
     args = parser.parse_args()
 
     input_path = Path(args.input)
 
     if input_path.is_file():
-        convert_yolo_obb_to_json(str(input_path), args.width, args.height,
+        width, height = args.width, args.height
+        if args.images:
+            found = find_image(input_path.stem, args.images)
+            size = get_image_size(found) if found else None
+            if size is not None:
+                width, height = size
+        convert_yolo_obb_to_json(str(input_path), width, height,
                                 args.output, args.image_path)
     elif input_path.is_dir():
-        convert_directory(str(input_path), args.width, args.height, args.output)
+        convert_directory(str(input_path), args.width, args.height, args.output, args.images,
+                          args.workers, args.chunk_size)
     else:
         print(f"错误：{args.input} 不存在")